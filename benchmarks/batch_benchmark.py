@@ -0,0 +1,110 @@
+# benchmarks/batch_benchmark.py
+"""
+Throughput of batch mode (larry/batch.py) at different worker counts.
+
+A synthetic command file of the nightly bulk kind (expenses, meals, to-do
+items, notes, language lists) is replayed once per worker count.  Every run
+happens in a fresh interpreter inside its own temporary directory, with
+HOME pointed there as well, so the real databases and data files are not
+touched.
+
+Usage:
+    python benchmarks/batch_benchmark.py [--commands 400] [--workers 1,2,4,8] [--json out.json]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+FOODS = ["apple", "banana", "egg", "white rice", "oatmeal", "milk"]
+
+
+def make_commands(count):
+    """Return count batch commands cycling through a few bulk-entry intents"""
+    commands = []
+    for i in range(count):
+        kind = i % 5
+        if kind == 0:
+            commands.append({"id": i, "utterance": "track expense", "slots": {
+                "choice": "1", "amount": 3 + i % 40, "category": "Food",
+                "description": f"item {i}", "create_category": True}})
+        elif kind == 1:
+            commands.append({"id": i, "utterance": "track calories", "slots": {
+                "choice": "1", "food": FOODS[i % len(FOODS)], "quantity": 1 + i % 3, "meal_type": "Snack"}})
+        elif kind == 2:
+            commands.append({"id": i, "utterance": "add task", "answers": [f"task number {i}"]})
+        elif kind == 3:
+            commands.append({"id": i, "utterance": "create note", "slots": {
+                "title": f"note {i}", "content": "bulk imported"}})
+        else:
+            commands.append({"id": i, "utterance": "list languages"})
+    return commands
+
+
+def run_once(commands, workers):
+    """Replay commands with the given worker count and return the batch statistics"""
+    with tempfile.TemporaryDirectory() as workdir:
+        os.makedirs(os.path.join(workdir, "tasks", "to_do"))
+        command_file = os.path.join(workdir, "commands.jsonl")
+        with open(command_file, "w") as f:
+            for command in commands:
+                f.write(json.dumps(command) + "\n")
+
+        stats_file = os.path.join(workdir, "stats.json")
+        env = dict(os.environ, HOME=workdir, PYTHONPATH=REPO_ROOT)
+        proc = subprocess.run(
+            [sys.executable, "-m", "larry.batch", command_file, "--workers", str(workers),
+             "--output", os.path.join(workdir, "results.jsonl"), "--stats", stats_file],
+            cwd=workdir, env=env, capture_output=True, text=True
+        )
+        if not os.path.exists(stats_file):
+            raise RuntimeError(f"batch run with {workers} workers failed:\n{proc.stderr}")
+        with open(stats_file) as f:
+            stats = json.load(f)
+
+        errors = {}
+        with open(os.path.join(workdir, "results.jsonl")) as f:
+            for line in f:
+                result = json.loads(line)
+                if not result["ok"]:
+                    errors.setdefault(result.get("intent"), result["message"])
+        stats["errors"] = errors
+        return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark batch mode throughput")
+    parser.add_argument("--commands", type=int, default=400, help="commands per run")
+    parser.add_argument("--workers", default="1,2,4,8", help="comma separated worker counts")
+    parser.add_argument("--json", help="write the results to this file as JSON")
+    args = parser.parse_args()
+
+    commands = make_commands(args.commands)
+    results = [run_once(commands, int(w)) for w in args.workers.split(",")]
+
+    base = results[0]["commands_per_second"]
+    print(f"{'workers':>8}{'seconds':>10}{'commands/s':>12}{'failed':>8}{'speedup':>9}")
+    for r in results:
+        print(f"{r['workers']:>8}{r['seconds']:>10.2f}{r['commands_per_second']:>12.1f}"
+              f"{r['failed']:>8}{r['commands_per_second'] / base:>8.1f}x")
+
+    errors = {}
+    for r in results:
+        errors.update(r["errors"])
+    if errors:
+        print("\nFailed intents (missing dependencies in this environment?):")
+        for intent, message in errors.items():
+            print(f"  {intent}: {message}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
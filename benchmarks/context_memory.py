@@ -0,0 +1,114 @@
+# benchmarks/context_memory.py
+"""
+Memory per context item.
+
+Builds histories of synthetic context items as they come out of the
+journal (one json.loads per line, so no two items share their strings) and
+measures with tracemalloc how many bytes each item costs:
+
+  dict     the items as the dicts json.loads returns, as they used to be kept
+  record   the same items as ContextItem records (tasks/context/items.py)
+  store    a ContextStore holding the records: the records plus the index
+           related() searches
+
+It runs in a scratch directory (see hot_paths.scratch_directory), so the
+real context history is never touched.
+
+Usage:
+    python benchmarks/context_memory.py [--sizes 100,10000,1000000] [--no-store] [--json out.json]
+"""
+import argparse
+import gc
+import json
+import os
+import random
+import sys
+import tracemalloc
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, os.path.join(REPO_ROOT, "benchmarks"))
+
+from hot_paths import scratch_directory
+
+
+def journal_lines(count, rng):
+    """Journal lines for count distinct synthetic items"""
+    from hot_paths import synthetic_context
+
+    for i, item in enumerate(synthetic_context(count, rng)):
+        item["text"] += f" ({i})"
+        yield json.dumps({"seq": i + 1, "item": item})
+
+
+def allocated(build):
+    """Return (bytes still allocated by the object build() returns, that object)"""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    value = build()
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return after - before, value
+
+
+def measure(size, rng, with_store):
+    from tasks.context.context_manager import ContextStore
+    from tasks.context.items import ContextItem
+
+    lines = list(journal_lines(size, rng))
+    results = {}
+
+    dict_bytes, items = allocated(lambda: [json.loads(line)["item"] for line in lines])
+    results["dict"] = dict_bytes / size
+    record_bytes, records = allocated(lambda: [ContextItem.from_dict(item) for item in items])
+    results["record"] = record_bytes / size
+    del items
+    if with_store:
+        def build_store():
+            store = ContextStore("context_history.json", maxlen=None, archive=False)
+            store.extend(records)
+            return store
+
+        # The records already exist, so this is the index on top of them
+        index_bytes, store = allocated(build_store)
+        results["store"] = (record_bytes + index_bytes) / size
+        del store
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the memory each context item takes")
+    parser.add_argument("--sizes", default="100,10000,1000000", help="comma separated history sizes")
+    parser.add_argument("--no-store", action="store_true", help="skip the ContextStore (index) measurement")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", help="write the results to this file as JSON")
+    args = parser.parse_args()
+    json_path = os.path.abspath(args.json) if args.json else None
+    with scratch_directory():
+        results = run(args)
+
+    if json_path:
+        with open(json_path, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {json_path}")
+
+
+def run(args):
+    """Measure every size, print and return the bytes per item"""
+    rng = random.Random(args.seed)
+    results = {}
+    print(f"{'items':>10}{'dict B/item':>14}{'record B/item':>16}{'saved':>8}"
+          + ("" if args.no_store else f"{'store B/item':>15}"))
+    for size in (int(n) for n in args.sizes.split(",")):
+        r = results[size] = measure(size, rng, not args.no_store)
+        line = f"{size:>10}{r['dict']:>14.0f}{r['record']:>16.0f}{1 - r['record'] / r['dict']:>8.0%}"
+        if "store" in r:
+            line += f"{r['store']:>15.0f}"
+        print(line)
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+# benchmarks/dispatch_benchmark.py
+"""
+Compare the old sequential intent matching with the compiled dispatcher.
+
+Both dispatchers run over the same corpus of utterances; the script first
+checks that they pick the same intent for every utterance and then times
+them.  User inputs found in the repository's context_history.json are
+added to the corpus.  Everything runs in a scratch directory (see
+hot_paths.scratch_directory), so no context file is written next to the
+real one.
+
+Usage:
+    python benchmarks/dispatch_benchmark.py [--repeat 2000] [--json out.json]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from hot_paths import scratch_directory
+from larry.intents import dispatcher
+from reference import match_intent as match_sequential
+
+CORPUS = [
+    # chatbot-bound inputs (the most common case)
+    "hi", "hello there", "how are you", "what's your name", "my name is sam",
+    "thanks a lot", "who are you", "can you help me with something",
+    "I had a long day at work and want to relax for a bit",
+    "tell me something interesting about space",
+    "bhai-ka-wifi",
+    # task intents
+    "send email", "please send email to my professor", "check emails", "google python asyncio",
+    "search for cheap flights", "remind me to call mom", "weather in London",
+    "add task buy milk", "show tasks", "mark task as done", "delete task",
+    "find places to visit", "search file", "scan text", "ocr this image",
+    "summarize this article", "cricket score", "any football match today",
+    "create note", "add event", "show events today", "list notes",
+    "what is quantum computing", "convert currency", "manage passwords",
+    "screen time", "translate this", "list languages", "merge pdfs",
+    "extract pdf pages", "rotate pdf", "create pdf", "track expense",
+    "track calories", "play song called Imagine", "play music by Queen",
+    "play playlist Rock Classics", "pause", "pause music", "resume",
+    "next", "skip this", "previous", "volume up 10", "now playing",
+    "list my playlists",
+]
+
+
+def load_history_inputs():
+    from tasks.context.context_manager import read_history
+
+    try:
+        items = read_history(os.path.join(REPO_ROOT, "context_history.json"))
+    except Exception:
+        return []
+    inputs = []
+    for item in items:
+        if item.get("type") == "user_input":
+            text = item["text"]
+            inputs.append(text[len("User: "):] if text.startswith("User: ") else text)
+    return inputs
+
+
+def time_dispatcher(func, corpus, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for text in corpus:
+            func(text)
+    elapsed = time.perf_counter() - start
+    return elapsed / (repeat * len(corpus))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark intent dispatch")
+    parser.add_argument("--repeat", type=int, default=2000, help="passes over the corpus")
+    parser.add_argument("--json", help="write the results to this file as JSON")
+    args = parser.parse_args()
+    json_path = os.path.abspath(args.json) if args.json else None
+    with scratch_directory():
+        results = run(args)
+
+    if json_path:
+        with open(json_path, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {json_path}")
+
+
+def run(args):
+    """Check that both dispatchers agree, time them, print and return the results"""
+    corpus = CORPUS + load_history_inputs()
+
+    mismatches = []
+    for text in corpus:
+        old = match_sequential(text)[0]
+        new = dispatcher.match(text)[0]
+        if old != new:
+            mismatches.append((text, old, new))
+    if mismatches:
+        for text, old, new in mismatches:
+            print(f"MISMATCH {text!r}: sequential={old} compiled={new}")
+        sys.exit(1)
+
+    chatbot = [t for t in corpus if dispatcher.match(t)[0] == "chatbot"]
+    results = {"corpus_size": len(corpus), "chatbot_inputs": len(chatbot)}
+    for label, subset in (("all", corpus), ("chatbot", chatbot)):
+        seq = time_dispatcher(match_sequential, subset, args.repeat)
+        comp = time_dispatcher(dispatcher.match, subset, args.repeat)
+        results[label] = {"sequential_us": seq * 1e6, "compiled_us": comp * 1e6,
+                          "speedup": seq / comp if comp else None}
+
+    print(f"Corpus: {len(corpus)} utterances ({len(chatbot)} fall through to the chatbot), "
+          f"all agree on the matched intent\n")
+    print(f"{'inputs':<10}{'sequential us':>16}{'compiled us':>14}{'speedup':>10}")
+    for label in ("all", "chatbot"):
+        r = results[label]
+        print(f"{label:<10}{r['sequential_us']:>16.2f}{r['compiled_us']:>14.2f}{r['speedup']:>9.1f}x")
+    return results
+
+
+if __name__ == "__main__":
+    main()
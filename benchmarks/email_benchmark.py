@@ -0,0 +1,118 @@
+# benchmarks/email_benchmark.py
+"""
+Email drafting: load time, time to first token and tokens/s.
+
+Each mode runs in a fresh interpreter and drafts an email for every subject
+below, straight from the model (the on-disk cache is not used):
+
+  prefix     the instructions' key/value cache computed at load and reused
+  no-prefix  the whole prompt run through the model for every draft
+
+For each mode it reports the load time (model and prefix cache), peak RSS,
+the median and worst time to first token, the median time per draft and
+the tokens generated per second.
+
+Usage:
+    python benchmarks/email_benchmark.py [--modes prefix,no-prefix] [--max-new-tokens 160]
+                                         [--time-budget 20] [--json out.json]
+"""
+import argparse
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+MODES = ("prefix", "no-prefix")
+
+SUBJECTS = (
+    ("sick leave for two days", "manager@example.com", None),
+    ("moving the project review to Friday", "team@example.com", ["Added event: project review on Thursday"]),
+    ("a refund for a damaged order", "support@example.com", None),
+    ("an extension of the report deadline", "professor@example.com",
+     ["Added task: finish report", "Created note: report outline"]),
+    ("booking the meeting room for the workshop", "office@example.com", None),
+)
+
+
+def run_mode(mode, max_new_tokens, time_budget):
+    """Draft every subject with one mode in this process and return the measurements"""
+    from tasks.chatbot.email import EmailGenerator, build_prompt
+
+    generator = EmailGenerator(reuse_prefix=mode == "prefix")
+    generator.load()
+    # One draft first, so one-time costs are not counted
+    generator.generate(build_prompt(*SUBJECTS[0]), max_new_tokens=8, time_budget=time_budget)
+
+    drafts = [generator.generate(build_prompt(*subject), max_new_tokens=max_new_tokens, time_budget=time_budget)
+              for subject in SUBJECTS]
+    first_tokens = [d.first_token_seconds for d in drafts if d.first_token_seconds is not None]
+    rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        rss_kb //= 1024
+    return {
+        "mode": mode,
+        "load_seconds": generator.load_seconds,
+        "peak_rss_mb": rss_kb / 1024,
+        "ttft_median": statistics.median(first_tokens) if first_tokens else None,
+        "ttft_max": max(first_tokens) if first_tokens else None,
+        "draft_median": statistics.median(d.seconds for d in drafts),
+        "tokens": sum(d.tokens for d in drafts),
+        "tokens_per_second": sum(d.tokens for d in drafts) / sum(d.seconds for d in drafts),
+        "cut_short": sum(not d.complete for d in drafts),
+    }
+
+
+def run_child(mode, args):
+    """Run one mode in a fresh interpreter; returns its measurements or {"error": ...}"""
+    command = [sys.executable, os.path.abspath(__file__), "--child", mode,
+               "--max-new-tokens", str(args.max_new_tokens), "--time-budget", str(args.time_budget)]
+    proc = subprocess.run(command, cwd=REPO_ROOT, capture_output=True, text=True)
+    for line in proc.stdout.splitlines():
+        if line.startswith("__BENCH__"):
+            return json.loads(line[len("__BENCH__"):])
+    lines = proc.stderr.strip().splitlines()
+    return {"mode": mode, "error": lines[-1] if lines else f"exit status {proc.returncode}"}
+
+
+def main():
+    from tasks.chatbot.email import MAX_NEW_TOKENS, TIME_BUDGET
+
+    parser = argparse.ArgumentParser(description="Measure email drafting latency")
+    parser.add_argument("--modes", default=",".join(MODES), help="comma separated modes to run")
+    parser.add_argument("--max-new-tokens", type=int, default=MAX_NEW_TOKENS, help="tokens per draft at most")
+    parser.add_argument("--time-budget", type=float, default=TIME_BUDGET, help="seconds per draft at most")
+    parser.add_argument("--json", help="write the results to this file as JSON")
+    parser.add_argument("--child", metavar="MODE", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print("__BENCH__" + json.dumps(run_mode(args.child, args.max_new_tokens, args.time_budget)))
+        return
+
+    results = [run_child(mode, args) for mode in args.modes.split(",")]
+
+    def ms(value):
+        return f"{value * 1000:.0f}" if value is not None else "-"
+
+    print(f"{'mode':<11}{'load s':>8}{'peak RSS MB':>13}{'TTFT ms':>9}{'max ms':>8}{'draft s':>9}"
+          f"{'tokens/s':>10}{'cut short':>11}")
+    for r in results:
+        if "error" in r:
+            print(f"{r['mode']:<11}  failed: {r['error']}")
+            continue
+        print(f"{r['mode']:<11}{r['load_seconds']:>8.2f}{r['peak_rss_mb']:>13.1f}{ms(r['ttft_median']):>9}"
+              f"{ms(r['ttft_max']):>8}{r['draft_median']:>9.2f}{r['tokens_per_second']:>10.1f}{r['cut_short']:>11}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
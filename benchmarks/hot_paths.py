@@ -0,0 +1,522 @@
+# benchmarks/hot_paths.py
+"""
+Microbenchmarks for Larry's hot paths, on synthetic data.
+
+  dispatch    match_intent + utterance_slots, and analyze_input end to end
+              for chatbot-bound inputs
+  context     update_context (alone, with save_context and with a synchronous
+              save), get_context
+              and get_related_context with a full 100-item history and with
+              much larger ones, also with semantic (hashed vector) retrieval
+  sessions    loading a history of many sessions and get_related_context on
+              it, raw and condensed into session digests
+  topics      detect_context_topics on short inputs and long pasted texts,
+              next to the old one-search-per-topic detector
+  chatbot     get_response without context and with 10 and 1,000 items of
+              it, next to the old elif chain
+  music       MusicController.search_songs over 100k songs
+  expenses    ExpenseDatabase.get_expenses over 100k expenses
+  calories    CalorieTracker.generate_report over a year of meals
+  files       search_files over a large directory tree
+
+Everything runs inside a temporary directory with HOME pointed there, so
+the real context history and databases are never touched.  Results are
+written as JSON named after the current commit, so runs can be compared:
+
+    python benchmarks/hot_paths.py                       # -> benchmarks/results/<commit>.json
+    python benchmarks/hot_paths.py --only context,music --quick
+    python benchmarks/hot_paths.py --compare benchmarks/results/abc1234.json
+
+Each result reports seconds per call: the best and the median of several
+repeats, each repeat running the call often enough to take ~0.2 s.
+"""
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import timeit
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+RESULTS_DIR = os.path.join(REPO_ROOT, "benchmarks", "results")
+
+WORDS = ("weather", "email", "meeting", "project", "report", "london", "music", "budget", "task",
+         "doctor", "flight", "invoice", "lunch", "python", "deadline", "password", "notes", "pdf",
+         "translate", "calendar", "groceries", "birthday", "football", "summary", "holiday")
+
+CONTEXT_TEMPLATES = (
+    "User: what's the weather in {0}",
+    "Checking weather for {0}",
+    "Added task: {0} {1}",
+    "User: send email to {0} about {1}",
+    "Email sent to {0}@example.com with subject: {1}",
+    "Created note: {0} {1}",
+    "Searching for: {0} {1}",
+    "Assistant response: I found something about {0} and {1}",
+    "Error: could not reach {0}",
+    "Added event: {0} on Friday",
+    "User: I prefer {0} over {1}",
+)
+CONTEXT_TYPES = ("user_input", "weather", "task", "email", "note", "search", "assistant_response",
+                 "error", "event", "system")
+
+# (input, status the handler records, what it records once done) for the
+# commands of a synthetic session
+SESSION_COMMANDS = (
+    ("track expense", "Expense tracker initiated", "Added expense: {n} for {0}"),
+    ("add task", "Task addition initiated", "Added task: {0} {1}"),
+    ("weather in {0}", "Weather check initiated", "Checking weather for {0}"),
+    ("create note", "Note creation initiated", "Created note: {0} {1}"),
+    ("search for {0}", "Web search initiated", "Searching for: {0} {1}"),
+)
+
+CHAT_INPUTS = ("hello there", "how are you", "what's your name", "my name is sam",
+               "tell me something interesting", "thanks a lot", "what did I ask before",
+               "I had a long day at work and want to relax for a bit")
+
+# Context items passed to get_response
+CHAT_CONTEXT_SIZES = (10, 1000)
+
+
+def measure(func, repeat=5):
+    """Time func() and return seconds per call (best and median of repeat runs)"""
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    per_call = [t / number for t in timer.repeat(repeat=repeat, number=number)]
+    return {"best": min(per_call), "median": statistics.median(per_call), "calls": number * repeat}
+
+
+def synthetic_texts(count, rng):
+    return [rng.choice(CONTEXT_TEMPLATES).format(rng.choice(WORDS), rng.choice(WORDS)) for _ in range(count)]
+
+
+def synthetic_context(count, rng):
+    """Context items shaped like the ones update_context stores"""
+    from tasks.context.context_manager import detect_context_topics
+
+    texts = synthetic_texts(min(count, 500), rng)
+    topics = {text: detect_context_topics(text) for text in texts}
+    start = datetime.datetime(2024, 1, 1)
+    items = []
+    for i in range(count):
+        text = texts[i % len(texts)]
+        item = {"text": text, "type": CONTEXT_TYPES[i % len(CONTEXT_TYPES)],
+                "timestamp": (start + datetime.timedelta(minutes=i)).strftime("%Y-%m-%d %H:%M:%S")}
+        if topics[text]:
+            item["topics"] = topics[text]
+        items.append(item)
+    return items
+
+
+# --- Benchmarks ------------------------------------------------------------
+# Each takes (args, rng) and returns {name: result}
+
+def bench_dispatch(args, rng):
+    from dispatch_benchmark import CORPUS
+    from larry.handlers import utterance_slots
+    from larry.intents import match_intent
+    import main
+
+    def dispatch_corpus():
+        for text in CORPUS:
+            intent, match = match_intent(text)
+            utterance_slots(intent, match, text)
+
+    def analyze_chat():
+        with contextlib.redirect_stdout(io.StringIO()):
+            for text in CHAT_INPUTS:
+                main.analyze_input(text, *match_intent(text))
+
+    corpus = measure(dispatch_corpus)
+    chat = measure(analyze_chat)
+    return {
+        "dispatch.match_intent": {**_per_item(corpus, len(CORPUS)), "items": len(CORPUS)},
+        "dispatch.analyze_input_chat": {**_per_item(chat, len(CHAT_INPUTS)), "items": len(CHAT_INPUTS)},
+    }
+
+
+def _per_item(result, count):
+    return {"best": result["best"] / count, "median": result["median"] / count, "calls": result["calls"] * count}
+
+
+def bench_context(args, rng):
+    from tasks.context import context_manager as cm, vectors
+
+    results = {}
+    for size in args.context_sizes:
+        store = cm.ContextStore(os.path.join("context_bench", f"history_{size}.json"), maxlen=size)
+        store.extend(synthetic_context(size, rng))
+        texts = synthetic_texts(100, rng)
+        with cm.use_context(store):
+            position = [0]
+
+            def update():
+                position[0] += 1
+                cm.update_context(texts[position[0] % len(texts)], context_type="task")
+
+            def update_and_save():
+                update()
+                cm.save_context()
+
+            def update_and_flush():
+                update()
+                cm.save_context(wait=True)
+
+            results[f"context.update_context[{size}]"] = measure(update)
+            # What the REPL does after every input: hand over to the writer
+            results[f"context.update_and_save_context[{size}]"] = measure(update_and_save)
+            # Writing and syncing in the request path, as on exit
+            results[f"context.update_and_flush_context[{size}]"] = measure(update_and_flush)
+            results[f"context.get_context[{size}]"] = measure(lambda: cm.get_context(limit=5))
+            # What the chatbot fallback asks for on every unmatched input
+            results[f"context.get_context_chatbot[{size}]"] = measure(lambda: cm.get_context(limit=10))
+            results[f"context.get_context_by_type[{size}]"] = measure(
+                lambda: cm.get_context(limit=5, context_type="weather"))
+            results[f"context.get_related_context[{size}]"] = measure(
+                lambda: cm.get_related_context("weather in london"))
+            results[f"context.get_related_context_miss[{size}]"] = measure(
+                lambda: cm.get_related_context("zebra crossing near the quarry"))
+
+        # The same history ranked by hashed TF-IDF vectors, with a paraphrase
+        if vectors.available():
+            semantic = cm.ContextStore(os.path.join("context_bench", f"semantic_{size}.json"), maxlen=size,
+                                       archive=False, retrieval="semantic")
+            semantic.extend(store.items())
+            results[f"context.related_semantic[{size}]"] = measure(lambda: semantic.related("weather in london"))
+            results[f"context.related_semantic_paraphrase[{size}]"] = measure(
+                lambda: semantic.related("mail my manager"))
+    return results
+
+
+def synthetic_sessions(count, rng, commands=8):
+    """Items of count sessions as the REPL records them, boilerplate included"""
+    start = datetime.datetime(2024, 1, 1)
+    items = []
+    for session in range(count):
+        texts = [("New session started", "system"), ("Session started", "system"),
+                 ("Input mode selected: text", "system")]
+        for _ in range(commands):
+            said, status, done = rng.choice(SESSION_COMMANDS)
+            words = (rng.choice(WORDS), rng.choice(WORDS))
+            said = said.format(*words)
+            texts += [(f"User: {said}", "user_input"), (said, "user_input"), (status, "task"),
+                      (done.format(*words, n=rng.randint(5, 500)), "task")]
+        texts.append(("Session ended", "system"))
+        for i, (text, item_type) in enumerate(texts):
+            timestamp = start + datetime.timedelta(days=session, minutes=i)
+            items.append({"text": text, "type": item_type, "timestamp": timestamp.strftime("%Y-%m-%d %H:%M:%S")})
+    return items
+
+
+def bench_sessions(args, rng):
+    # Registers the intent classifier the digests use
+    import larry.api
+    from tasks.context import context_manager as cm
+
+    items = synthetic_sessions(args.sessions, rng)
+    results = {}
+    for name, digest in (("raw", False), ("digested", True)):
+        path = os.path.join("sessions_bench", name, "context_history.json")
+        os.makedirs(os.path.dirname(path))
+        with open(cm.journal_path(path), "w") as f:
+            for seq, item in enumerate(items, 1):
+                f.write(json.dumps({"seq": seq, "item": item}) + "\n")
+        store = cm.ContextStore(path, maxlen=len(items) + 1, digest_sessions=digest)
+        with contextlib.redirect_stderr(io.StringIO()):
+            # The first load condenses the sessions and rewrites the snapshot
+            store.load()
+            results[f"sessions.load_{name}[{args.sessions}]"] = {**measure(store.load), "items": len(store.items())}
+        results[f"sessions.related_{name}[{args.sessions}]"] = measure(lambda: store.related("expense for samosa"))
+    return results
+
+
+def bench_topics(args, rng):
+    from reference import TopicDetector
+    from tasks.context.context_manager import detect_context_topics, topic_detector
+
+    texts = synthetic_texts(1000, rng)
+
+    def detect_all():
+        for text in texts:
+            detect_context_topics(text)
+
+    results = {"topics.detect_context_topics": {**_per_item(measure(detect_all), len(texts)), "items": len(texts)}}
+
+    # Pasted summaries and notes: long prose with few topic words, and
+    # context-like text full of them; the old one-search-per-topic
+    # detector is timed alongside
+    filler = ("alpha", "river", "quietly", "the", "of", "history", "orange", "yesterday")
+    long_texts = {
+        "prose": " ".join(rng.choice(filler) for _ in range(4000)),
+        "mixed": " ".join(synthetic_texts(300, rng)),
+    }
+    sequential = TopicDetector()
+    for name, text in long_texts.items():
+        if topic_detector.detect(text) != sequential.detect(text):
+            raise AssertionError(f"Topic detectors disagree on the {name} text")
+        results[f"topics.detect_context_topics_long[{name}]"] = {
+            **measure(lambda: detect_context_topics(text)), "chars": len(text)}
+        results[f"topics.detect_sequential_long[{name}]"] = {
+            **measure(lambda: sequential.detect(text)), "chars": len(text)}
+    return results
+
+
+def bench_chatbot(args, rng):
+    from reference import get_response as get_response_sequential
+    from tasks.chatbot.response_generator import get_response
+
+    def respond(respond_to, context):
+        for text in CHAT_INPUTS:
+            respond_to(text, context)
+
+    results = {"chatbot.get_response": _per_item(measure(lambda: respond(get_response, None)), len(CHAT_INPUTS))}
+    # The handler passes the last 10 items; the old elif chain is timed
+    # alongside
+    for size in CHAT_CONTEXT_SIZES:
+        context = synthetic_texts(size, rng) + [f"User: {text}" for text in CHAT_INPUTS]
+        for text in CHAT_INPUTS:
+            if get_response(text, context) != get_response_sequential(text, context):
+                raise AssertionError(f"get_response and the old chain disagree on {text!r}")
+        results[f"chatbot.get_response_with_context[{size}]"] = _per_item(
+            measure(lambda: respond(get_response, context)), len(CHAT_INPUTS))
+        results[f"chatbot.get_response_sequential_with_context[{size}]"] = _per_item(
+            measure(lambda: respond(get_response_sequential, context)), len(CHAT_INPUTS))
+    return results
+
+
+def bench_music(args, rng):
+    from tasks.music_player.music import MusicController
+
+    # MusicController always opens the library next to its module; use a
+    # scratch database instead
+    controller = MusicController.__new__(MusicController)
+    controller.db_path = os.path.abspath("music_bench.db")
+    controller.conn = None
+    controller.initialize_db()
+    conn = controller._connect()
+    conn.executemany(
+        "INSERT INTO songs (title, artist, album, genre, duration, play_count) VALUES (?, ?, ?, ?, ?, ?)",
+        ((f"{rng.choice(WORDS).title()} {rng.choice(WORDS)} {i}", f"Artist {i % 5000}",
+          f"Album {i % 12000}", rng.choice(("Rock", "Pop", "Jazz", "Classical", "Hip Hop")),
+          rng.randint(120, 420), rng.randint(0, 500)) for i in range(args.songs)))
+    conn.commit()
+
+    results = {
+        f"music.search_songs[{args.songs}]": measure(lambda: controller.search_songs("london")),
+        f"music.search_songs_rare[{args.songs}]": measure(lambda: controller.search_songs("Artist 4242")),
+    }
+    with contextlib.redirect_stdout(io.StringIO()):
+        controller.close()
+    return results
+
+
+def bench_expenses(args, rng):
+    from tasks.expense_tracker.expense_db import ExpenseDatabase
+
+    db = ExpenseDatabase()
+    data = db.load_data()
+    start = datetime.date(2023, 1, 1)
+    data["expenses"] = [{
+        "id": i + 1,
+        "amount": round(rng.uniform(1, 300), 2),
+        "category": rng.choice(data["categories"]),
+        "description": f"{rng.choice(WORDS)} {i}",
+        "date": (start + datetime.timedelta(days=i % 730)).strftime("%Y-%m-%d"),
+    } for i in range(args.expenses)]
+    db.save_data(data)
+
+    n = args.expenses
+    return {
+        f"expenses.get_expenses[{n}]": measure(db.get_expenses),
+        f"expenses.get_expenses_category[{n}]": measure(lambda: db.get_expenses(category="Food")),
+        f"expenses.get_expenses_month[{n}]": measure(
+            lambda: db.get_expenses(start_date="2024-03-01", end_date="2024-03-31", limit=20)),
+    }
+
+
+def bench_calories(args, rng):
+    import matplotlib
+    matplotlib.use("Agg")
+    from tasks.calories.calorie_counter import CalorieTracker
+
+    tracker = CalorieTracker(db_path=os.path.join("calorie_bench", "calories.db"))
+    today = datetime.date.today()
+    rows = []
+    for day in range(args.days):
+        date = (today - datetime.timedelta(days=day)).strftime("%Y-%m-%d")
+        for meal in ("Breakfast", "Lunch", "Dinner", "Snack"):
+            rows.append((date, rng.choice(WORDS), rng.randint(100, 900), rng.uniform(0, 40),
+                         rng.uniform(0, 100), rng.uniform(0, 40), meal))
+    tracker.cursor.executemany(
+        "INSERT INTO calorie_intake (date, food_name, calories, protein, carbs, fat, meal_type) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+    tracker.conn.commit()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = measure(lambda: tracker.generate_report(days=args.days), repeat=3)
+    tracker.close()
+    return {f"calories.generate_report[{args.days}d]": result}
+
+
+def bench_files(args, rng):
+    from tasks.file_management.manage_files import search_files
+
+    root = os.path.abspath("file_tree")
+    for i in range(args.files):
+        directory = os.path.join(root, f"d{i % 40}", f"sub{i % 13}", f"leaf{i % 7}")
+        os.makedirs(directory, exist_ok=True)
+        name = f"{rng.choice(WORDS)}_{i}.{rng.choice(('txt', 'pdf', 'jpg', 'py', 'md'))}"
+        open(os.path.join(directory, name), "w").close()
+
+    return {
+        f"files.search_files[{args.files}]": measure(lambda: search_files(root, "report"), repeat=3),
+        f"files.search_files_miss[{args.files}]": measure(lambda: search_files(root, "zzz-none"), repeat=3),
+    }
+
+
+BENCHMARKS = {
+    "dispatch": bench_dispatch,
+    "context": bench_context,
+    "sessions": bench_sessions,
+    "topics": bench_topics,
+    "chatbot": bench_chatbot,
+    "music": bench_music,
+    "expenses": bench_expenses,
+    "calories": bench_calories,
+    "files": bench_files,
+}
+
+
+def git_commit():
+    """Return (short commit hash, whether the tree has local changes)"""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=REPO_ROOT,
+                                    capture_output=True, text=True).stdout.strip())
+        return commit, dirty
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown", False
+
+
+@contextlib.contextmanager
+def scratch_directory():
+    """Run the block inside a temporary directory, with HOME pointed there"""
+    original_cwd, original_home = os.getcwd(), os.environ.get("HOME")
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        os.environ["HOME"] = workdir
+        try:
+            yield workdir
+        finally:
+            os.chdir(original_cwd)
+            if original_home is not None:
+                os.environ["HOME"] = original_home
+
+
+def run(args):
+    """Run the selected benchmarks in a scratch directory and return the report"""
+    rng = random.Random(args.seed)
+    commit, dirty = git_commit()
+    report = {
+        "commit": commit,
+        "dirty": dirty,
+        "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "parameters": {"context_sizes": args.context_sizes, "sessions": args.sessions, "songs": args.songs, "expenses": args.expenses,
+                       "days": args.days, "files": args.files, "seed": args.seed},
+        "results": {},
+        "skipped": {},
+    }
+
+    sys.path.insert(0, os.path.join(REPO_ROOT, "benchmarks"))
+    with scratch_directory():
+        for name in args.only:
+            print(f"Running {name}...", file=sys.stderr)
+            try:
+                report["results"].update(BENCHMARKS[name](args, rng))
+            except ImportError as e:
+                report["skipped"][name] = str(e)
+                print(f"  skipped: {e}", file=sys.stderr)
+    return report
+
+
+def format_report(report, baseline=None):
+    base = baseline["results"] if baseline else {}
+    header = f"{'benchmark':<46}{'best':>12}{'median':>12}"
+    if baseline:
+        header += f"{'baseline':>12}{'change':>9}"
+    lines = [header]
+    for name, result in report["results"].items():
+        line = f"{name:<46}{_fmt(result['best']):>12}{_fmt(result['median']):>12}"
+        if name in base:
+            line += f"{_fmt(base[name]['median']):>12}{result['median'] / base[name]['median']:>8.2f}x"
+        lines.append(line)
+    for name, reason in report["skipped"].items():
+        lines.append(f"{name:<46}{'skipped':>12}  ({reason})")
+    return "\n".join(lines)
+
+
+def _fmt(seconds):
+    if seconds >= 1:
+        return f"{seconds:.2f} s"
+    if seconds >= 1e-3:
+        return f"{seconds * 1e3:.2f} ms"
+    return f"{seconds * 1e6:.1f} us"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Larry's hot paths on synthetic data")
+    parser.add_argument("--only", default=",".join(BENCHMARKS),
+                        help=f"comma separated benchmarks to run (default: all of {', '.join(BENCHMARKS)})")
+    parser.add_argument("--quick", action="store_true", help="smaller data sets for a fast smoke run")
+    parser.add_argument("--context-sizes", help="comma separated history sizes (default: 100,10000,100000)")
+    parser.add_argument("--sessions", type=int, help="sessions in the history to condense (default: 300)")
+    parser.add_argument("--songs", type=int, help="songs in the music library (default: 100000)")
+    parser.add_argument("--expenses", type=int, help="expenses in the database (default: 100000)")
+    parser.add_argument("--days", type=int, default=365, help="days of meals for the calorie report")
+    parser.add_argument("--files", type=int, help="files in the synthetic tree (default: 20000)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", help="where to write the results (default: benchmarks/results/<commit>.json)")
+    parser.add_argument("--compare", metavar="JSON", help="earlier results to compare against")
+    args = parser.parse_args()
+
+    args.only = [name.strip() for name in args.only.split(",") if name.strip()]
+    unknown = [name for name in args.only if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(unknown)}")
+    args.context_sizes = [int(n) for n in (args.context_sizes or ("100,1000" if args.quick else "100,10000,100000")).split(",")]
+    args.sessions = args.sessions or (30 if args.quick else 300)
+    args.songs = args.songs or (5000 if args.quick else 100000)
+    args.expenses = args.expenses or (5000 if args.quick else 100000)
+    args.files = args.files or (2000 if args.quick else 20000)
+
+    report = run(args)
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print(format_report(report, baseline))
+
+    path = args.json
+    if path is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        suffix = "-dirty" if report["dirty"] else ""
+        path = os.path.join(RESULTS_DIR, f"{report['commit']}{suffix}.json")
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {path}")
+
+
+if __name__ == "__main__":
+    main()
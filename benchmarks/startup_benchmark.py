@@ -0,0 +1,104 @@
+# benchmarks/startup_benchmark.py
+"""
+Cold-start benchmark for main.py.
+
+Each run happens in a fresh interpreter so nothing is cached in-process:
+
+  * eager - import main.py and then every task module it registers, which is
+            what the old top-of-file imports did before the first prompt
+  * lazy  - import main.py only, which is what startup costs now
+
+Usage:
+    python benchmarks/startup_benchmark.py [--runs 5] [--json out.json]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs inside the child interpreter; prints one JSON line prefixed by a marker
+CHILD_SCRIPT = r"""
+import importlib, json, resource, sys, time
+start = time.perf_counter()
+import main
+from larry.loader import registered_modules
+failed = {}
+if sys.argv[1] == "eager":
+    for name in registered_modules():
+        try:
+            importlib.import_module(name)
+        except Exception as e:
+            failed[name] = f"{type(e).__name__}: {e}"
+elapsed = time.perf_counter() - start
+rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+if sys.platform == "darwin":
+    rss_kb //= 1024
+print("__BENCH__" + json.dumps({
+    "seconds": elapsed,
+    "peak_rss_kb": rss_kb,
+    "modules": len(sys.modules),
+    "failed": failed,
+}))
+"""
+
+
+def run_once(mode):
+    """Start a fresh interpreter in the given mode and return its measurements"""
+    proc = subprocess.run(
+        [sys.executable, "-c", CHILD_SCRIPT, mode],
+        cwd=REPO_ROOT, capture_output=True, text=True
+    )
+    for line in proc.stdout.splitlines():
+        if line.startswith("__BENCH__"):
+            return json.loads(line[len("__BENCH__"):])
+    raise RuntimeError(f"{mode} run failed:\n{proc.stderr}")
+
+
+def benchmark(mode, runs):
+    samples = [run_once(mode) for _ in range(runs)]
+    return {
+        "mode": mode,
+        "runs": runs,
+        "median_seconds": statistics.median(s["seconds"] for s in samples),
+        "min_seconds": min(s["seconds"] for s in samples),
+        "median_peak_rss_mb": statistics.median(s["peak_rss_kb"] for s in samples) / 1024,
+        "modules": samples[-1]["modules"],
+        "failed_imports": samples[-1]["failed"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure Larry's cold-start time and RSS")
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters per mode")
+    parser.add_argument("--json", help="write the results to this file as JSON")
+    args = parser.parse_args()
+
+    results = [benchmark("eager", args.runs), benchmark("lazy", args.runs)]
+
+    print(f"{'mode':<8}{'median s':>12}{'min s':>12}{'peak RSS MB':>14}{'modules':>10}")
+    for r in results:
+        print(f"{r['mode']:<8}{r['median_seconds']:>12.3f}{r['min_seconds']:>12.3f}"
+              f"{r['median_peak_rss_mb']:>14.1f}{r['modules']:>10}")
+
+    eager, lazy = results
+    if lazy["median_seconds"] > 0:
+        print(f"\nStartup speedup: {eager['median_seconds'] / lazy['median_seconds']:.1f}x, "
+              f"RSS saved: {eager['median_peak_rss_mb'] - lazy['median_peak_rss_mb']:.1f} MB")
+    if eager["failed_imports"]:
+        print("\nModules that could not be imported in this environment "
+              "(their cost is missing from the eager numbers):")
+        for name, error in eager["failed_imports"].items():
+            print(f"  {name}: {error}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
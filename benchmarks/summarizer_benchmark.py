@@ -0,0 +1,190 @@
+# benchmarks/summarizer_benchmark.py
+"""
+Summarizer backends compared on a fixed corpus.
+
+Every backend of tasks/chatbot/summarize.py runs in a fresh interpreter, so
+each one starts cold and its peak memory is its own:
+
+  load       seconds from nothing loaded to a ready pipeline (the first ONNX
+             load also exports the model; run twice to see the cached load)
+  peak RSS   maximum resident set size of the process
+  tokens/s   summary tokens generated per second over the corpus, after
+             one warm-up summary
+
+With --pages N, each backend also summarizes an N-page document made of the
+corpus (map-reduce over chunks, see summarize.py), reporting the seconds it
+took, the chunks summarized on each level and the peak RSS after it.
+
+Usage:
+    python benchmarks/summarizer_benchmark.py [--backends pytorch,quantized,onnx]
+                                              [--threads 4] [--model NAME] [--json out.json]
+                                              [--pages 100 [--batch-size 4] [--workers 1]]
+"""
+import argparse
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+# Summary lengths passed to the pipeline, as summarize_text does by default
+MAX_LEN, MIN_LEN = 150, 50
+
+# Words on a page of a long document
+PAGE_WORDS = 500
+
+CORPUS = (
+    """The city council voted on Tuesday to convert two lanes of the riverside road into a protected
+    cycle path, ending a debate that had run for almost three years. Supporters argued that the road
+    carried far fewer cars than it was built for and that the number of people cycling to work had
+    doubled since the bridge reopened. Shop owners along the route had warned that losing parking
+    would hurt their trade, and the final plan keeps loading bays on the side streets and adds a
+    short-stay car park behind the market. Work is due to start in the spring and to take about
+    nine months, during which buses will be diverted through the old town. The council will publish
+    traffic counts every quarter for two years after the path opens, and has promised to review the
+    layout if journey times for buses rise by more than ten percent.""",
+    """Researchers studying a colony of seabirds on a remote island have found that the birds adjust
+    how far they fly to feed depending on the temperature of the sea. In warm years, when the small
+    fish they hunt move into deeper and cooler water, adults made trips that were on average forty
+    kilometres longer, and their chicks grew more slowly. The team fitted lightweight trackers to
+    more than two hundred birds over six breeding seasons and combined the tracks with satellite
+    measurements of the water. They say the results help explain why the colony has shrunk in some
+    years even though the total amount of fish in the region has not changed much, and that the
+    distance to good feeding grounds may matter more than how much food there is overall. The
+    island's wardens plan to use the findings to decide when to close nearby waters to fishing.""",
+    """A small software company that makes scheduling tools for clinics has released its main product
+    as open source after its largest customer asked for the right to maintain the code itself. The
+    founders said the decision was partly practical: most of their income already came from setting
+    up and supporting the system rather than from licences, and opening the code lets hospitals fix
+    urgent problems without waiting for a release. The project includes the appointment engine, the
+    reminder service that sends text messages to patients, and a reporting module used to plan staff
+    rotas. The company will keep selling hosted versions and support contracts, and says two other
+    firms have already offered to contribute translations and an integration with a common records
+    system. Security researchers welcomed the move but noted that the code will now need careful
+    review, since clinics have often run old versions for years without applying updates.""",
+)
+
+
+def long_document(pages, seed=42):
+    """Return a document of about pages pages: the corpus's sentences shuffled into paragraphs"""
+    rng = random.Random(seed)
+    sentences = [sentence.strip() + "." for text in CORPUS for sentence in " ".join(text.split()).split(".")
+                 if sentence.strip()]
+    paragraphs, words = [], 0
+    while words < pages * PAGE_WORDS:
+        paragraph = " ".join(rng.sample(sentences, 6))
+        paragraphs.append(paragraph)
+        words += len(paragraph.split())
+    return "\n\n".join(paragraphs)
+
+
+def rss_mb():
+    """Return the peak resident set size of this process in MB"""
+    rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        rss_kb //= 1024
+    return rss_kb / 1024
+
+
+def run_backend(backend, model, threads, pages=0, batch_size=None, workers=None):
+    """Summarize the corpus with one backend in this process and return its measurements"""
+    from tasks.chatbot.summarize import BATCH_SIZE, WORKERS, Summarizer
+
+    summarizer = Summarizer(model, backend, threads, batch_size=batch_size or BATCH_SIZE, workers=workers or WORKERS)
+    pipeline = summarizer.load()
+    summarizer(CORPUS[0], MAX_LEN, MIN_LEN)
+
+    start = time.perf_counter()
+    summaries = [summarizer(text, MAX_LEN, MIN_LEN) for text in CORPUS]
+    seconds = time.perf_counter() - start
+    tokens = sum(len(pipeline.tokenizer(summary)["input_ids"]) for summary in summaries)
+    results = {
+        "backend": backend,
+        "threads": summarizer.threads,
+        "load_seconds": summarizer.load_seconds,
+        "peak_rss_mb": rss_mb(),
+        "summary_tokens": tokens,
+        "seconds": seconds,
+        "tokens_per_second": tokens / seconds,
+    }
+    if pages:
+        document = long_document(pages)
+        start = time.perf_counter()
+        summarizer(document, MAX_LEN, MIN_LEN)
+        results["long"] = {
+            "pages": pages,
+            "words": len(document.split()),
+            "batch_size": summarizer.batch_size,
+            "workers": summarizer.workers,
+            "seconds": time.perf_counter() - start,
+            "levels": summarizer.last_levels,
+            "peak_rss_mb": rss_mb(),
+        }
+    return results
+
+
+def run_child(backend, args):
+    """Run one backend in a fresh interpreter; returns its measurements or {"error": ...}"""
+    command = [sys.executable, os.path.abspath(__file__), "--child", backend, "--model", args.model]
+    for option in ("threads", "pages", "batch_size", "workers"):
+        if getattr(args, option):
+            command += [f"--{option.replace('_', '-')}", str(getattr(args, option))]
+    proc = subprocess.run(command, cwd=REPO_ROOT, capture_output=True, text=True)
+    for line in proc.stdout.splitlines():
+        if line.startswith("__BENCH__"):
+            return json.loads(line[len("__BENCH__"):])
+    lines = proc.stderr.strip().splitlines()
+    return {"backend": backend, "error": lines[-1] if lines else f"exit status {proc.returncode}"}
+
+
+def main():
+    from tasks.chatbot.summarize import BACKENDS, MODEL
+
+    parser = argparse.ArgumentParser(description="Compare the summarizer backends")
+    parser.add_argument("--backends", default=",".join(BACKENDS), help="comma separated backends to run")
+    parser.add_argument("--model", default=MODEL, help="Hugging Face model to summarize with")
+    parser.add_argument("--threads", type=int, help="intra-op threads (default: every available CPU)")
+    parser.add_argument("--pages", type=int, default=0, help="also summarize a document of this many pages")
+    parser.add_argument("--batch-size", type=int, help="chunks per pipeline call for the long document")
+    parser.add_argument("--workers", type=int, help="batches summarized at once for the long document")
+    parser.add_argument("--json", help="write the results to this file as JSON")
+    parser.add_argument("--child", metavar="BACKEND", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print("__BENCH__" + json.dumps(run_backend(args.child, args.model, args.threads,
+                                                   args.pages, args.batch_size, args.workers)))
+        return
+
+    results = [run_child(backend, args) for backend in args.backends.split(",")]
+
+    print(f"{'backend':<11}{'threads':>8}{'load s':>10}{'peak RSS MB':>14}{'tokens':>8}{'tokens/s':>10}")
+    for r in results:
+        if "error" in r:
+            print(f"{r['backend']:<11}  failed: {r['error']}")
+            continue
+        print(f"{r['backend']:<11}{r['threads']:>8}{r['load_seconds']:>10.2f}{r['peak_rss_mb']:>14.1f}"
+              f"{r['summary_tokens']:>8}{r['tokens_per_second']:>10.1f}")
+
+    long_runs = [r for r in results if "long" in r]
+    if long_runs:
+        print(f"\n{args.pages}-page document:")
+        print(f"{'backend':<11}{'words':>8}{'seconds':>10}{'peak RSS MB':>14}  chunks per level")
+        for r in long_runs:
+            run = r["long"]
+            print(f"{r['backend']:<11}{run['words']:>8}{run['seconds']:>10.1f}{run['peak_rss_mb']:>14.1f}"
+                  f"  {' -> '.join(map(str, run['levels']))}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
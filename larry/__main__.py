@@ -0,0 +1,25 @@
+# larry/__main__.py
+"""
+Command line entry point.
+
+    python -m larry serve [--socket PATH]       start the resident daemon
+    python -m larry batch commands.jsonl        replay commands without prompts
+    python -m larry [--session ID] "utterance"  ask the running daemon
+"""
+import sys
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] == "serve":
+        from larry.server import main as serve
+        return serve(argv[1:])
+    if argv and argv[0] == "batch":
+        from larry.batch import main as batch
+        return batch(argv[1:])
+    from larry.client import main as client
+    return client(argv)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,158 @@
+# larry/api.py
+"""
+Non-interactive entry point to everything Larry can do.
+
+    from larry.api import Larry
+
+    larry = Larry()
+    larry.execute("weather", city="London")
+    larry.execute("expense_tracker", choice="1", amount=12.5, category="Food")
+    larry.handle("play song called Imagine")
+
+Both return the handler's result dict (see larry.handlers) with the intent
+name added.  Nothing here calls input(); the REPL in main.py asks for the
+slots and then calls execute().  The few tasks that can still ask questions
+of their own (which Wikipedia article, a new expense category, ...) are
+given execute()'s ``read`` / ``read_secret``, keyboard input by default.
+"""
+import getpass
+import io
+import sys
+import threading
+import time
+from contextlib import contextmanager, ExitStack
+
+from larry.handlers import HANDLERS, utterance_slots
+from larry.intents import match_intent
+from larry.metrics import metrics
+from larry.services import services
+from tasks.context.context_manager import register_intent_classifier, update_context
+
+# Session digests list the intents of the inputs (see tasks/context/sessions.py)
+register_intent_classifier(lambda text: match_intent(text)[0])
+
+
+class _StdoutRouter:
+    """Stand-in for sys.stdout that sends each thread's writes to its own buffer, if it has one"""
+
+    def __init__(self, default):
+        self._default = default
+        self._local = threading.local()
+
+    def _target(self):
+        buffer = getattr(self._local, "buffer", None)
+        return buffer if buffer is not None else self._default
+
+    def write(self, text):
+        return self._target().write(text)
+
+    def flush(self):
+        return self._target().flush()
+
+    def __getattr__(self, name):
+        return getattr(self._default, name)
+
+
+_router_lock = threading.Lock()
+
+
+@contextmanager
+def captured_output(into=None):
+    """
+    Collect everything the current thread prints
+
+    Args:
+        into (file-like, optional): Receives the writes as they happen;
+            a new StringIO is used if not given
+    """
+    with _router_lock:
+        if not isinstance(sys.stdout, _StdoutRouter):
+            sys.stdout = _StdoutRouter(sys.stdout)
+        router = sys.stdout
+    buffer = into if into is not None else io.StringIO()
+    previous = getattr(router._local, "buffer", None)
+    router._local.buffer = buffer
+    try:
+        yield buffer
+    finally:
+        router._local.buffer = previous
+
+
+class Larry:
+    """Runs intents by name with their slots passed as keyword arguments"""
+
+    def __init__(self, handlers=HANDLERS):
+        self.handlers = handlers
+
+    def intents(self):
+        """Return the names of every intent and follow-up action execute() accepts"""
+        return sorted(self.handlers)
+
+    def execute(self, intent, capture_output=False, read=None, read_secret=None, **slots):
+        """
+        Run one intent
+
+        Args:
+            intent (str): Intent or follow-up action name, e.g. "weather"
+            capture_output (bool): Put what the task prints in result["output"]
+                instead of writing it to stdout
+            read (callable, optional): Answers questions the task asks
+                itself, given the prompt; defaults to input().  It should
+                raise EOFError when it has no answer.
+            read_secret (callable, optional): Answers password prompts;
+                defaults to getpass()
+            **slots: The handler's inputs, e.g. city="London"
+
+        Returns:
+            dict: {"intent", "ok", "message", "data"} (+ "output" if captured)
+        """
+        if intent not in self.handlers:
+            raise KeyError(f"Unknown intent: {intent}")
+
+        # Handlers are given only the readers they ask with (see Handler.asks)
+        readers = {"read": read or input, "read_secret": read_secret or getpass.getpass}
+        for name in self.handlers[intent].asks:
+            slots[name] = metrics.timed_input(readers[name])
+
+        if capture_output:
+            with captured_output() as buffer:
+                outcome = self._run(intent, slots)
+            outcome["output"] = buffer.getvalue()
+            return outcome
+        return self._run(intent, slots)
+
+    def _run(self, intent, slots):
+        spec = self.handlers[intent]
+        if spec.started:
+            text, context_type = spec.started
+            update_context(text, context_type=context_type)
+        with metrics.dispatch(intent) as span:
+            start = time.perf_counter()
+            try:
+                with ExitStack() as stack:
+                    if spec.uses:
+                        stack.enter_context(services.lock(spec.uses))
+                    if spec.network:
+                        # Network intents mostly wait on the internet
+                        stack.enter_context(metrics.blocked("network"))
+                    outcome = spec.func(**slots)
+            except Exception as e:
+                update_context(f"Error: {str(e)}", context_type="error")
+                outcome = {"ok": False, "message": f"Error processing your request: {e}",
+                           "data": {"error": str(e)}}
+            span.handler += time.perf_counter() - start
+            span.error = span.error or not outcome["ok"]
+        return {"intent": intent, **outcome}
+
+    def handle(self, utterance, capture_output=False, **slots):
+        """
+        Work out the intent of an utterance and run it
+
+        Slots that can be read from the utterance itself (song titles,
+        volume steps, ...) are filled in; the given slots take precedence.
+        """
+        update_context(utterance, context_type="user_input")
+        intent, match = match_intent(utterance)
+        filled = utterance_slots(intent, match, utterance)
+        filled.update(slots)
+        return self.execute(intent, capture_output=capture_output, **filled)
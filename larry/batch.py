@@ -0,0 +1,220 @@
+# larry/batch.py
+"""
+Batch mode: replay a JSONL file of commands without any prompts.
+
+Each input line is a JSON object:
+
+    {"id": "meal-1", "utterance": "track calories",
+     "slots": {"choice": "1", "food": "apple", "quantity": 2},
+     "answers": ["Snack"]}
+
+  utterance  what the user would have typed; picks the intent
+  intent     optional; run this intent directly instead of matching
+  slots      handler inputs, by name (see larry/handlers.py)
+  answers    answers for any remaining prompts, in the order the REPL or
+             the task would ask them; running out fails the command
+             instead of waiting for the keyboard
+  id         optional; copied to the result
+
+One JSON result is written per input line, in input order:
+
+    {"line": 1, "id": "meal-1", "intent": "calorie_tracker", "ok": true,
+     "message": "...", "data": {...}, "output": "...", "seconds": 0.004}
+
+Commands run on a pool of worker threads.  Commands touching the same
+database or data file are serialised (see the ``uses`` of each handler), so
+use --workers 1 when later lines depend on earlier ones.
+
+Usage:
+    python main.py --batch commands.jsonl [--workers 4] [--output results.jsonl]
+    cat commands.jsonl | python -m larry.batch - --workers 8
+"""
+import argparse
+import json
+import sys
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from larry.api import Larry, captured_output
+from larry.forms import fill_slots
+from larry.handlers import MENUS, menu_option, utterance_slots
+from larry.intents import match_intent
+from larry.metrics import metrics
+from tasks.context.context_manager import initialize_context, update_context, save_context
+
+
+class ScriptedAnswers:
+    """Hands out pre-filled answers one prompt at a time"""
+
+    def __init__(self, answers):
+        self._answers = deque(answers)
+
+    def __call__(self, prompt=""):
+        if not self._answers:
+            raise EOFError(f"No answer given for prompt: {prompt.strip()!r}")
+        return str(self._answers.popleft())
+
+
+@metrics.dispatched
+def run_command(larry, command, reader=None, secret_reader=None, into=None, interactive=False):
+    """
+    Run one batch command
+
+    Args:
+        larry (Larry): The API instance to run it with
+        command (dict): A parsed input line
+        reader (callable, optional): Answers prompts; defaults to the
+            command's own "answers"
+        secret_reader (callable, optional): Answers password prompts
+        into (file-like, optional): Receives printed output as it happens
+        interactive (bool): Show menus, intros and hints before prompts
+
+    Returns:
+        dict: The handler result plus "output" (everything printed) unless
+        the output went to ``into``
+    """
+    reader = reader or ScriptedAnswers(command.get("answers", []))
+    secret_reader = secret_reader or reader
+    slots = dict(command.get("slots", {}))
+    intent = command.get("intent")
+
+    with captured_output(into) as buffer:
+        try:
+            if intent is None:
+                utterance = command.get("utterance", "")
+                update_context(utterance, context_type="user_input")
+                intent, match = match_intent(utterance)
+                metrics.tag(intent)
+                slots = {**utterance_slots(intent, match, utterance), **slots}
+
+            form = intent
+            if intent in MENUS:
+                if "choice" not in slots:
+                    menu = MENUS[intent]
+                    if interactive:
+                        print(menu.title)
+                        for key, label, _ in menu.options:
+                            print(f"{key}. {label}")
+                    slots["choice"] = metrics.timed_input(reader)(menu.prompt)
+                form = menu_option(intent, slots["choice"])
+            if form is not None:
+                slots = fill_slots(form, slots, read=reader, read_secret=secret_reader, interactive=interactive)
+            result = larry.execute(intent, read=reader, read_secret=secret_reader, **slots)
+        except Exception as e:
+            metrics.fail()
+            result = {"intent": intent, "ok": False, "message": str(e), "data": {"error": str(e)}}
+    if into is None:
+        result["output"] = buffer.getvalue()
+    return result
+
+
+def _timed(larry, line_number, command):
+    start = time.perf_counter()
+    if isinstance(command, Exception):
+        result = {"intent": None, "ok": False, "message": f"Invalid JSON: {command}", "data": {}}
+    else:
+        result = run_command(larry, command)
+    result["seconds"] = time.perf_counter() - start
+    head = {"line": line_number}
+    if isinstance(command, dict) and "id" in command:
+        head["id"] = command["id"]
+    return {**head, **result}
+
+
+def _commands(lines):
+    """Yield (line number, parsed command or the parse error), skipping blank lines"""
+    for number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            command = json.loads(line)
+            if not isinstance(command, dict):
+                raise ValueError("each line must be a JSON object")
+        except ValueError as e:
+            command = e
+        yield number, command
+
+
+def run_batch(lines, out, workers=1, larry=None):
+    """
+    Run every command in lines and write one JSON result per command to out
+
+    Results are written in input order while later commands are still
+    running; at most a few batches of commands per worker are in flight.
+
+    Returns:
+        dict: Throughput statistics for the run
+    """
+    larry = larry or Larry()
+    window = max(1, workers) * 4
+    stats = {"commands": 0, "failed": 0, "workers": workers, "by_intent": {}}
+    start = time.perf_counter()
+
+    def write(result):
+        out.write(json.dumps(result, default=str) + "\n")
+        out.flush()
+        stats["commands"] += 1
+        stats["failed"] += not result["ok"]
+        timing = stats["by_intent"].setdefault(result.get("intent"), {"count": 0, "seconds": 0.0})
+        timing["count"] += 1
+        timing["seconds"] += result["seconds"]
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        pending = deque()
+        for number, command in _commands(lines):
+            pending.append(pool.submit(_timed, larry, number, command))
+            if len(pending) >= window:
+                write(pending.popleft().result())
+        while pending:
+            write(pending.popleft().result())
+
+    stats["seconds"] = time.perf_counter() - start
+    stats["commands_per_second"] = stats["commands"] / stats["seconds"] if stats["seconds"] else None
+    return stats
+
+
+def format_stats(stats):
+    """Return the throughput statistics as printable text"""
+    rate = stats["commands_per_second"]
+    lines = [f"Processed {stats['commands']} commands ({stats['failed']} failed) in "
+             f"{stats['seconds']:.2f} s with {stats['workers']} workers"
+             + (f": {rate:.1f} commands/s" if rate else "")]
+    for intent, timing in sorted(stats["by_intent"].items(), key=lambda item: -item[1]["seconds"]):
+        mean_ms = timing["seconds"] / timing["count"] * 1000
+        lines.append(f"  {intent or '(invalid)':<22}{timing['count']:>6} x {mean_ms:>9.1f} ms")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a JSONL file of Larry commands without prompts")
+    parser.add_argument("input", help="JSONL command file, or - for stdin")
+    parser.add_argument("--workers", type=int, default=1, help="commands to run at the same time")
+    parser.add_argument("--output", help="write results here instead of stdout")
+    parser.add_argument("--stats", help="also write the throughput statistics to this file as JSON")
+    args = parser.parse_args(argv)
+
+    initialize_context()
+    source = sys.stdin if args.input == "-" else open(args.input)
+    out = open(args.output, "w") if args.output else sys.stdout
+    # Anything printed outside a command (e.g. services closing at exit)
+    # must not end up between the JSON results
+    sys.stdout = sys.stderr
+    try:
+        stats = run_batch(source, out, workers=args.workers)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if args.output:
+            out.close()
+        save_context(wait=True)
+
+    print(format_stats(stats), file=sys.stderr)
+    if args.stats:
+        with open(args.stats, "w") as f:
+            json.dump(stats, f, indent=2)
+    return 0 if stats["failed"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
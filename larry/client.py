@@ -0,0 +1,126 @@
+# larry/client.py
+"""
+Thin client for the Larry daemon (larry/server.py).
+
+Sends an utterance to the running daemon, prints whatever the task prints
+and answers its questions from the keyboard.  Without an utterance it
+starts a small REPL that keeps talking to the same session.
+
+Usage:
+    python -m larry "what's the weather"
+    python -m larry --session work      # REPL on the "work" context
+"""
+import argparse
+import getpass
+import json
+import socket
+import sys
+
+from larry.server import DEFAULT_SOCKET
+
+
+class LarryClient:
+    """One connection to the daemon; requests on it run one after another"""
+
+    def __init__(self, path=DEFAULT_SOCKET, session="default"):
+        self.session = session
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._socket.connect(path)
+        self._rfile = self._socket.makefile("rb")
+        self._wfile = self._socket.makefile("wb")
+
+    def _send(self, message):
+        self._wfile.write((json.dumps(message) + "\n").encode())
+        self._wfile.flush()
+
+    def request(self, utterance=None, intent=None, slots=None, answers=None,
+                interactive=True, out=sys.stdout, read=input, read_secret=getpass.getpass):
+        """
+        Run one command on the daemon
+
+        Args:
+            utterance (str, optional): What the user said
+            intent (str, optional): Run this intent instead of matching
+            slots (dict, optional): Handler inputs, by name
+            answers (list, optional): Answers for the first prompts
+            interactive (bool): Ask read/read_secret when answers run out
+            out (file-like): Receives the task's printed output
+
+        Returns:
+            dict: The handler result
+        """
+        command = {"session": self.session, "slots": slots or {}, "answers": answers or [],
+                   "interactive": interactive}
+        if intent is not None:
+            command["intent"] = intent
+        else:
+            command["utterance"] = utterance or ""
+        self._send(command)
+
+        for line in self._rfile:
+            message = json.loads(line)
+            kind = message.pop("type", None)
+            if kind == "output":
+                out.write(message["text"])
+                out.flush()
+            elif kind == "prompt":
+                reader = read_secret if message.get("secret") else read
+                try:
+                    answer = reader(message["text"])
+                except EOFError:
+                    answer = ""
+                self._send({"answer": answer})
+            elif kind == "result":
+                return message
+        raise ConnectionError("The Larry daemon closed the connection")
+
+    def close(self):
+        self._rfile.close()
+        self._wfile.close()
+        self._socket.close()
+
+
+def report(result):
+    """Print a result the way the REPL would"""
+    if result.get("intent") == "chatbot":
+        print(f"Larry: {result['message']}")
+    elif result.get("message"):
+        print(result["message"])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Talk to a running Larry daemon")
+    parser.add_argument("utterance", nargs="*", help="what to ask; omit for an interactive session")
+    parser.add_argument("--socket", default=DEFAULT_SOCKET, help="socket path of the daemon")
+    parser.add_argument("--session", default="default", help="context history to use")
+    args = parser.parse_args(argv)
+
+    try:
+        client = LarryClient(args.socket, args.session)
+    except OSError:
+        print(f"Larry is not running on {args.socket}. Start it with: python -m larry serve", file=sys.stderr)
+        return 1
+
+    try:
+        if args.utterance:
+            result = client.request(" ".join(args.utterance))
+            report(result)
+            return 0 if result["ok"] else 1
+
+        while True:
+            try:
+                user_input = input("How can I help you? ").strip()
+            except (EOFError, KeyboardInterrupt):
+                print()
+                break
+            if user_input.lower() in ["exit", "quit", "bye"]:
+                break
+            if user_input:
+                report(client.request(user_input))
+        return 0
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,329 @@
+# larry/forms.py
+"""
+Prompts the REPL uses to fill in an intent's slots.
+
+FORMS maps an intent (or menu option / follow-up action) to the questions
+that used to be asked inline in analyze_input.  fill_slots() asks the ones
+whose answer is not already known and returns the slots for
+Larry.execute().  Nothing else in larry/ reads from the keyboard.
+"""
+import getpass
+from collections import namedtuple
+
+from larry.loader import lazy_import
+from larry.metrics import metrics
+from larry.services import services
+
+list_common_currencies = lazy_import("tasks.currency_converter.financer", "list_common_currencies")
+
+# name:    slot (handler argument) the answer goes to
+# prompt:  question; may refer to earlier answers as {slot}
+# kind:    "text"      the answer as typed (default used if blank)
+#          "strip"     the answer stripped of surrounding spaces
+#          "optional"  stripped, None if blank
+#          "secret"    read with getpass
+#          "paragraph" lines until a blank one, joined with spaces
+#          "block"     lines until END, joined with newlines
+#          "flag"      y/n; default says which answer a blank line means
+#          "confirm"   True only for "yes"
+# default: used for a blank answer ("text"/"strip") or as the flag default
+# before:  text to print, or a callable to run, before asking
+# when:    callable(slots) -> bool; the question is skipped if it is False
+Slot = namedtuple("Slot", ["name", "prompt", "kind", "default", "before", "when"],
+                  defaults=("text", None, None, None))
+
+# intro: lines printed before the first question
+Form = namedtuple("Form", ["intro", "slots"])
+
+
+def _recent_expenses():
+    with services.lock("expenses"):
+        services.get("expenses").list_expenses(limit=5)
+
+
+FORMS = {
+    "send_email": Form(["I detected that you want to send an email!",
+                        "would you like to type it or just let your best friend larry handle the matter!!, just tell me"], [
+        Slot("recipient", "Please provide the recipient's email: "),
+        Slot("subject", "Please provide the subject: "),
+    ]),
+    "check_emails": Form(["I detected that you want to check your emails!"], []),
+    "web_search": Form(["Got it! You want to search the web."], [
+        Slot("query", "What would you like to search for? "),
+    ]),
+    "reminder": Form(["Got it! You want to set a reminder."], [
+        Slot("minutes", "In how many minutes? (e.g., 1): "),
+        Slot("message", "What should I remind you about? "),
+    ]),
+    "weather": Form(["I detected that you want to know the weather!"], [
+        Slot("city", "Please provide the city: "),
+    ]),
+    "add_task": Form([], [Slot("task", "What task would you like to add? ")]),
+    "mark_task_done": Form([], [Slot("number", "Which task number would you like to mark as done? ")]),
+    "delete_task": Form([], [Slot("number", "Which task number would you like to delete? ")]),
+    "find_places": Form([], [Slot("city", "Which city would you like to know about? ")]),
+    "search_file": Form([], [
+        Slot("directory", "Enter base directory to search from (e.g., /home/you or C:\\Users\\you): "),
+        Slot("name", "Enter the name (or part) of the file you're looking for: "),
+    ]),
+    "rename_file": Form([], [Slot("new_name", "Enter the new filename: ")]),
+    "move_file": Form([], [Slot("directory", "Enter the target directory: ")]),
+    "delete_file": Form([], [Slot("confirm", "Are you sure you want to delete it? (yes/no): ", "confirm")]),
+    "ocr": Form([], [Slot("image_path", "Please provide the path to the image: ")]),
+    "summarize": Form([], [
+        Slot("text", ">>> ", "paragraph",
+             before="Please paste the text you want summarized. Enter a blank line when done:\n"),
+    ]),
+    "create_note": Form([], [
+        Slot("title", "Enter note title: "),
+        Slot("content", "", "block", before="Enter note content (type END on a new line when finished):"),
+    ]),
+    "view_note": Form([], [Slot("note_id", "Enter the note ID: ")]),
+    "edit_note": Form([], [
+        Slot("note_id", "Enter the note ID: "),
+        Slot("content", "", "block", before="Enter new content (type END on a new line when finished):"),
+    ]),
+    "delete_note": Form([], [
+        Slot("note_id", "Enter the note ID: "),
+        Slot("confirm", "Are you sure you want to delete note {note_id}? (yes/no): ", "confirm"),
+    ]),
+    "add_event": Form([], [
+        Slot("title", "Enter event title: "),
+        Slot("date", "Enter date (YYYY-MM-DD): "),
+        Slot("time", "Enter time (HH:MM) or leave blank: "),
+        Slot("location", "Enter location (optional): "),
+        Slot("description", "Enter description (optional): "),
+    ]),
+    "list_events": Form([], [
+        Slot("date", "Show events for a specific date? (Enter date as YYYY-MM-DD or leave blank for all): "),
+    ]),
+    "view_event": Form([], [Slot("event_id", "Enter the event ID: ")]),
+    "delete_event": Form([], [
+        Slot("event_id", "Enter the event ID: "),
+        Slot("confirm", "Are you sure you want to delete event {event_id}? (yes/no): ", "confirm"),
+    ]),
+    "wikipedia": Form([], [Slot("query", "What would you like to look up? ")]),
+    "currency": Form([], [
+        Slot("amount", "Enter amount to convert: "),
+        Slot("from_currency", "Convert from (currency code): ", before=list_common_currencies),
+        Slot("to_currency", "Convert to (currency code): "),
+    ]),
+    "translate": Form(["I detected that you want to translate text!"], [
+        Slot("text", "Please provide the text you want to translate: "),
+        Slot("target", "Please provide the target language code (e.g., 'fr' for French): "),
+        Slot("source", "If you want to specify the source language, enter its code (or press Enter to auto-detect): "),
+    ]),
+    "merge_pdfs": Form(["I detected that you want to merge PDFs!"], [
+        Slot("files", "Enter the PDF files to merge (comma separated): "),
+        Slot("output_file", "Enter the output merged PDF filename: "),
+    ]),
+    "extract_pdf_pages": Form(["I detected that you want to extract pages from a PDF!"], [
+        Slot("input_file", "Enter the input PDF file: "),
+        Slot("pages", "Enter the page range to extract (e.g., '1-3,5,7-9'): "),
+        Slot("output_file", "Enter the output extracted PDF filename: "),
+    ]),
+    "rotate_pdf": Form(["I detected that you want to rotate PDF pages!"], [
+        Slot("input_file", "Enter the input PDF file: "),
+        Slot("angle", "Enter the rotation angle (90, 180, or 270): "),
+        Slot("output_file", "Enter the output rotated PDF filename: "),
+    ]),
+    "create_pdf": Form(["I detected that you want to create a PDF from text!"], [
+        Slot("text", "Enter the text content for the PDF: "),
+        Slot("output_file", "Enter the output PDF filename: "),
+    ]),
+    "extract_pdf_text": Form(["I detected that you want to extract text from a PDF!"], [
+        Slot("input_file", "Enter the input PDF file: "),
+    ]),
+
+    # Password manager
+    "password_add": Form([], [
+        Slot("master_password", "Enter master password: ", "secret"),
+        Slot("service", "Enter service name (e.g., Gmail, Twitter): "),
+        Slot("username", "Enter username or email: "),
+        Slot("generate", "Generate a password? (y/n): ", "flag", False),
+        Slot("length", "Password length (default: 16): ", default="16", when=lambda s: s["generate"]),
+        Slot("uppercase", "Include uppercase letters? (y/n, default: y): ", "flag", True, when=lambda s: s["generate"]),
+        Slot("digits", "Include digits? (y/n, default: y): ", "flag", True, when=lambda s: s["generate"]),
+        Slot("symbols", "Include symbols? (y/n, default: y): ", "flag", True, when=lambda s: s["generate"]),
+        Slot("password", "Enter password: ", "secret", when=lambda s: not s["generate"]),
+    ]),
+    "password_get": Form([], [
+        Slot("master_password", "Enter master password: ", "secret"),
+        Slot("service", "Enter service name (or leave blank to see all): ", "optional"),
+    ]),
+    "password_generate": Form([], [
+        Slot("length", "Password length (default: 16): ", default="16"),
+        Slot("uppercase", "Include uppercase letters? (y/n, default: y): ", "flag", True),
+        Slot("digits", "Include digits? (y/n, default: y): ", "flag", True),
+        Slot("symbols", "Include symbols? (y/n, default: y): ", "flag", True),
+    ]),
+
+    # Screen time
+    "screen_app_limit": Form([], [
+        Slot("app_name", "Enter app name: "),
+        Slot("minutes", "Enter daily limit in minutes: "),
+    ]),
+    "screen_website_limit": Form([], [
+        Slot("domain", "Enter website domain: "),
+        Slot("minutes", "Enter daily limit in minutes: "),
+    ]),
+    "screen_export": Form([], [
+        Slot("days", "Enter number of days for report (default: 30): ", default="30"),
+        Slot("format_type", "Export format (text/csv) [default: text]: ", default="text"),
+    ]),
+    "screen_graphs": Form([], [
+        Slot("days", "Enter number of days for graphs (default: 7): ", default="7"),
+    ]),
+
+    # Expenses
+    "expense_add": Form([], [
+        Slot("amount", "Enter amount: "),
+        Slot("category", "Enter category (or leave blank to select from list): ", "optional"),
+        Slot("description", "Enter description (optional): ", "optional"),
+        Slot("date", "Enter date (YYYY-MM-DD) or leave blank for today: ", "optional"),
+    ]),
+    "expense_list": Form([], [
+        Slot("category", "Category: ", "optional", before="\nFilter options (leave blank to show all):"),
+        Slot("start_date", "Start date (YYYY-MM-DD): ", "optional"),
+        Slot("end_date", "End date (YYYY-MM-DD): ", "optional"),
+        Slot("limit", "Number of expenses to show: ", "strip", "10"),
+    ]),
+    "expense_summary": Form([], [
+        Slot("period", "Choose a period (1-5): ",
+             before="\nShow summary for:\n1. Today\n2. This week\n3. This month\n4. This year\n5. All time"),
+    ]),
+    "expense_report": Form([], [
+        Slot("year", "Enter year (YYYY) or leave blank for current year: ", "optional"),
+        Slot("month", "Enter month (1-12) or leave blank for current month: ", "optional"),
+    ]),
+    "expense_export": Form([], [
+        Slot("format_type", "Export format (csv/json): ", default="csv"),
+        Slot("start_date", "Start date (YYYY-MM-DD) or leave blank: ", "optional"),
+        Slot("end_date", "End date (YYYY-MM-DD) or leave blank: ", "optional"),
+    ]),
+    "expense_delete": Form([], [
+        Slot("expense_id", "\nEnter the ID of the expense to delete: ", "optional", before=_recent_expenses),
+        Slot("confirm", "Are you sure you want to delete expense {expense_id}? (yes/no): ", "confirm",
+             when=lambda s: s["expense_id"]),
+    ]),
+
+    # Calories
+    "meal_log": Form([], [
+        Slot("food", "Enter food name: ", "strip"),
+        Slot("quantity", "Enter quantity (default: 1): ", default="1"),
+        Slot("meal_type", "Enter meal type (default: Other): ", "strip", "Other",
+             before="Meal types: Breakfast, Lunch, Dinner, Snack, Other"),
+    ]),
+    "weight_log": Form([], [Slot("weight", "Enter your weight (kg): ")]),
+    "calorie_day": Form([], [Slot("date", "Enter date (YYYY-MM-DD): ")]),
+    "nutrition_report": Form([], [
+        Slot("days", "Number of days for report (default: 7): ", default="7"),
+    ]),
+    "nutrition_goals": Form(["Enter new nutrition goals (leave blank to keep current values):"], [
+        Slot("calories", "Daily calorie goal: "),
+        Slot("protein", "Daily protein goal (g): "),
+        Slot("carbs", "Daily carbs goal (g): "),
+        Slot("fat", "Daily fat goal (g): "),
+    ]),
+    "weight_history": Form([], [
+        Slot("days", "Show weight history for how many days? (default: 30): ", default="30"),
+    ]),
+    "food_add": Form([], [
+        Slot("food_name", "Enter food name: ", "strip"),
+        Slot("calories", "Calories per serving: "),
+        Slot("protein", "Protein (g) per serving: "),
+        Slot("carbs", "Carbs (g) per serving: "),
+        Slot("fat", "Fat (g) per serving: "),
+    ]),
+    "food_search": Form([], [Slot("query", "Enter food name to search: ", "strip")]),
+    "meals_for_day": Form([], [
+        Slot("date", "Date for meal deletion (YYYY-MM-DD, or leave blank for today): ", "optional"),
+    ]),
+    "meal_delete": Form([], [
+        Slot("meal_id", "\nEnter ID of meal to delete: "),
+        Slot("confirm", "Are you sure you want to delete meal ID {meal_id}? (yes/no): ", "confirm"),
+    ]),
+}
+
+
+def _read_lines(read, prompt, stop):
+    lines = []
+    while True:
+        line = read(prompt)
+        if stop(line):
+            return lines
+        lines.append(line)
+
+
+def ask(slot, slots, read=None, read_secret=None):
+    """Ask a single slot's question and return the converted answer"""
+    # Time spent answering counts as input_wait (see larry.metrics)
+    read = metrics.timed_input(read or input)
+    read_secret = metrics.timed_input(read_secret or getpass.getpass)
+    prompt = slot.prompt.format_map(slots)
+    if slot.kind == "secret":
+        return read_secret(prompt)
+    if slot.kind == "paragraph":
+        return " ".join(_read_lines(read, prompt, lambda line: line.strip() == ""))
+    if slot.kind == "block":
+        return "\n".join(_read_lines(read, prompt, lambda line: line.strip().upper() == "END"))
+
+    answer = read(prompt)
+    if slot.kind == "flag":
+        return answer.lower() != 'n' if slot.default else answer.lower() == 'y'
+    if slot.kind == "confirm":
+        return answer.lower() == "yes"
+    if slot.kind in ("strip", "optional"):
+        answer = answer.strip()
+        if slot.kind == "optional":
+            return answer or None
+    if not answer and slot.default is not None:
+        return slot.default
+    return answer
+
+
+def _has_blank_answer(slot):
+    """True if leaving the question blank is a valid answer"""
+    return slot.kind in ("optional", "flag") or slot.default is not None
+
+
+def fill_slots(intent, slots=None, read=None, read_secret=None, interactive=True):
+    """
+    Ask the questions for an intent whose answers are not in slots yet
+
+    Args:
+        intent (str): Intent, menu option or follow-up action name
+        slots (dict, optional): Answers already known, e.g. from the utterance
+        read (callable, optional): Reads one answer, given the prompt;
+            defaults to input()
+        read_secret (callable, optional): Reads a password, given the
+            prompt; defaults to getpass()
+        interactive (bool): Print intros and run ``before`` hooks; turn off
+            when the answers come from a script rather than a person
+
+    Returns:
+        dict: The known and newly asked slots
+    """
+    slots = dict(slots or {})
+    form = FORMS.get(intent)
+    if form is None:
+        return slots
+
+    if interactive:
+        for line in form.intro:
+            print(line)
+    for slot in form.slots:
+        if slot.name in slots or (slot.when is not None and not slot.when(slots)):
+            continue
+        if interactive and callable(slot.before):
+            slot.before()
+        elif interactive and slot.before is not None:
+            print(slot.before)
+        try:
+            slots[slot.name] = ask(slot, slots, read, read_secret)
+        except EOFError:
+            # Scripted answers ran out: optional questions get their blank answer
+            if interactive or not _has_blank_answer(slot):
+                raise
+            slots[slot.name] = ask(slot, slots, lambda prompt: "", lambda prompt: "")
+    return slots
@@ -0,0 +1,1158 @@
+# larry/handlers.py
+"""
+Intent handlers behind Larry.execute().
+
+Every intent in larry.intents, and every follow-up action the REPL offers
+(renaming a file found by "search file", deleting a listed note, ...), has
+a handler here.  A handler takes its inputs as keyword arguments ("slots")
+instead of asking for them with input(), records what it did in the context
+history and returns a result dict:
+
+    {"ok": bool, "message": str, "data": dict}
+
+``message`` holds text the REPL should show the user.  Output the task
+modules print themselves is not repeated there; Larry.execute() can
+capture it separately.
+
+The multi-option trackers (passwords, screen time, expenses, calories) are
+menus: their handler takes a ``choice`` and forwards the remaining slots to
+the handler of the chosen option.
+"""
+import asyncio
+import contextvars
+import datetime
+import getpass
+import os
+import sys
+from collections import namedtuple
+
+from larry.loader import lazy_import
+from larry.services import services
+from tasks.context.context_manager import update_context, get_context, get_related_context
+
+send_email = lazy_import("tasks.mail.send_email", "send_email")
+receive_emails = lazy_import("tasks.mail.receive_email", "receive_emails")
+google_search = lazy_import("tasks.search.web_search", "google_search")
+set_reminder = lazy_import("tasks.reminder.reminders", "set_reminder")
+get_weather = lazy_import("tasks.weather.weather_info", "get_weather")
+add_task = lazy_import("tasks.to_do.task_manager", "add_task")
+get_tasks = lazy_import("tasks.to_do.task_manager", "get_tasks")
+mark_done = lazy_import("tasks.to_do.task_manager", "mark_done")
+delete_task = lazy_import("tasks.to_do.task_manager", "delete_task")
+find_places = lazy_import("tasks.tourism.find_places", "find_places")
+search_files = lazy_import("tasks.file_management.manage_files", "search_files")
+rename_file = lazy_import("tasks.file_management.manage_files", "rename_file")
+move_file = lazy_import("tasks.file_management.manage_files", "move_file")
+delete_file = lazy_import("tasks.file_management.manage_files", "delete_file")
+scan_text_from_image = lazy_import("tasks.OCR_scanner.ocr", "scan_text_from_image")
+get_response = lazy_import("tasks.chatbot.response_generator", "get_response")
+summarize_text = lazy_import("tasks.chatbot.summarize", "summarize_text")
+draft_email = lazy_import("tasks.chatbot.email", "draft_email")
+get_cricket_scores = lazy_import("tasks.sports.cricket", "get_cricket_scores")
+get_football_scores = lazy_import("tasks.sports.football", "get_football_scores")
+search_wikipedia = lazy_import("tasks.wikipedia.wiki", "search_wikipedia")
+convert_currency = lazy_import("tasks.currency_converter.financer", "convert_currency")
+create_note = lazy_import("tasks.notes.notes", "create_note")
+list_notes = lazy_import("tasks.notes.notes", "list_notes")
+view_note = lazy_import("tasks.notes.notes", "view_note")
+edit_note = lazy_import("tasks.notes.notes", "edit_note")
+delete_note = lazy_import("tasks.notes.notes", "delete_note")
+add_event = lazy_import("tasks.calender.cal", "add_event")
+list_events = lazy_import("tasks.calender.cal", "list_events")
+view_event = lazy_import("tasks.calender.cal", "view_event")
+delete_event = lazy_import("tasks.calender.cal", "delete_event")
+get_today_events = lazy_import("tasks.calender.cal", "get_today_events")
+generate_password = lazy_import("tasks.security.password", "generate_password")
+add_password = lazy_import("tasks.security.password", "add_password")
+lookup_passwords = lazy_import("tasks.security.password", "lookup_passwords")
+initialize_password_manager = lazy_import("tasks.security.password", "initialize_password_manager")
+translate_text = lazy_import("tasks.translator.translate", "translate_text")
+list_common_languages = lazy_import("tasks.translator.translate", "list_common_languages")
+merge_pdfs = lazy_import("tasks.pdfmanipulator.manipulate", "merge_pdfs")
+extract_pdf_pages = lazy_import("tasks.pdfmanipulator.manipulate", "extract_pdf_pages")
+rotate_pdf_pages = lazy_import("tasks.pdfmanipulator.manipulate", "rotate_pdf_pages")
+create_pdf_from_text = lazy_import("tasks.pdfmanipulator.manipulate", "create_pdf_from_text")
+extract_text_from_pdf = lazy_import("tasks.pdfmanipulator.manipulate", "extract_text_from_pdf")
+
+# name:    intent (or follow-up action) name
+# func:    called with the slots as keyword arguments
+# started: optional (text, context type) recorded before func runs
+# uses:    optional name of the shared resource (database, data file or
+#          player) the handler reads or writes; handlers using the same
+#          resource never run at the same time
+# network: True if the handler mostly waits on the internet and asks no
+#          questions once its slots are filled; the REPL then runs it in
+#          the background (see larry/runtime.py)
+# asks:    names of the readers func takes for questions the task itself
+#          may still ask: "read" (a prompt -> answer callable) and/or
+#          "read_secret" (for passwords); Larry.execute passes them in
+Handler = namedtuple("Handler", ["name", "func", "started", "uses", "network", "asks"])
+
+# title:           printed above the numbered options
+# prompt:          asks for the option number
+# options:         [(choice, label, intent)]
+# invalid_message: shown for an unknown choice (None to stay silent)
+# invalid_context: recorded as an error for an unknown choice, if set
+Menu = namedtuple("Menu", ["title", "prompt", "options", "invalid_message", "invalid_context"])
+
+HANDLERS = {}
+
+# The event loop the REPL runs on, set for the handlers it runs (see
+# larry/runtime.py); unset in batch mode and the daemon
+event_loop = contextvars.ContextVar("event_loop", default=None)
+
+# Reader arguments a handler may ask for (see Handler.asks)
+READERS = ("read", "read_secret")
+
+
+def handler(name, started=None, uses=None, network=False, asks=()):
+    """Register the decorated function as the handler for an intent"""
+    def register(func):
+        HANDLERS[name] = Handler(name, func, started, uses, network, asks)
+        return func
+    return register
+
+
+def run_async(coroutine):
+    """
+    Wait for the coroutine of an async task function
+
+    It runs on the REPL's event loop if the handler was started from there,
+    otherwise on a new loop of its own.
+    """
+    loop = event_loop.get()
+    if loop is None:
+        return asyncio.run(coroutine)
+    return asyncio.run_coroutine_threadsafe(coroutine, loop).result()
+
+
+def result(ok=True, message="", **data):
+    """Build a handler result"""
+    return {"ok": ok, "message": message, "data": data}
+
+
+def failure(message, context_message=None):
+    """Result for bad input; the reason is recorded as an error if given"""
+    if context_message:
+        update_context(context_message, context_type="error")
+    return result(False, message)
+
+
+def utterance_slots(intent, match, text):
+    """
+    Slots that can be read straight from the utterance
+
+    Args:
+        intent (str): Intent picked by larry.intents.match_intent
+        match (re.Match): Match of that intent's pattern, or None
+        text (str): The raw user input
+
+    Returns:
+        dict: Slot values for the intent's handler
+    """
+    if intent == "play_song":
+        return {"title": match.group(3).strip()}
+    if intent == "play_artist":
+        return {"artist": match.group(3).strip()}
+    if intent == "play_playlist":
+        return {"name": match.group(2).strip()}
+    if intent == "volume":
+        return {"direction": match.group(1).lower(), "amount": match.group(2)}
+    if intent == "sports":
+        return {"sport": "cricket" if "cricket" in text else "football"}
+    if intent == "list_events" and "today" in text.lower():
+        return {"date": "today"}
+    if intent == "chatbot":
+        return {"text": text}
+    return {}
+
+
+def _as_bool(value):
+    """Accept booleans as well as the yes/y answers typed at the prompts"""
+    if isinstance(value, str):
+        return value.strip().lower() in ("yes", "y", "true", "1")
+    return bool(value)
+
+
+# --- Email -----------------------------------------------------------------
+
+@handler("send_email", started=("Email task initiated", "task"))
+def handle_send_email(recipient, subject, body, confirm=True):
+    if not _as_bool(confirm):
+        update_context("Email task canceled", context_type="email")
+        return result(False, "Email task canceled.")
+    send_email(recipient, subject, body)
+    update_context(f"Sent email to {recipient} with subject: {subject}", context_type="email")
+    return result(True, recipient=recipient, subject=subject)
+
+
+@handler("draft_email")
+def handle_draft_email(subject, recipient=None):
+    # Use the context most related to the subject to generate a more relevant email
+    context_info = get_related_context(subject)
+    # The email is printed as it is written, so the message only says how long it took
+    draft = draft_email(subject, recipient, context=context_info, stream=sys.stdout)
+    if draft.cached:
+        note = "(from the cache)"
+    elif draft.first_token_seconds is None:
+        note = "(no text generated)"
+    else:
+        note = (f"(first token after {draft.first_token_seconds:.2f} s, {draft.tokens} tokens in {draft.seconds:.1f} s"
+                + ("" if draft.complete else ", stopped at the time limit") + ")")
+    return result(True, note, body=draft.text, first_token_seconds=draft.first_token_seconds,
+                  seconds=draft.seconds, tokens=draft.tokens, cached=draft.cached, complete=draft.complete)
+
+
+@handler("check_emails", started=("Checking emails", "email"), network=True)
+def handle_check_emails():
+    receive_emails()
+    return result(True)
+
+
+# --- Search, reminders, weather ----------------------------------------------
+
+@handler("web_search", started=("Web search initiated", "search"))
+def handle_web_search(query):
+    update_context(f"Searching for: {query}", context_type="search")
+    google_search(query)
+    return result(True, query=query)
+
+
+@handler("reminder", started=("Reminder creation initiated", "reminder"))
+def handle_reminder(minutes, message):
+    try:
+        minutes = int(minutes)
+    except ValueError:
+        return failure("Please enter a valid number of minutes.", "Failed to set reminder - invalid time")
+    set_reminder(minutes, message)
+    update_context(f"Set reminder for {message} in {minutes} minutes", context_type="reminder")
+    return result(True, minutes=minutes, reminder=message)
+
+
+@handler("weather", started=("Weather check initiated", "weather"), network=True)
+def handle_weather(city):
+    update_context(f"Checking weather for {city}", context_type="weather")
+    report = get_weather(city)
+    return result(report is not None, city=city, weather=report)
+
+
+# --- To-do list ----------------------------------------------------------------
+
+@handler("add_task", started=("Task addition initiated", "task"), uses="todo")
+def handle_add_task(task):
+    add_task(task)
+    update_context(f"Added task: {task}", context_type="task")
+    return result(True, task=task)
+
+
+@handler("show_tasks", started=("Showing tasks", "task"), uses="todo")
+def handle_show_tasks():
+    return result(True, tasks=get_tasks())
+
+
+@handler("mark_task_done", started=("Task completion initiated", "task"), uses="todo")
+def handle_mark_task_done(number):
+    try:
+        number = int(number)
+    except ValueError:
+        return failure("Please enter a valid task number.", "Failed to mark task - invalid number")
+    mark_done(number)
+    update_context(f"Marked task #{number} as done", context_type="task")
+    return result(True, number=number)
+
+
+@handler("delete_task", started=("Task deletion initiated", "task"), uses="todo")
+def handle_delete_task(number):
+    try:
+        number = int(number)
+    except ValueError:
+        return failure("Please enter a valid task number.", "Failed to delete task - invalid number")
+    delete_task(number)
+    update_context(f"Deleted task #{number}", context_type="task")
+    return result(True, number=number)
+
+
+@handler("find_places", started=("Tourism search initiated", "tourism"), network=True)
+def handle_find_places(city):
+    update_context(f"Finding places in {city}", context_type="tourism")
+    places = find_places(city)
+    return result(bool(places), city=city,
+                  places=[{"name": name, "address": address} for name, address in places])
+
+
+# --- Files -----------------------------------------------------------------
+
+@handler("search_file", started=("File search initiated", "file"))
+def handle_search_file(directory, name):
+    update_context(f"Searching for file '{name}' in {directory}", context_type="file")
+    found = search_files(directory, name)
+
+    if not found:
+        update_context("No files found matching search criteria", context_type="file")
+        return result(False, "No matching files found.", files=[])
+
+    lines = ["\nFound files:"]
+    for i, (file_name, full_path, parent) in enumerate(found):
+        lines.append(f"{i+1}. {file_name} — in {parent}")
+    update_context(f"Found {len(found)} files matching search criteria", context_type="file")
+    files = [{"name": file_name, "path": full_path, "directory": parent}
+             for file_name, full_path, parent in found]
+    return result(True, "\n".join(lines), files=files)
+
+
+def _file_action(action):
+    """Run a file operation, reporting failures the way the file search menu did"""
+    try:
+        return action()
+    except Exception as e:
+        return failure(f"An error occurred: {e}", f"Error in file operation: {str(e)}")
+
+
+@handler("rename_file")
+def handle_rename_file(path, new_name):
+    def rename():
+        selected_file = os.path.basename(path)
+        update_context(f"Selected file: {selected_file}", context_type="file")
+        rename_file(path, new_name)
+        update_context(f"Renamed {selected_file} to {new_name}", context_type="file")
+        return result(True, path=path, new_name=new_name)
+    return _file_action(rename)
+
+
+@handler("move_file")
+def handle_move_file(path, directory):
+    def move():
+        selected_file = os.path.basename(path)
+        update_context(f"Selected file: {selected_file}", context_type="file")
+        move_file(path, directory)
+        update_context(f"Moved {selected_file} to {directory}", context_type="file")
+        return result(True, path=path, directory=directory)
+    return _file_action(move)
+
+
+@handler("delete_file")
+def handle_delete_file(path, confirm=True):
+    def delete():
+        selected_file = os.path.basename(path)
+        update_context(f"Selected file: {selected_file}", context_type="file")
+        if not _as_bool(confirm):
+            update_context(f"Canceled deletion of {selected_file}", context_type="file")
+            return result(False, path=path)
+        delete_file(path)
+        update_context(f"Deleted file: {selected_file}", context_type="file")
+        return result(True, path=path)
+    return _file_action(delete)
+
+
+@handler("open_file")
+def handle_open_file(path):
+    def open_file():
+        import subprocess
+        selected_file = os.path.basename(path)
+        update_context(f"Selected file: {selected_file}", context_type="file")
+        subprocess.run(["xdg-open" if os.name != 'nt' else "start", path], shell=True)
+        update_context(f"Opened file: {selected_file}", context_type="file")
+        return result(True, path=path)
+    return _file_action(open_file)
+
+
+# --- Text --------------------------------------------------------------------
+
+@handler("ocr", started=("OCR scan initiated", "ocr"))
+def handle_ocr(image_path, output_file="extracted_text.txt"):
+    update_context(f"Scanning text from image: {os.path.basename(image_path)}", context_type="ocr")
+    text = scan_text_from_image(image_path, output_file)
+    return result(text is not None, text=text)
+
+
+@handler("summarize", started=("Text summarization initiated", "text"))
+def handle_summarize(text):
+    update_context(f"Summarizing text of length {len(text)} characters", context_type="text")
+    summary = summarize_text(text)
+    update_context("Text summarization completed", context_type="text")
+    return result(True, f"\nSummary: {summary}", summary=summary)
+
+
+@handler("sports", started=("Sports score check initiated", "sports"), network=True)
+def handle_sports(sport="football"):
+    if sport == "cricket":
+        update_context("Checking cricket scores", context_type="sports")
+        scores = get_cricket_scores()
+    else:
+        update_context("Checking football scores", context_type="sports")
+        scores = get_football_scores()
+    return result(True, str(scores), sport=sport, scores=scores)
+
+
+@handler("wikipedia", started=("Wikipedia search initiated", "wiki"), asks=("read",))
+def handle_wikipedia(query, choice=None, read=input):
+    update_context(f"Looking up: {query} on Wikipedia", context_type="wiki")
+    summary = search_wikipedia(query, choice=choice, read=read)
+    return result(summary is not None, query=query, summary=summary)
+
+
+@handler("translate", started=("Translation initiated", "translate"), network=True)
+def handle_translate(text, target, source=None):
+    if not source or not source.strip():
+        source = None  # Use auto-detection if no source language is provided
+        update_context(f"Translating text to {target} (auto-detect source)", context_type="translate")
+    else:
+        update_context(f"Translating text from {source} to {target}", context_type="translate")
+
+    translated = run_async(translate_text(text, target, source))
+    if not translated:
+        return result(False)
+    update_context("Translation completed successfully", context_type="translate")
+    return result(True, f"Translated text: {translated}", translation=translated)
+
+
+@handler("list_languages", started=("Listing language codes", "translate"))
+def handle_list_languages():
+    return result(True, languages=list_common_languages())
+
+
+@handler("currency", started=("Currency conversion initiated", "finance"), network=True)
+def handle_currency(amount, from_currency, to_currency):
+    try:
+        amount = float(amount)
+    except ValueError:
+        return failure("Please enter a valid number for the amount.", "Failed to convert currency - invalid amount")
+    update_context(f"Converting {amount} {from_currency} to {to_currency}", context_type="finance")
+    converted = convert_currency(amount, from_currency, to_currency)
+    return result(converted is not None, amount=amount, converted=converted)
+
+
+# --- Notes and calendar ------------------------------------------------------
+
+@handler("create_note", started=("Note creation initiated", "note"), uses="notes")
+def handle_create_note(title, content):
+    note_id = create_note(title, content)
+    update_context(f"Created note: {title}", context_type="note")
+    return result(True, note_id=note_id)
+
+
+@handler("list_notes", started=("Notes listing initiated", "note"), uses="notes")
+def handle_list_notes():
+    notes = list_notes()
+    if notes:
+        update_context(f"Found {len(notes)} notes", context_type="note")
+    return result(bool(notes), notes=notes)
+
+
+def _note_id(note_id):
+    try:
+        return int(note_id)
+    except ValueError:
+        return None
+
+
+@handler("view_note", uses="notes")
+def handle_view_note(note_id):
+    note_id = _note_id(note_id)
+    if note_id is None:
+        return failure("Please enter a valid note ID.", "Failed to process note - invalid ID")
+    note = view_note(note_id)
+    update_context(f"Viewed note #{note_id}", context_type="note")
+    return result(note is not None, note=note)
+
+
+@handler("edit_note", uses="notes")
+def handle_edit_note(note_id, content):
+    note_id = _note_id(note_id)
+    if note_id is None:
+        return failure("Please enter a valid note ID.", "Failed to process note - invalid ID")
+    edited = edit_note(note_id, new_content=content)
+    update_context(f"Edited note #{note_id}", context_type="note")
+    return result(edited)
+
+
+@handler("delete_note", uses="notes")
+def handle_delete_note(note_id, confirm=True):
+    note_id = _note_id(note_id)
+    if note_id is None:
+        return failure("Please enter a valid note ID.", "Failed to process note - invalid ID")
+    if not _as_bool(confirm):
+        update_context(f"Canceled deletion of note #{note_id}", context_type="note")
+        return result(False)
+    deleted = delete_note(note_id)
+    update_context(f"Deleted note #{note_id}", context_type="note")
+    return result(deleted)
+
+
+@handler("add_event", started=("Event creation initiated", "event"), uses="calendar")
+def handle_add_event(title, date, time=None, location=None, description=None):
+    event_id = add_event(title, date, time or None, description or None, location or None)
+    update_context(f"Created event: {title} on {date}", context_type="event")
+    return result(event_id is not None, event_id=event_id)
+
+
+@handler("list_events", started=("Calendar events check initiated", "event"), uses="calendar")
+def handle_list_events(date=None):
+    if date == "today":
+        update_context("Showing today's events", context_type="event")
+        events = get_today_events()
+    else:
+        if date:
+            update_context(f"Showing events for date: {date}", context_type="event")
+        else:
+            update_context("Showing all events", context_type="event")
+        events = list_events(date or None)
+    return result(bool(events), events=events)
+
+
+def _event_id(event_id):
+    try:
+        return int(event_id)
+    except ValueError:
+        return None
+
+
+@handler("view_event", uses="calendar")
+def handle_view_event(event_id):
+    event_id = _event_id(event_id)
+    if event_id is None:
+        return failure("Please enter a valid event ID.", "Failed to process event - invalid ID")
+    event = view_event(event_id)
+    update_context(f"Viewed event #{event_id}", context_type="event")
+    return result(event is not None, event=event)
+
+
+@handler("delete_event", uses="calendar")
+def handle_delete_event(event_id, confirm=True):
+    event_id = _event_id(event_id)
+    if event_id is None:
+        return failure("Please enter a valid event ID.", "Failed to process event - invalid ID")
+    if not _as_bool(confirm):
+        update_context(f"Canceled deletion of event #{event_id}", context_type="event")
+        return result(False)
+    deleted = delete_event(event_id)
+    update_context(f"Deleted event #{event_id}", context_type="event")
+    return result(deleted)
+
+
+# --- PDFs --------------------------------------------------------------------
+
+@handler("merge_pdfs", started=("PDF merge initiated", "pdf"))
+def handle_merge_pdfs(files, output_file):
+    if isinstance(files, str):
+        files = files.split(',')
+    update_context(f"Merging {len(files)} PDFs to {output_file}", context_type="pdf")
+    return result(merge_pdfs(files, output_file), output_file=output_file)
+
+
+@handler("extract_pdf_pages", started=("PDF page extraction initiated", "pdf"))
+def handle_extract_pdf_pages(input_file, pages, output_file):
+    update_context(f"Extracting pages {pages} from {input_file} to {output_file}", context_type="pdf")
+    return result(extract_pdf_pages(input_file, pages, output_file), output_file=output_file)
+
+
+@handler("rotate_pdf", started=("PDF rotation initiated", "pdf"))
+def handle_rotate_pdf(input_file, angle, output_file):
+    angle = int(angle)
+    update_context(f"Rotating {input_file} by {angle} degrees to {output_file}", context_type="pdf")
+    return result(rotate_pdf_pages(input_file, angle, output_file), output_file=output_file)
+
+
+@handler("create_pdf", started=("PDF creation initiated", "pdf"))
+def handle_create_pdf(text, output_file):
+    update_context(f"Creating PDF {output_file} from text", context_type="pdf")
+    return result(create_pdf_from_text(text, output_file), output_file=output_file)
+
+
+@handler("extract_pdf_text", started=("PDF text extraction initiated", "pdf"))
+def handle_extract_pdf_text(input_file):
+    update_context(f"Extracting text from PDF: {input_file}", context_type="pdf")
+    text = extract_text_from_pdf(input_file)
+    if not text:
+        return result(False)
+    update_context(f"Successfully extracted text from {input_file}", context_type="pdf")
+    return result(True, f"\nExtracted Text: \n{text}", text=text)
+
+
+# --- Password manager --------------------------------------------------------
+
+@handler("password_init", uses="passwords", asks=("read_secret",))
+def handle_password_init(master_password=None, read_secret=getpass.getpass):
+    initialized = initialize_password_manager(master_password, read_secret=read_secret)
+    update_context("Initialized password manager", context_type="security")
+    return result(bool(initialized))
+
+
+@handler("password_add", uses="passwords")
+def handle_password_add(master_password, service, username, password=None, generate=False,
+                        length=16, uppercase=True, digits=True, symbols=True):
+    update_context(f"Adding password for service: {service}", context_type="security")
+    if _as_bool(generate) or password is None:
+        password = generate_password(int(length), _as_bool(uppercase), _as_bool(digits), _as_bool(symbols))
+    return result(bool(add_password(master_password, service, username, password)),
+                  service=service, username=username)
+
+
+@handler("password_get", uses="passwords")
+def handle_password_get(master_password, service=None):
+    if not service:
+        service = None
+        update_context("Retrieving all passwords", context_type="security")
+    else:
+        update_context(f"Retrieving password for: {service}", context_type="security")
+
+    entries = lookup_passwords(master_password, service)
+    if entries is None:
+        return result(False)
+    if not entries:
+        return result(False, f"No passwords found for {service}" if service else "No passwords stored yet.",
+                      passwords={})
+
+    lines = []
+    for name in sorted(entries):
+        for username, password in entries[name].items():
+            lines.append(f"\nService: {name}\nUsername: {username}\nPassword: {password}")
+    return result(True, "\n".join(lines), passwords=entries)
+
+
+@handler("password_generate", uses="passwords")
+def handle_password_generate(length=16, uppercase=True, digits=True, symbols=True):
+    length = int(length)
+    update_context(f"Generating random password of length {length}", context_type="security")
+    password = generate_password(length, _as_bool(uppercase), _as_bool(digits), _as_bool(symbols))
+    return result(True, password=password)
+
+
+# --- Screen time -------------------------------------------------------------
+
+@handler("screen_start", uses="screen")
+def handle_screen_start():
+    success, message = services.get("screen_tracker").start_tracking()
+    update_context("Started screen time tracking", context_type="productivity")
+    return result(success, message)
+
+
+@handler("screen_stop", uses="screen")
+def handle_screen_stop():
+    success, message = services.get("screen_tracker").stop_tracking()
+    update_context("Stopped screen time tracking", context_type="productivity")
+    return result(success, message)
+
+
+@handler("screen_app_usage", uses="screen")
+def handle_screen_app_usage():
+    app_usage = services.get("screen_db").get_app_usage_today()
+    if app_usage:
+        lines = ["\nToday's App Usage:"]
+        lines += [f"{app['app_name']}: {app['duration_formatted']}" for app in app_usage]
+        message = "\n".join(lines)
+    else:
+        message = "No app usage recorded today."
+    update_context("Viewed today's app usage statistics", context_type="productivity")
+    return result(True, message, usage=app_usage)
+
+
+@handler("screen_website_usage", uses="screen")
+def handle_screen_website_usage():
+    website_usage = services.get("screen_db").get_website_usage_today()
+    if website_usage:
+        lines = ["\nToday's Website Usage:"]
+        lines += [f"{site['domain']}: {site['duration_formatted']}" for site in website_usage]
+        message = "\n".join(lines)
+    else:
+        message = "No website usage recorded today."
+    update_context("Viewed today's website usage statistics", context_type="productivity")
+    return result(True, message, usage=website_usage)
+
+
+@handler("screen_app_limit", uses="screen")
+def handle_screen_app_limit(app_name, minutes):
+    try:
+        minutes = int(minutes)
+    except ValueError:
+        return failure("Please enter a valid number for minutes.", "Invalid input for app usage limit")
+    success, message = services.get("screen_tracker").set_app_limit(app_name, minutes)
+    update_context(f"Set {minutes} minute daily limit for {app_name}", context_type="productivity")
+    return result(success, message)
+
+
+@handler("screen_website_limit", uses="screen")
+def handle_screen_website_limit(domain, minutes):
+    try:
+        minutes = int(minutes)
+    except ValueError:
+        return failure("Please enter a valid number for minutes.", "Invalid input for website usage limit")
+    success, message = services.get("screen_tracker").set_website_limit(domain, minutes)
+    update_context(f"Set {minutes} minute daily limit for {domain}", context_type="productivity")
+    return result(success, message)
+
+
+@handler("screen_limits", uses="screen")
+def handle_screen_limits():
+    limits = services.get("screen_db").get_active_limits()
+    if limits:
+        lines = ["\nActive Usage Limits:"]
+        lines += [f"{limit['name']} ({limit['type']}): {limit['daily_limit_formatted']}" for limit in limits]
+        message = "\n".join(lines)
+    else:
+        message = "No active usage limits set."
+    update_context("Viewed active usage limits", context_type="productivity")
+    return result(True, message, limits=limits)
+
+
+@handler("screen_export", uses="screen")
+def handle_screen_export(days=30, format_type="text"):
+    try:
+        days = int(days)
+    except ValueError:
+        return failure("Please enter a valid number for days.", "Invalid input for report days")
+    notes = []
+    format_type = (format_type or "text").lower()
+    if format_type not in ["text", "csv"]:
+        notes.append("Invalid format. Using text format.")
+        format_type = "text"
+    success, message = services.get("screen_tracker").export_report(days, format_type)
+    update_context(f"Exported {days}-day usage report in {format_type} format", context_type="productivity")
+    return result(success, "\n".join(notes + [message]))
+
+
+@handler("screen_graphs", uses="screen")
+def handle_screen_graphs(days=7):
+    try:
+        days = int(days)
+    except ValueError:
+        return failure("Please enter a valid number for days.", "Invalid input for graph days")
+    success, message = services.get("screen_tracker").generate_usage_graphs(days)
+    update_context(f"Generated usage graphs for the last {days} days", context_type="productivity")
+    return result(success, message)
+
+
+# --- Expenses ----------------------------------------------------------------
+
+# Answers to the "Choose a period (1-5)" prompt of the expense summary
+EXPENSE_PERIODS = {"1": "day", "2": "week", "3": "month", "4": "year", "5": "all"}
+
+
+@handler("expense_add", uses="expenses", asks=("read",))
+def handle_expense_add(amount, category=None, description=None, date=None, create_category=None, read=input):
+    success, message = services.get("expenses").add_expense(amount, category, description, date, create_category,
+                                                            read=read)
+    update_context(f"Added expense: {amount} for {category if category else 'selected category'}", context_type="finance")
+    return result(success, message)
+
+
+@handler("expense_list", uses="expenses")
+def handle_expense_list(category=None, start_date=None, end_date=None, limit=10):
+    try:
+        limit = int(limit)
+    except ValueError:
+        limit = 10
+    expenses = services.get("expenses").list_expenses(category, start_date, end_date, limit)
+    update_context(f"Listed expenses with filters: {category}, {start_date}, {end_date}", context_type="finance")
+    return result(bool(expenses), expenses=[dict(expense) for expense in expenses])
+
+
+@handler("expense_summary", uses="expenses")
+def handle_expense_summary(period="month"):
+    if period not in EXPENSE_PERIODS.values():
+        period = EXPENSE_PERIODS.get(period, "month")
+    services.get("expenses").show_summary(period)
+    update_context(f"Showed expense summary for period: {period}", context_type="finance")
+    return result(True, period=period)
+
+
+@handler("expense_report", uses="expenses")
+def handle_expense_report(year=None, month=None):
+    success, message = services.get("expenses").get_monthly_report(year or None, month or None)
+    update_context(f"Generated monthly expense report for {month}/{year}", context_type="finance")
+    # A successful report has already been printed
+    return result(success, "" if success else message)
+
+
+@handler("expense_export", uses="expenses")
+def handle_expense_export(format_type="csv", start_date=None, end_date=None):
+    format_type = (format_type or "csv").lower()
+    success, message = services.get("expenses").export_data(format_type, start_date, end_date)
+    update_context(f"Exported expenses to {format_type} format", context_type="finance")
+    return result(success, message)
+
+
+@handler("expense_delete", uses="expenses")
+def handle_expense_delete(expense_id=None, confirm=True):
+    if not expense_id:
+        return result(False, "No expense ID provided.")
+    if not _as_bool(confirm):
+        update_context("Expense deletion cancelled", context_type="finance")
+        return result(False, "Deletion cancelled.")
+    success, message = services.get("expenses").delete_expense(expense_id)
+    update_context(f"Deleted expense {expense_id}", context_type="finance")
+    return result(success, message)
+
+
+# --- Calories ----------------------------------------------------------------
+
+def _format_day_summary(summary):
+    """Render a CalorieTracker day summary the way the tracker menu prints it"""
+    lines = [
+        f"\nSummary for {summary['date']}:",
+        f"Total Calories: {summary['total_calories']} / {summary['calorie_goal']} ({summary['remaining_calories']} remaining)",
+        f"Protein: {summary['total_protein']:.1f}g / {summary['protein_goal']}g",
+        f"Carbs: {summary['total_carbs']:.1f}g / {summary['carbs_goal']}g",
+        f"Fat: {summary['total_fat']:.1f}g / {summary['fat_goal']}g",
+    ]
+    if summary['meals']:
+        lines.append("\nMeals:")
+        for meal in summary['meals']:
+            lines.append(f"- {meal['meal_type']}: {meal['food']} ({meal['calories']} cal, {meal['protein']:.1f}g protein)")
+    return "\n".join(lines)
+
+
+def _valid_date(date):
+    try:
+        datetime.datetime.strptime(date, "%Y-%m-%d")
+        return True
+    except (TypeError, ValueError):
+        return False
+
+
+@handler("meal_log", uses="calories", asks=("read",))
+def handle_meal_log(food, quantity=1, meal_type="Other", nutrition=None, read=input):
+    try:
+        quantity = float(quantity)
+    except ValueError:
+        quantity = 1
+    meal_type = meal_type or "Other"
+    success, message = services.get("calories").log_meal(food, quantity, meal_type, nutrition=nutrition, read=read)
+    update_context(f"Logged meal: {quantity} {food} as {meal_type}", context_type="health")
+    return result(success, message)
+
+
+@handler("weight_log", uses="calories")
+def handle_weight_log(weight):
+    try:
+        weight = float(weight)
+    except ValueError:
+        return failure("Please enter a valid weight.")
+    success, message = services.get("calories").log_weight(weight)
+    update_context(f"Logged weight: {weight} kg", context_type="health")
+    return result(success, message)
+
+
+@handler("calorie_today", uses="calories")
+def handle_calorie_today():
+    summary = services.get("calories").get_today_summary()
+    update_context("Retrieved today's calorie summary", context_type="health")
+    return result(True, _format_day_summary(summary), summary=summary)
+
+
+@handler("calorie_day", uses="calories")
+def handle_calorie_day(date):
+    if not _valid_date(date):
+        return failure("Invalid date format. Please use YYYY-MM-DD.")
+    summary = services.get("calories").get_day_summary(date)
+    update_context(f"Retrieved calorie summary for {date}", context_type="health")
+    return result(True, _format_day_summary(summary), summary=summary)
+
+
+@handler("nutrition_report", uses="calories")
+def handle_nutrition_report(days=7):
+    try:
+        days = int(days)
+    except ValueError:
+        return failure("Please enter a valid number of days.")
+    success, message = services.get("calories").generate_report(days)
+    update_context(f"Generated nutrition report for {days} days", context_type="health")
+    return result(success, message)
+
+
+@handler("nutrition_goals", uses="calories")
+def handle_nutrition_goals(calories=None, protein=None, carbs=None, fat=None):
+    def number(value, kind):
+        if value is None or (isinstance(value, str) and not value.strip()):
+            return None
+        return kind(value)
+
+    try:
+        goals = (number(calories, int), number(protein, float), number(carbs, float), number(fat, float))
+    except ValueError:
+        return failure("Please enter valid numeric values.")
+    success, message = services.get("calories").update_goals(*goals)
+    update_context("Updated nutrition goals", context_type="health")
+    return result(success, message)
+
+
+@handler("weight_history", uses="calories")
+def handle_weight_history(days=30):
+    try:
+        days = int(days)
+    except ValueError:
+        return failure("Please enter a valid number of days.")
+    history = services.get("calories").get_weight_history(days)
+    if not history:
+        message = "No weight entries found for this period."
+    else:
+        message = "\n".join(["\nWeight History:"] + [f"{date}: {weight} kg" for date, weight in history])
+    update_context(f"Viewed weight history for {days} days", context_type="health")
+    return result(True, message, history=history)
+
+
+@handler("food_add", uses="calories")
+def handle_food_add(food_name, calories, protein, carbs, fat):
+    food_name = food_name.strip().lower()
+    try:
+        values = [float(value) for value in (calories, protein, carbs, fat)]
+    except ValueError:
+        return failure("Please enter valid nutritional values.")
+    success, message = services.get("calories").add_food_to_database(food_name, *values)
+    update_context(f"Added {food_name} to food database", context_type="health")
+    return result(success, message)
+
+
+@handler("food_search", uses="calories")
+def handle_food_search(query):
+    query = query.strip()
+    found = services.get("calories").search_food(query)
+    if not found:
+        message = f"No foods found matching '{query}'"
+    else:
+        lines = [f"\nFound {len(found)} matching foods:"]
+        for food, data in found.items():
+            lines.append(f"- {food}: {data['calories']} cal, P: {data['protein']}g, C: {data['carbs']}g, F: {data['fat']}g")
+        message = "\n".join(lines)
+    update_context(f"Searched food database for '{query}'", context_type="health")
+    return result(bool(found), message, foods=found)
+
+
+@handler("meals_for_day", uses="calories")
+def handle_meals_for_day(date=None):
+    date = date or datetime.datetime.now().strftime("%Y-%m-%d")
+    if not _valid_date(date):
+        return failure("Invalid date format. Please use YYYY-MM-DD.")
+    meals = services.get("calories").get_meals_for_day(date)
+    if not meals:
+        return result(False, f"No meals found for {date}", date=date, meals=[])
+    lines = [f"\nMeals for {date}:"]
+    lines += [f"ID {meal['id']}: {meal['meal_type']} - {meal['food']} ({meal['calories']} cal)" for meal in meals]
+    return result(True, "\n".join(lines), date=date, meals=meals)
+
+
+@handler("meal_delete", uses="calories")
+def handle_meal_delete(meal_id, confirm=True):
+    try:
+        meal_id = int(meal_id)
+    except ValueError:
+        return failure("Please enter a valid meal ID.")
+    if not _as_bool(confirm):
+        return result(False, "Deletion cancelled.")
+    success, message = services.get("calories").delete_meal(meal_id)
+    update_context(f"Deleted meal ID {meal_id}", context_type="health")
+    return result(success, message)
+
+
+# --- Menus -------------------------------------------------------------------
+
+MENUS = {
+    "passwords": Menu(
+        "Password Manager", "Choose an option (1-4): ",
+        [("1", "Initialize password manager", "password_init"),
+         ("2", "Add a password", "password_add"),
+         ("3", "Get a password", "password_get"),
+         ("4", "Generate a random password", "password_generate")],
+        "Invalid option.", "Invalid password manager option selected"),
+    "screen_time": Menu(
+        "Screen Time Tracker", "Choose an option (1-9): ",
+        [("1", "Start tracking screen time", "screen_start"),
+         ("2", "Stop tracking screen time", "screen_stop"),
+         ("3", "View today's app usage", "screen_app_usage"),
+         ("4", "View today's website usage", "screen_website_usage"),
+         ("5", "Set app usage limit", "screen_app_limit"),
+         ("6", "Set website usage limit", "screen_website_limit"),
+         ("7", "View active limits", "screen_limits"),
+         ("8", "Export usage report", "screen_export"),
+         ("9", "Generate usage graphs", "screen_graphs")],
+        None, None),
+    "expense_tracker": Menu(
+        "Expense Tracker", "Choose an option (1-6): ",
+        [("1", "Add a new expense", "expense_add"),
+         ("2", "List recent expenses", "expense_list"),
+         ("3", "Show expense summary", "expense_summary"),
+         ("4", "Generate monthly report", "expense_report"),
+         ("5", "Export expenses", "expense_export"),
+         ("6", "Delete an expense", "expense_delete")],
+        "Invalid option.", None),
+    "calorie_tracker": Menu(
+        "Calorie Tracker", "Choose an option (1-10): ",
+        [("1", "Log a meal", "meal_log"),
+         ("2", "Log weight", "weight_log"),
+         ("3", "Get today's summary", "calorie_today"),
+         ("4", "Get summary for specific day", "calorie_day"),
+         ("5", "Generate nutrition report", "nutrition_report"),
+         ("6", "Update nutrition goals", "nutrition_goals"),
+         ("7", "View weight history", "weight_history"),
+         ("8", "Add food to database", "food_add"),
+         ("9", "Search food database", "food_search"),
+         ("10", "Delete meal", "meals_for_day")],
+        "Invalid option.", None),
+}
+
+
+def menu_option(menu_name, choice):
+    """Return the intent behind a menu choice (its number or intent name), or None"""
+    for key, label, intent in MENUS[menu_name].options:
+        if choice in (key, intent):
+            return intent
+    return None
+
+
+def _run_menu(menu_name, choice, slots):
+    intent = menu_option(menu_name, choice)
+    if intent is None:
+        menu = MENUS[menu_name]
+        return failure(menu.invalid_message or "", menu.invalid_context)
+    spec = HANDLERS[intent]
+    # The menu is given every reader its options ask with; pass on the chosen one's
+    slots = {name: value for name, value in slots.items() if name not in READERS or name in spec.asks}
+    return spec.func(**slots)
+
+
+@handler("passwords", started=("Password management initiated", "security"), uses="passwords",
+         asks=("read_secret",))
+def handle_passwords(choice=None, **slots):
+    return _run_menu("passwords", choice, slots)
+
+
+@handler("screen_time", started=("Screen time tracking initiated", "productivity"), uses="screen")
+def handle_screen_time(choice=None, **slots):
+    # Create database directory if it doesn't exist
+    db_dir = os.path.join(os.path.expanduser("~"), ".assistant", "databases")
+    os.makedirs(db_dir, exist_ok=True)
+    return _run_menu("screen_time", choice, slots)
+
+
+@handler("expense_tracker", started=("Expense tracker initiated", "finance"), uses="expenses", asks=("read",))
+def handle_expense_tracker(choice=None, **slots):
+    return _run_menu("expense_tracker", choice, slots)
+
+
+@handler("calorie_tracker", started=("Calorie tracker initiated", "health"), uses="calories", asks=("read",))
+def handle_calorie_tracker(choice=None, **slots):
+    return _run_menu("calorie_tracker", choice, slots)
+
+
+# --- Music -------------------------------------------------------------------
+
+@handler("play_song", uses="music")
+def handle_play_song(title):
+    controller = services.get("music")
+    found = controller.search_songs(title)
+    if not found:
+        return result(False, f"Couldn't find the song '{title}'")
+    success, message = controller.play_song(found[0]["id"])
+    update_context(f"Playing song: {found[0]['title']} by {found[0]['artist']}", context_type="music")
+    return result(success, message, song=dict(found[0]))
+
+
+@handler("play_artist", uses="music")
+def handle_play_artist(artist):
+    controller = services.get("music")
+    found = controller.search_songs(artist)
+    if not found:
+        return result(False, f"Couldn't find any songs by '{artist}'")
+    # Play the first song by this artist
+    success, message = controller.play_song(found[0]["id"])
+    update_context(f"Playing music by {artist}", context_type="music")
+    return result(success, message, song=dict(found[0]))
+
+
+@handler("play_playlist", uses="music")
+def handle_play_playlist(name):
+    success, message = services.get("music").play_playlist(name)
+    update_context(f"Playing playlist: {name}", context_type="music")
+    return result(success, message)
+
+
+@handler("pause", uses="music")
+def handle_pause():
+    success, message = services.get("music").pause()
+    update_context("Paused music playback", context_type="music")
+    return result(success, message)
+
+
+@handler("resume", uses="music")
+def handle_resume():
+    success, message = services.get("music").resume()
+    update_context("Resumed music playback", context_type="music")
+    return result(success, message)
+
+
+@handler("next_song", uses="music")
+def handle_next_song():
+    success, message = services.get("music").next_song()
+    update_context("Skipped to next song", context_type="music")
+    return result(success, message)
+
+
+@handler("previous_song", uses="music")
+def handle_previous_song():
+    success, message = services.get("music").previous_song()
+    update_context("Returned to previous song", context_type="music")
+    return result(success, message)
+
+
+@handler("volume", uses="music")
+def handle_volume(direction, amount):
+    controller = services.get("music")
+    amount = int(amount)
+    if direction == "up":
+        success, message = controller.set_volume(min(controller.volume + amount, 100))
+    elif direction == "down":
+        success, message = controller.set_volume(max(controller.volume - amount, 0))
+    else:  # to
+        success, message = controller.set_volume(amount)
+    update_context(f"Changed volume to {controller.volume}%", context_type="music")
+    return result(success, message, volume=controller.volume)
+
+
+@handler("now_playing", uses="music")
+def handle_now_playing():
+    now_playing = services.get("music").get_now_playing()
+    if not (now_playing and now_playing.get("song")):
+        return result(False, "Nothing is currently playing")
+    song = now_playing["song"]
+    update_context(f"Checked currently playing song: {song['title']}", context_type="music")
+    return result(True, f"Now playing: {song['title']} by {song['artist']}", song=dict(song))
+
+
+@handler("list_playlists", uses="music")
+def handle_list_playlists():
+    playlists = services.get("music").list_playlists()
+    if not playlists:
+        return result(False, "You don't have any playlists yet", playlists=[])
+    lines = ["\nYour Playlists:"]
+    lines += [f"{i+1}. {playlist['name']} ({playlist['song_count']} songs)" for i, playlist in enumerate(playlists)]
+    update_context("Listed music playlists", context_type="music")
+    return result(True, "\n".join(lines), playlists=[dict(playlist) for playlist in playlists])
+
+
+# --- Chatbot -----------------------------------------------------------------
+
+# Shown when the chatbot cannot produce a response
+CHATBOT_APOLOGY = "I'm sorry, I'm having trouble processing that request. Can you try something else?"
+
+
+@handler("chatbot")
+def handle_chatbot(text):
+    try:
+        # Format the last 10 context items for get_response
+        formatted_context = []
+        for ctx in get_context(limit=10):
+            if ctx.startswith("User: "):
+                formatted_context.append(ctx)
+            elif ctx.startswith("Assistant response: "):
+                formatted_context.append(ctx.replace("Assistant response: ", "Assistant: "))
+
+        response, context_used = get_response(text, context=formatted_context)
+
+        # Update context with the response and what context was used
+        update_context(f"Assistant response: {response}", context_type="assistant_response")
+        if context_used:
+            update_context(f"Used context: {context_used}", context_type="system")
+        return result(True, response, response=response)
+    except Exception as e:
+        update_context(f"Chatbot error: {str(e)}", context_type="error")
+        return result(False, CHATBOT_APOLOGY, error=str(e))
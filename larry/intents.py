@@ -0,0 +1,174 @@
+# larry/intents.py
+"""
+Intent table and single-pass dispatcher for analyze_input.
+
+The table below lists every intent Larry understands, in the same order as
+the old ``if/elif`` chain in main.py: when an input matches several
+patterns, the intent listed first wins.  ``IntentDispatcher`` compiles the
+keywords of the whole table into one trie-shaped regex, so an input is
+scanned once instead of being run through 40+ separate ``re.search`` calls.
+"""
+import re
+from collections import namedtuple
+
+from tasks.utils import trie_regex
+
+# Intent returned when nothing in the table matches
+FALLBACK_INTENT = "chatbot"
+
+# Characters that make a pattern more than a plain "a|b|c" list of phrases
+_REGEX_META = set("\\.^$*+?{}[]()")
+
+# name:     intent name
+# pattern:  regex searched case-insensitively anywhere in the input
+# keywords: lowercase phrases, one of which must appear for the pattern to
+#           match; only needed when the pattern is not a plain phrase list
+# unless:   optional regex; if it matches the input, this intent is skipped
+IntentRule = namedtuple("IntentRule", ["name", "pattern", "keywords", "unless"],
+                        defaults=(None, None))
+
+INTENT_TABLE = [
+    IntentRule("send_email", r"send email"),
+    IntentRule("check_emails", r"check emails|receive emails"),
+    IntentRule("web_search", r"search for|google"),
+    IntentRule("reminder", r"remind me"),
+    IntentRule("weather", r"weather in"),
+    IntentRule("add_task", r"add task"),
+    IntentRule("show_tasks", r"show tasks"),
+    IntentRule("mark_task_done", r"mark task as done"),
+    IntentRule("delete_task", r"delete task"),
+    IntentRule("find_places", r"find places|tourist places"),
+    IntentRule("search_file", r"search file"),
+    IntentRule("ocr", r"scan text|ocr|extract text"),
+    # The old check was a plain, case-sensitive `"summarize" in user_input`
+    IntentRule("summarize", r"(?-i:summarize)", ("summarize",)),
+    IntentRule("sports", r"match|cricket|game"),
+    IntentRule("create_note", r"create note|new note|add note"),
+    IntentRule("add_event", r"add event|new event|create event"),
+    IntentRule("list_events", r"list events|show events|my events|calendar"),
+    IntentRule("list_notes", r"list notes|show notes|my notes"),
+    IntentRule("wikipedia", r"wiki|wikipedia|what is|who is|define"),
+    IntentRule("currency", r"convert currency|exchange rate"),
+    IntentRule("passwords", r"password manager|manage passwords|passwords"),
+    IntentRule("screen_time", r"screen time|screen tracker|track screen|screen usage"),
+    IntentRule("translate", r"translate"),
+    IntentRule("list_languages", r"list languages|common languages"),
+    IntentRule("merge_pdfs", r"merge pdfs"),
+    IntentRule("extract_pdf_pages", r"extract pdf pages"),
+    IntentRule("rotate_pdf", r"rotate pdf"),
+    IntentRule("create_pdf", r"create pdf"),
+    IntentRule("extract_pdf_text", r"extract text from pdf"),
+    IntentRule("expense_tracker", r"expense tracker|track expense|manage expense"),
+    IntentRule("calorie_tracker", r"calorie tracker|track calories|track food|count calories"),
+    IntentRule("play_song", r"play (song|track) (called |titled |named |'|\")?(.*?)(\'|\"|$| by)",
+               ("play song ", "play track ")),
+    IntentRule("play_artist", r"play (music|songs|tracks) by (artist |'|\")?(.*?)(\'|\"|$)",
+               ("play music by", "play songs by", "play tracks by")),
+    IntentRule("play_playlist", r"play playlist (called |titled |named |'|\")?(.*?)(\'|\"|$)",
+               ("play playlist ",)),
+    # A bare "pause" used to be matched with `user_input.lower() == "pause"`
+    IntentRule("pause", r"(pause|stop) (music|playback|song|track)|\Apause\Z", ("pause", "stop ")),
+    IntentRule("resume", r"resume|continue|play",
+               unless=r"play (song|track|playlist|music|songs|tracks)"),
+    IntentRule("next_song", r"next|skip"),
+    IntentRule("previous_song", r"previous|back"),
+    IntentRule("volume", r"volume (up|down|to) (\d+)(%)?",
+               ("volume up ", "volume down ", "volume to ")),
+    IntentRule("now_playing", r"what('s| is) playing|current song|now playing",
+               ("what's playing", "what is playing", "current song", "now playing")),
+    IntentRule("list_playlists", r"list (all |my )?(playlists|music)",
+               ("list playlists", "list music", "list all ", "list my ")),
+]
+
+
+def _is_phrase_list(pattern):
+    """True if pattern is just "phrase|phrase|..." with no regex syntax"""
+    return not any(c in _REGEX_META for c in pattern)
+
+
+class IntentDispatcher:
+    """
+    Match user input against an intent table in a single scan.
+
+    Every rule contributes lowercase keywords (its phrases, or the explicit
+    ``keywords`` for regex rules).  They are compiled into one trie regex
+    that is run over the lowercased input; each hit names the intents whose
+    keywords start at that position.  Candidates are then tried in table
+    order: phrase-list rules are decided by the hit alone, regex rules are
+    confirmed with their own pattern, so the winner is exactly the intent
+    the old elif chain would have picked.
+    """
+
+    def __init__(self, table=INTENT_TABLE, flags=re.IGNORECASE):
+        self.table = list(table)
+        self._rank = {rule.name: i for i, rule in enumerate(self.table)}
+        self._regex = {rule.name: re.compile(rule.pattern, flags) for rule in self.table}
+        self._unless = {rule.name: re.compile(rule.unless, flags)
+                        for rule in self.table if rule.unless}
+        # Intents that must be confirmed with their full regex after a hit
+        self._verify = set()
+
+        keyword_intents = {}
+        for rule in self.table:
+            if rule.keywords:
+                keywords = rule.keywords
+                self._verify.add(rule.name)
+            elif _is_phrase_list(rule.pattern):
+                keywords = [phrase.lower() for phrase in rule.pattern.split("|")]
+            else:
+                raise ValueError(f"Intent '{rule.name}' needs keywords for its regex pattern")
+            for keyword in keywords:
+                keyword_intents.setdefault(keyword, set()).add(rule.name)
+
+        # The trie regex reports the longest keyword at each position, so a
+        # hit also stands for every shorter keyword that is a prefix of it.
+        self._hits = {}
+        for keyword in keyword_intents:
+            intents = set()
+            for other, names in keyword_intents.items():
+                if keyword.startswith(other):
+                    intents |= names
+            self._hits[keyword] = intents
+        self._keywords = re.compile(trie_regex(keyword_intents))
+
+    def _candidates(self, text):
+        """Return the intents with a keyword anywhere in text, best rank first"""
+        lowered = text.lower()
+        search = self._keywords.search
+        found = set()
+        m = search(lowered)
+        while m is not None:
+            found |= self._hits[m.group()]
+            m = search(lowered, m.start() + 1)
+        return sorted(found, key=self._rank.__getitem__)
+
+    def match(self, text):
+        """
+        Find the intent for a piece of user input
+
+        Args:
+            text (str): The raw user input
+
+        Returns:
+            tuple: (intent name, re.Match of that intent's own pattern or None)
+        """
+        for intent in self._candidates(text):
+            m = None
+            if intent in self._verify:
+                m = self._regex[intent].search(text)
+                if m is None:
+                    continue
+            unless = self._unless.get(intent)
+            if unless is not None and unless.search(text):
+                continue
+            return intent, m if m is not None else self._regex[intent].search(text)
+        return FALLBACK_INTENT, None
+
+
+# Shared dispatcher built once at import time
+dispatcher = IntentDispatcher()
+
+
+def match_intent(text):
+    """Return (intent, match) for the given user input using the shared dispatcher"""
+    return dispatcher.match(text)
@@ -0,0 +1,122 @@
+# larry/loader.py
+"""
+Lazy loading of task modules.
+
+Importing every ``tasks.*`` module up front pulls in transformers models,
+matplotlib, OCR and PDF libraries before the first prompt is shown.
+``lazy_import`` hands back a stand-in that performs the real import the
+first time it is called or touched, so a feature only pays for its
+dependencies when its intent actually fires.
+
+Modules that load a model on first use can be warmed up instead: warm_up()
+imports them on a background thread and calls their own warm_up() function,
+so the model is ready by the time it is needed and the prompt is not held
+up meanwhile.
+"""
+import importlib
+import sys
+import threading
+import time
+
+# Module name -> attributes requested from it, in registration order
+_registry = {}
+
+# Module name -> seconds spent importing it (first load only)
+_load_times = {}
+
+_import_lock = threading.RLock()
+
+
+class LazyAttribute:
+    """Callable stand-in for an attribute of a module that is not imported yet"""
+
+    __slots__ = ("_module_name", "_attr", "_target")
+
+    def __init__(self, module_name, attr):
+        self._module_name = module_name
+        self._attr = attr
+        self._target = None
+
+    def _resolve(self):
+        if self._target is None:
+            module = load_module(self._module_name)
+            self._target = getattr(module, self._attr)
+        return self._target
+
+    def __call__(self, *args, **kwargs):
+        return self._resolve()(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._resolve(), name)
+
+    def __repr__(self):
+        state = "loaded" if self._target is not None else "not loaded"
+        return f"<lazy {self._module_name}.{self._attr} ({state})>"
+
+
+def lazy_import(module_name, attr):
+    """
+    Register ``attr`` of ``module_name`` for loading on first use
+
+    Args:
+        module_name (str): Dotted module path, e.g. "tasks.weather.weather_info"
+        attr (str): Name of the function or class inside that module
+
+    Returns:
+        LazyAttribute: Object that behaves like the attribute once used
+    """
+    attrs = _registry.setdefault(module_name, [])
+    if attr not in attrs:
+        attrs.append(attr)
+    return LazyAttribute(module_name, attr)
+
+
+def load_module(module_name):
+    """Import a registered module (once) and record how long it took"""
+    with _import_lock:
+        if module_name in _load_times:
+            return importlib.import_module(module_name)
+        start = time.perf_counter()
+        module = importlib.import_module(module_name)
+        _load_times[module_name] = time.perf_counter() - start
+        return module
+
+
+def registered_modules():
+    """Return the names of all modules registered for lazy loading"""
+    return list(_registry)
+
+
+def loaded_modules():
+    """Return {module name: import seconds} for modules loaded so far"""
+    return dict(_load_times)
+
+
+def warm_up(modules, verbose=True):
+    """
+    Import the given modules on a background thread, and call the warm_up()
+    function of those that have one
+
+    Args:
+        modules (iterable): Dotted module paths
+        verbose (bool): Report each load time, and failures, on stderr
+
+    Returns:
+        threading.Thread: The (daemon) thread doing the work
+    """
+    def load_all():
+        for name in modules:
+            start = time.perf_counter()
+            try:
+                module = load_module(name)
+                if callable(getattr(module, "warm_up", None)):
+                    module.warm_up()
+                if verbose:
+                    print(f"Warmed up {name} in {time.perf_counter() - start:.2f} s", file=sys.stderr)
+            except Exception as e:
+                if verbose:
+                    print(f"Could not warm up {name}: {e}", file=sys.stderr)
+
+    thread = threading.Thread(target=load_all, name="larry-warm-up", daemon=True)
+    thread.start()
+    return thread
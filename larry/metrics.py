@@ -0,0 +1,251 @@
+# larry/metrics.py
+"""
+Per-intent latency and error metrics.
+
+Every command is timed from the moment it is dispatched until it is done,
+tagged with its intent, and split into:
+
+  handler      time inside the intent's handler (Larry.execute)
+  input_wait   time spent in the readers that ask the user (input(),
+               getpass() or a script's answers; see timed_input)
+  network      time inside the handlers of network intents (those marked
+               ``network=True`` in larry/handlers.py)
+  compute      everything else: dispatch minus input_wait minus network
+
+Each gets a histogram per intent, together with an error count (exceptions
+and results that are not ok).  Type ``stats`` in the REPL for p50/p95/p99
+per intent, or ``stats json`` / ``stats prometheus`` to export them.
+
+    from larry.metrics import metrics
+
+    @metrics.dispatched
+    def analyze_input(user_input):
+        intent, match = match_intent(user_input)
+        metrics.tag(intent)
+        ...
+"""
+import datetime
+import functools
+import json
+import threading
+import time
+from contextlib import contextmanager
+
+from tasks.utils import Histogram
+
+SERIES = ("dispatch", "handler", "compute", "input_wait", "network")
+
+EXPORT_FILES = {"json": "larry_metrics.json", "prometheus": "larry_metrics.prom"}
+
+# The REPL commands stats_command() runs
+STATS_COMMANDS = ("stats", "stats json", "stats prometheus")
+
+
+class Span:
+    """Timings collected while one command runs"""
+
+    __slots__ = ("intent", "handler", "input_wait", "network", "error")
+
+    def __init__(self, intent=None):
+        self.intent = intent
+        self.handler = 0.0
+        self.input_wait = 0.0
+        self.network = 0.0
+        self.error = False
+
+
+class IntentMetrics:
+    """Histograms and error counts per intent"""
+
+    def __init__(self):
+        self._intents = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _current(self):
+        return getattr(self._local, "span", None)
+
+    @contextmanager
+    def dispatch(self, intent=None):
+        """
+        Time one command
+
+        Nested calls on the same thread (e.g. Larry.execute inside the REPL's
+        analyze_input) add to the outer command instead of starting a new one.
+        """
+        span = self._current()
+        if span is not None:
+            if span.intent is None:
+                span.intent = intent
+            yield span
+            return
+
+        span = self._local.span = Span(intent)
+        start = time.perf_counter()
+        try:
+            yield span
+        except BaseException:
+            span.error = True
+            raise
+        finally:
+            self._local.span = None
+            self.record(span, time.perf_counter() - start)
+
+    def dispatched(self, func):
+        """Decorator form of dispatch(); tag the intent inside with tag()"""
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with self.dispatch():
+                return func(*args, **kwargs)
+        return wrapper
+
+    def tag(self, intent):
+        """Set the intent of the command running on this thread"""
+        span = self._current()
+        if span is not None:
+            span.intent = intent
+
+    def fail(self):
+        """Count the command running on this thread as an error"""
+        span = self._current()
+        if span is not None:
+            span.error = True
+
+    @contextmanager
+    def blocked(self, kind):
+        """Count the time inside the block as input_wait or network time"""
+        span = self._current()
+        if span is None or getattr(self._local, "blocked", False):
+            yield
+            return
+        self._local.blocked = True
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._local.blocked = False
+            setattr(span, kind, getattr(span, kind) + time.perf_counter() - start)
+
+    def timed_input(self, read):
+        """Wrap read (input, getpass, ...) so that the time spent in it counts as input_wait"""
+        def wrapper(*args, **kwargs):
+            with self.blocked("input_wait"):
+                return read(*args, **kwargs)
+        return wrapper
+
+    def record(self, span, seconds):
+        """Add a finished command to its intent's histograms"""
+        values = {
+            "dispatch": seconds,
+            "handler": span.handler,
+            "compute": max(0.0, seconds - span.input_wait - span.network),
+            "input_wait": span.input_wait,
+            "network": span.network,
+        }
+        with self._lock:
+            entry = self._intents.get(span.intent or "unknown")
+            if entry is None:
+                entry = {"count": 0, "errors": 0, "series": {name: Histogram() for name in SERIES}}
+                self._intents[span.intent or "unknown"] = entry
+            entry["count"] += 1
+            entry["errors"] += span.error
+            for name, value in values.items():
+                entry["series"][name].observe(value)
+
+    def reset(self):
+        with self._lock:
+            self._intents.clear()
+
+    def snapshot(self):
+        """Return every intent's counts and histogram summaries"""
+        with self._lock:
+            return {
+                intent: {"count": entry["count"], "errors": entry["errors"],
+                         **{name: hist.summary() for name, hist in entry["series"].items()}}
+                for intent, entry in sorted(self._intents.items())
+            }
+
+    def to_json(self):
+        return json.dumps({"created": datetime.datetime.now().isoformat(timespec="seconds"),
+                           "intents": self.snapshot()}, indent=2)
+
+    def to_prometheus(self):
+        """Return the metrics in the Prometheus text exposition format"""
+        snapshot = self.snapshot()
+        lines = ["# HELP larry_errors_total Commands that raised or returned ok=false",
+                 "# TYPE larry_errors_total counter"]
+        for intent, entry in snapshot.items():
+            lines.append(f'larry_errors_total{{intent="{intent}"}} {entry["errors"]}')
+        for name in SERIES:
+            metric = f"larry_{name}_seconds"
+            lines += [f"# HELP {metric} {name.replace('_', ' ').capitalize()} time per command",
+                      f"# TYPE {metric} histogram"]
+            for intent, entry in snapshot.items():
+                summary = entry[name]
+                cumulative = 0
+                for bound, count in summary["buckets"].items():
+                    cumulative += count
+                    lines.append(f'{metric}_bucket{{intent="{intent}",le="{bound}"}} {cumulative}')
+                lines.append(f'{metric}_sum{{intent="{intent}"}} {summary["sum"]}')
+                lines.append(f'{metric}_count{{intent="{intent}"}} {summary["count"]}')
+        return "\n".join(lines) + "\n"
+
+    def export(self, fmt="json", path=None):
+        """Write the metrics to path (default per format) and return the path"""
+        if fmt not in EXPORT_FILES:
+            raise ValueError(f"Unknown metrics format: {fmt} (use json or prometheus)")
+        path = path or EXPORT_FILES[fmt]
+        with open(path, "w") as f:
+            f.write(self.to_json() if fmt == "json" else self.to_prometheus())
+        return path
+
+    def format_stats(self):
+        """Return p50/p95/p99 per intent as a printable table"""
+        snapshot = self.snapshot()
+        if not snapshot:
+            return "No commands timed yet."
+
+        def ms(value):
+            return f"{value * 1000:.1f}" if value is not None else "-"
+
+        lines = [f"{'intent':<22}{'count':>6}{'errors':>7}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+                 f"{'compute':>9}{'input':>9}{'network':>9}"]
+        for intent, entry in snapshot.items():
+            total = entry["dispatch"]
+            lines.append(f"{intent:<22}{entry['count']:>6}{entry['errors']:>7}"
+                         f"{ms(total['p50']):>9}{ms(total['p95']):>9}{ms(total['p99']):>9}"
+                         f"{ms(entry['compute']['mean']):>9}{ms(entry['input_wait']['mean']):>9}"
+                         f"{ms(entry['network']['mean']):>9}")
+        lines.append("(compute, input and network are mean ms per command)")
+        return "\n".join(lines)
+
+
+def is_stats_command(text):
+    """True if text is one of STATS_COMMANDS, ignoring case and spacing"""
+    return " ".join(text.lower().split()) in STATS_COMMANDS
+
+
+def stats_command(command):
+    """
+    Run a ``stats`` REPL command and return what to print
+
+    ``stats`` shows the table and the counters of the context writer and
+    the generation cache;
+    ``stats json`` and ``stats prometheus`` export the metrics to
+    EXPORT_FILES.
+    """
+    words = command.lower().split()
+    if len(words) == 1:
+        # Imported here: only this command needs them
+        from tasks.chatbot.cache import generation_cache
+        from tasks.context.context_manager import context_writer
+        return "\n".join((metrics.format_stats(), context_writer.format_stats(), generation_cache.format_stats()))
+    try:
+        path = metrics.export(words[1])
+    except (ValueError, OSError) as e:
+        return f"Could not export metrics: {e}"
+    return f"Metrics written to {path}"
+
+
+# Shared by every Larry instance in the process
+metrics = IntentMetrics()
@@ -0,0 +1,283 @@
+# larry/profiler.py
+"""
+Startup profiler for ``tasks.*`` imports.
+
+Run ``python main.py --profile-startup`` (or main_voice.py) to see where
+cold start goes.  Every ``tasks.*`` module is executed one top-level
+statement at a time, so the report shows both the cost of each import and
+of each module-level side effect, e.g. a database opened or a model
+loaded when a task module is imported.
+
+Two phases are measured:
+
+  startup    modules imported before the first prompt
+  on demand  modules registered with lazy_import, loaded afterwards one by
+             one as if each intent had just fired for the first time
+
+Times are wall clock; memory is the change in resident set size.  Costs of
+nested ``tasks.*`` imports are reported under the nested module, never
+twice.  The table goes to stdout and the full data to a JSON file, which
+makes a number to gate on: ``startup_seconds``.
+"""
+import ast
+import datetime
+import importlib.abc
+import importlib.machinery
+import json
+import os
+import platform
+import sys
+import time
+
+from larry.loader import load_module, registered_modules
+
+DEFAULT_OUTPUT = "startup_profile.json"
+
+_FLAG = "--profile-startup"
+
+
+def _rss_bytes():
+    """Return the resident set size of this process in bytes"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        # Not Linux: fall back to the peak, which only ever grows
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def requested_output(argv):
+    """
+    Return the JSON path asked for with --profile-startup, or None
+
+    Accepts ``--profile-startup``, ``--profile-startup=FILE`` and
+    ``--profile-startup FILE``.
+    """
+    for i, arg in enumerate(argv):
+        if arg == _FLAG:
+            following = argv[i + 1] if i + 1 < len(argv) else ""
+            return following if following.endswith(".json") else DEFAULT_OUTPUT
+        if arg.startswith(_FLAG + "="):
+            return arg.split("=", 1)[1] or DEFAULT_OUTPUT
+    return None
+
+
+class _ProfilingLoader(importlib.machinery.SourceFileLoader):
+    """Source loader that runs a module statement by statement under the profiler"""
+
+    profiler = None
+
+    def exec_module(self, module):
+        self.profiler._exec_module(self, module)
+
+
+class _ProfilingFinder(importlib.abc.MetaPathFinder):
+    """Hands out profiling loaders for modules under the profiled package"""
+
+    def __init__(self, profiler, package):
+        self.profiler = profiler
+        self.package = package
+
+    def find_spec(self, fullname, path, target=None):
+        if fullname != self.package and not fullname.startswith(self.package + "."):
+            return None
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is not None:
+                break
+        else:
+            return None
+        if type(spec.loader) is importlib.machinery.SourceFileLoader:
+            loader = _ProfilingLoader(spec.loader.name, spec.loader.path)
+            loader.profiler = self.profiler
+            spec.loader = loader
+        return spec
+
+
+class StartupProfiler:
+    """Measures the import of every module in a package, statement by statement"""
+
+    def __init__(self, package="tasks"):
+        self.package = package
+        self.modules = []
+        self.statements = []
+        self.phase = "startup"
+        self.startup_seconds = None
+        self.startup_rss_delta = None
+        self._finder = None
+        self._stack = []
+        self._start = None
+        self._start_rss = None
+        # Seconds spent parsing and compiling, which the import itself would not
+        self._overhead = 0.0
+
+    @property
+    def active(self):
+        return self._finder is not None
+
+    def start(self):
+        """Install the import hook; call before the imports to be measured"""
+        if self.active:
+            return
+        self._start = time.perf_counter()
+        self._start_rss = _rss_bytes()
+        self._finder = _ProfilingFinder(self, self.package)
+        sys.meta_path.insert(0, self._finder)
+
+    def stop(self):
+        """Remove the import hook"""
+        if self._finder in sys.meta_path:
+            sys.meta_path.remove(self._finder)
+        self._finder = None
+
+    def _exec_module(self, loader, module):
+        name = module.__name__
+        parse_start = time.perf_counter()
+        source = loader.get_source(name) or ""
+        tree = ast.parse(source, loader.path)
+        self._overhead += time.perf_counter() - parse_start
+        record = {"module": name, "phase": self.phase, "seconds": 0.0, "self_seconds": 0.0,
+                  "rss_delta": 0, "self_rss_delta": 0, "error": None}
+        self.modules.append(record)
+        nested = {"seconds": 0.0, "rss": 0}
+        self._stack.append(nested)
+
+        # __future__ imports only work when compiled with the whole module
+        if any(isinstance(node, ast.ImportFrom) and node.module == "__future__" for node in tree.body):
+            chunks = [tree.body]
+        else:
+            chunks = [[node] for node in tree.body]
+
+        # Only the statements themselves are timed, not parsing and compiling
+        # them, which a normal import would mostly skip thanks to .pyc files
+        try:
+            for body in chunks:
+                compile_start = time.perf_counter()
+                code = compile(ast.Module(body=body, type_ignores=[]), loader.path, "exec")
+                self._overhead += time.perf_counter() - compile_start
+                self._exec_statement(source, body[0], code, module, record, nested)
+        except BaseException as e:
+            record["error"] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            self._stack.pop()
+            record["self_seconds"] = record["seconds"] - nested["seconds"]
+            record["self_rss_delta"] = record["rss_delta"] - nested["rss"]
+            if self._stack:
+                self._stack[-1]["seconds"] += record["seconds"]
+                self._stack[-1]["rss"] += record["rss_delta"]
+
+    def _exec_statement(self, source, node, code, module, record, nested):
+        """Run one top-level statement, adding its cost to the module's record"""
+        before_seconds, before_rss = nested["seconds"], nested["rss"]
+        start, start_rss = time.perf_counter(), _rss_bytes()
+        try:
+            exec(code, module.__dict__)
+        finally:
+            seconds = time.perf_counter() - start
+            rss_delta = _rss_bytes() - start_rss
+            record["seconds"] += seconds
+            record["rss_delta"] += rss_delta
+            if isinstance(node, (ast.Import, ast.ImportFrom)):
+                kind = "import"
+            elif not isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)) \
+                    and any(isinstance(n, ast.Call) for n in ast.walk(node)):
+                kind = "side effect"
+            else:
+                kind = None  # Plain definitions and constants
+            if kind:
+                text = ast.get_source_segment(source, node) or ""
+                self.statements.append({
+                    "module": module.__name__, "line": node.lineno, "kind": kind,
+                    "code": text.splitlines()[0][:60] if text else "",
+                    "seconds": seconds - (nested["seconds"] - before_seconds),
+                    "rss_delta": rss_delta - (nested["rss"] - before_rss),
+                    "phase": self.phase,
+                })
+
+    def end_startup(self):
+        """Record the time and memory from start() to the first prompt"""
+        self.startup_seconds = time.perf_counter() - self._start - self._overhead
+        self.startup_rss_delta = _rss_bytes() - self._start_rss
+        self.phase = "on demand"
+
+    def load_on_demand(self, modules=None):
+        """Load each lazily registered module as its intent would"""
+        loaded = {record["module"] for record in self.modules}
+        for name in modules or registered_modules():
+            if name in loaded or name in sys.modules:
+                continue
+            try:
+                load_module(name)
+            except Exception as e:
+                print(f"Could not import {name}: {e}", file=sys.stderr)
+                # Make sure the failure shows up even if it happened before exec
+                if not any(record["module"] == name for record in self.modules):
+                    self.modules.append({"module": name, "phase": self.phase, "seconds": 0.0,
+                                         "self_seconds": 0.0, "rss_delta": 0, "self_rss_delta": 0,
+                                         "error": f"{type(e).__name__}: {e}"})
+
+    def report(self):
+        """Return everything measured as a JSON-ready dict"""
+        return {
+            "created": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "argv": sys.argv,
+            "startup_seconds": self.startup_seconds,
+            "startup_rss_delta": self.startup_rss_delta,
+            "modules": sorted(self.modules, key=lambda r: -r["self_seconds"]),
+            "statements": sorted(self.statements, key=lambda r: -r["seconds"]),
+        }
+
+    def finish(self, output=DEFAULT_OUTPUT, top=15):
+        """
+        End the startup phase, load the on-demand modules, then print the
+        report and write it to output
+
+        Returns:
+            int: Exit status for the caller
+        """
+        if self.startup_seconds is None:
+            self.end_startup()
+        self.load_on_demand()
+        self.stop()
+
+        report = self.report()
+        with open(output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(format_report(report, top))
+        print(f"\nFull profile written to {output}")
+        return 0
+
+
+def _mb(size):
+    return size / (1024 * 1024)
+
+
+def format_report(report, top=15):
+    """Return the profile as printable tables, most expensive first"""
+    lines = [f"Startup: {report['startup_seconds'] * 1000:.1f} ms, "
+             f"{_mb(report['startup_rss_delta']):+.1f} MB RSS", "",
+             f"{'module':<44}{'phase':<11}{'self ms':>9}{'total ms':>10}{'self MB':>9}"]
+    for record in report["modules"]:
+        line = (f"{record['module']:<44}{record['phase']:<11}{record['self_seconds'] * 1000:>9.1f}"
+                f"{record['seconds'] * 1000:>10.1f}{_mb(record['self_rss_delta']):>+9.1f}")
+        if record["error"]:
+            line += f"  ({record['error']})"
+        lines.append(line)
+
+    lines += ["", f"Most expensive module-level statements (top {top}):",
+              f"{'location':<44}{'kind':<13}{'ms':>9}{'MB':>8}  code"]
+    for stmt in report["statements"][:top]:
+        location = f"{stmt['module']}:{stmt['line']}"
+        lines.append(f"{location:<44}{stmt['kind']:<13}{stmt['seconds'] * 1000:>9.1f}"
+                     f"{_mb(stmt['rss_delta']):>+8.1f}  {stmt['code']}")
+    return "\n".join(lines)
+
+
+# Shared by main.py and main_voice.py, which start it before their imports
+startup_profiler = StartupProfiler()
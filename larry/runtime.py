@@ -0,0 +1,143 @@
+# larry/runtime.py
+"""
+Asyncio runtime for the REPL.
+
+The prompt loop in main.py runs on an event loop.  Intents whose handlers
+mostly wait on the internet (weather, currency, sports, ... marked
+``network=True`` in larry/handlers.py) have their questions asked as usual
+and are then started as background tasks with a timeout: the next prompt
+appears straight away, several requests can be in flight at once, and each
+result is printed as soon as it arrives.
+
+Handlers run on a bounded thread pool, so a burst of slow requests cannot
+start an unbounded number of threads.  Async task functions they call (the
+translator) are run on the event loop itself, through
+larry.handlers.run_async.  Reading the keyboard or microphone
+happens on a separate thread, so it never waits for a free worker.
+
+A handler that times out is reported as failed; its worker thread cannot be
+interrupted and keeps its pool slot until the underlying call returns.
+"""
+import asyncio
+import contextvars
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from larry.handlers import HANDLERS, event_loop
+
+# Seconds a background request may take before it is given up
+NETWORK_TIMEOUT = 30
+
+# Background requests running at the same time
+WORKERS = 4
+
+# Intents the REPL runs in the background
+NETWORK_INTENTS = frozenset(name for name, spec in HANDLERS.items() if spec.network)
+
+
+def _resolve(future, value=None, error=None):
+    if future.done():
+        return
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(value)
+
+
+class AsyncRuntime:
+    """Runs blocking Larry calls for an asyncio REPL"""
+
+    def __init__(self, larry, workers=WORKERS, timeout=NETWORK_TIMEOUT):
+        self.larry = larry
+        self.timeout = timeout
+        self._pool = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="larry-worker")
+        self._tasks = set()
+        # The prompt the user is looking at, if we are waiting for a line
+        self._prompt = None
+
+    @property
+    def pending(self):
+        """Number of background requests still running"""
+        return len(self._tasks)
+
+    @staticmethod
+    def _context(loop):
+        """A copy of the current context in which handlers find loop"""
+        context = contextvars.copy_context()
+        context.run(event_loop.set, loop)
+        return context
+
+    async def run_blocking(self, func, *args, **kwargs):
+        """Run func on the bounded worker pool and return its result"""
+        loop = asyncio.get_running_loop()
+        call = functools.partial(self._context(loop).run, func, *args, **kwargs)
+        return await loop.run_in_executor(self._pool, call)
+
+    async def interact(self, func, *args, **kwargs):
+        """
+        Run func, which may read from the user, on a thread of its own
+
+        The thread is a daemon so that Ctrl+C can end Larry while it is
+        still waiting for a line.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        context = self._context(loop)
+
+        def target():
+            try:
+                value = context.run(func, *args, **kwargs)
+            except BaseException as e:
+                loop.call_soon_threadsafe(_resolve, future, None, e)
+            else:
+                loop.call_soon_threadsafe(_resolve, future, value)
+
+        threading.Thread(target=target, name="larry-input", daemon=True).start()
+        return await future
+
+    async def read_line(self, prompt):
+        """input(prompt) that leaves the event loop free while the user types"""
+        self._prompt = prompt
+        try:
+            return await self.interact(input, prompt)
+        finally:
+            self._prompt = None
+
+    def spawn(self, intent, slots):
+        """Start an intent in the background and print its result when done"""
+        task = asyncio.get_running_loop().create_task(self._run_in_background(intent, slots))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def _run_in_background(self, intent, slots):
+        try:
+            result = await asyncio.wait_for(self.run_blocking(self._execute, intent, slots), self.timeout)
+        except asyncio.TimeoutError:
+            result = {"intent": intent, "ok": False, "output": "",
+                      "message": f"Sorry, {intent} took longer than {self.timeout:g} seconds. Please try again later.",
+                      "data": {"error": "timeout"}}
+        self.print_result(result)
+        return result
+
+    def _execute(self, intent, slots):
+        return self.larry.execute(intent, capture_output=True, **slots)
+
+    def print_result(self, result):
+        """Print a background result without losing the prompt the user is at"""
+        text = result.get("output", "")
+        if result["message"]:
+            text += result["message"] + "\n"
+        if self._prompt is not None:
+            print("\n" + text + self._prompt, end="", flush=True)
+        else:
+            print(text, end="", flush=True)
+
+    async def drain(self):
+        """Wait for every background request to finish or time out"""
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
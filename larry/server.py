@@ -0,0 +1,260 @@
+# larry/server.py
+"""
+Resident Larry daemon on a Unix domain socket.
+
+Starting Larry costs seconds: transformers models, SQLite databases and the
+context history are all loaded from scratch.  ``python -m larry serve``
+pays that once and then answers requests from thin clients
+(``python -m larry "what's the weather"``, see larry/client.py) for as long
+as it runs.  Every connection is served on its own thread, and every
+session id gets its own context history.
+
+Protocol: one JSON object per line in both directions.
+
+  client -> server   a batch command (see larry/batch.py) plus
+                       "session"      context to use (default: "default")
+                       "interactive"  ask the client for missing answers
+  server -> client   {"type": "output", "text": ...}   as the task prints
+                     {"type": "prompt", "text": ..., "secret": bool}
+                         the client replies {"answer": ...}
+                     {"type": "result", "intent": ..., "ok": ..., ...}
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import signal
+import socket
+import socketserver
+import sys
+import threading
+import time
+from collections import deque
+
+from larry.api import Larry
+from larry.batch import run_command
+from larry.loader import warm_up
+from larry.metrics import is_stats_command, metrics, stats_command
+from tasks.context.context_manager import ContextStore, current_store, use_context
+
+DEFAULT_SOCKET = os.path.join(os.path.expanduser("~"), ".assistant", "larry.sock")
+
+# Context files of sessions other than "default" (which uses CONTEXT_FILE)
+SESSION_DIR = "context_sessions"
+
+# Modules loaded in the background when the daemon starts, along with any
+# model they load on first use (through their warm_up() function)
+WARM_MODULES = (
+    "tasks.chatbot.response_generator",
+    "tasks.chatbot.summarize",
+    "tasks.chatbot.email",
+)
+
+
+def session_filename(session_id):
+    """
+    Return the context file name of a session
+
+    The name starts with the id's safe characters, for people browsing
+    SESSION_DIR, and ends with a hash of the whole id, so ids that differ
+    only in other characters ("a/b", "a?b") never share a file.
+    """
+    readable = re.sub(r"[^\w.-]", "_", session_id)[:40]
+    digest = hashlib.sha256(session_id.encode()).hexdigest()[:16]
+    return f"{readable}-{digest}.json"
+
+
+class SessionRegistry:
+    """Keeps one ContextStore per session id for the life of the daemon"""
+
+    def __init__(self, directory=SESSION_DIR):
+        self.directory = directory
+        self._stores = {}
+        self._lock = threading.Lock()
+
+    def get(self, session_id):
+        """Return the store for a session, loading it (starting the session) on first use"""
+        session_id = session_id or "default"
+        with self._lock:
+            store = self._stores.get(session_id)
+            if store is None:
+                if session_id == "default":
+                    store = current_store()
+                else:
+                    store = ContextStore(os.path.join(self.directory, session_filename(session_id)))
+                store.load()
+                self._stores[session_id] = store
+            return store
+
+    def save_all(self):
+        with self._lock:
+            stores = list(self._stores.values())
+        for store in stores:
+            store.save(wait=True)
+
+
+class _Connection:
+    """JSON lines over one client socket"""
+
+    def __init__(self, rfile, wfile):
+        self._rfile = rfile
+        self._wfile = wfile
+        self._lock = threading.Lock()
+
+    def send(self, message):
+        data = (json.dumps(message, default=str) + "\n").encode()
+        with self._lock:
+            self._wfile.write(data)
+            self._wfile.flush()
+
+    def receive(self):
+        """Return the next message, or None when the client has gone"""
+        line = self._rfile.readline()
+        if not line:
+            return None
+        return json.loads(line)
+
+
+class _OutputStream:
+    """File-like object that forwards everything written to the client"""
+
+    def __init__(self, connection):
+        self._connection = connection
+
+    def write(self, text):
+        if text:
+            self._connection.send({"type": "output", "text": text})
+        return len(text)
+
+    def flush(self):
+        pass
+
+
+class _ClientAnswers:
+    """Answers prompts from the request's answers, then by asking the client"""
+
+    def __init__(self, connection, answers, interactive, secret=False, shared=None):
+        self._connection = connection
+        self._answers = shared if shared is not None else deque(answers)
+        self._interactive = interactive
+        self._secret = secret
+
+    def secret_reader(self):
+        """The same answers, but prompts are flagged as secret for the client"""
+        return _ClientAnswers(self._connection, None, self._interactive, True, self._answers)
+
+    def __call__(self, prompt=""):
+        if self._answers:
+            return str(self._answers.popleft())
+        if not self._interactive:
+            raise EOFError(f"No answer given for prompt: {prompt.strip()!r}")
+        self._connection.send({"type": "prompt", "text": prompt, "secret": self._secret})
+        reply = self._connection.receive()
+        if reply is None:
+            raise EOFError("Client disconnected")
+        return str(reply.get("answer", ""))
+
+
+class LarryRequestHandler(socketserver.StreamRequestHandler):
+    """Serves the requests of one client connection, one after another"""
+
+    def handle(self):
+        connection = _Connection(self.rfile, self.wfile)
+        while True:
+            try:
+                request = connection.receive()
+            except ValueError as e:
+                connection.send({"type": "result", "intent": None, "ok": False,
+                                 "message": f"Invalid JSON: {e}", "data": {}})
+                continue
+            if request is None:
+                return
+            self.server.serve_request(connection, request)
+
+
+class LarryServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Unix socket server that keeps one Larry, its services and its sessions warm"""
+
+    daemon_threads = True
+
+    def __init__(self, path=DEFAULT_SOCKET, larry=None, sessions=None):
+        _remove_stale_socket(path)
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        super().__init__(path, LarryRequestHandler)
+        # Only the owner may talk to the daemon: it can read passwords and mail
+        os.chmod(path, 0o600)
+        self.path = path
+        self.larry = larry or Larry()
+        self.sessions = sessions or SessionRegistry()
+
+    def serve_request(self, connection, request):
+        start = time.perf_counter()
+        utterance = request.get("utterance", "").strip()
+        if is_stats_command(utterance):
+            # Latency of the commands served so far; see larry/metrics.py
+            connection.send({"type": "result", "intent": "stats", "ok": True,
+                             "message": stats_command(utterance), "data": metrics.snapshot()})
+            return
+        reader = _ClientAnswers(connection, request.get("answers", []), request.get("interactive", False))
+        with use_context(self.sessions.get(request.get("session"))):
+            result = run_command(self.larry, request, reader=reader, secret_reader=reader.secret_reader(),
+                                 into=_OutputStream(connection), interactive=request.get("interactive", False))
+        result["seconds"] = time.perf_counter() - start
+        try:
+            connection.send({"type": "result", **result})
+        except OSError:
+            pass  # The client went away before the answer was ready
+
+    def server_close(self):
+        super().server_close()
+        self.sessions.save_all()
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+
+def _remove_stale_socket(path):
+    """Delete a socket file left behind by a daemon that is no longer running"""
+    if not os.path.exists(path):
+        return
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+    except OSError:
+        os.unlink(path)
+    else:
+        raise RuntimeError(f"A Larry daemon is already listening on {path}")
+    finally:
+        probe.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run Larry as a resident daemon on a Unix socket")
+    parser.add_argument("--socket", default=DEFAULT_SOCKET, help="socket path to listen on")
+    parser.add_argument("--no-warm-up", action="store_true",
+                        help="load models on first use instead of at startup")
+    args = parser.parse_args(argv)
+
+    server = LarryServer(args.socket)
+    if not args.no_warm_up:
+        warm_up(WARM_MODULES)
+
+    # Shut down cleanly (saving every session) on SIGTERM as well as Ctrl+C
+    def stop(signum, frame):
+        raise KeyboardInterrupt
+
+    signal.signal(signal.SIGTERM, stop)
+    print(f"Larry is listening on {args.socket}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nShutting down...", file=sys.stderr)
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
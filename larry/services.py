@@ -0,0 +1,100 @@
+# larry/services.py
+"""
+Process-wide container for Larry's long-lived, stateful controllers.
+
+Music, screen time, calorie and expense controllers open databases and
+create tables when they are constructed.  Instead of building a new one
+for every command, each is created once, on first use, and then reused
+for the life of the process.  Everything that was started is closed again
+when the process exits.
+"""
+import atexit
+import threading
+import time
+
+from larry.loader import lazy_import
+
+
+class ServiceContainer:
+    """Builds named services on first use and keeps them until close_all()"""
+
+    def __init__(self):
+        self._factories = {}
+        self._instances = {}
+        # Service name -> seconds its factory took, in start-up order
+        self._init_seconds = {}
+        # Resource name -> lock held while a handler uses that resource
+        self._resource_locks = {}
+        self._lock = threading.RLock()
+
+    def register(self, name, factory):
+        """
+        Register a service
+
+        Args:
+            name (str): Name used with get()
+            factory (callable): Called with no arguments to build the service
+        """
+        with self._lock:
+            self._factories[name] = factory
+
+    def get(self, name):
+        """Return the named service, building it the first time it is asked for"""
+        instance = self._instances.get(name)
+        if instance is not None:
+            return instance
+        with self._lock:
+            instance = self._instances.get(name)
+            if instance is None:
+                if name not in self._factories:
+                    raise KeyError(f"Unknown service: {name}")
+                start = time.perf_counter()
+                instance = self._factories[name]()
+                self._init_seconds[name] = time.perf_counter() - start
+                self._instances[name] = instance
+            return instance
+
+    def lock(self, name):
+        """Return the lock that serialises access to a named resource"""
+        with self._lock:
+            return self._resource_locks.setdefault(name, threading.RLock())
+
+    def started(self):
+        """Return the names of services that have been built, oldest first"""
+        return list(self._init_seconds)
+
+    def init_report(self):
+        """Return [(name, init seconds or None if never started)] for every service"""
+        return [(name, self._init_seconds.get(name)) for name in self._factories]
+
+    def format_report(self):
+        """Return the init report as printable text"""
+        lines = ["Service            Init time"]
+        for name, seconds in self.init_report():
+            cost = f"{seconds * 1000:.1f} ms" if seconds is not None else "not started"
+            lines.append(f"{name:<18} {cost}")
+        return "\n".join(lines)
+
+    def close_all(self):
+        """Close every started service, newest first"""
+        with self._lock:
+            for name in reversed(list(self._instances)):
+                instance = self._instances.pop(name)
+                close = getattr(instance, "close", None)
+                if close is None:
+                    continue
+                try:
+                    close()
+                except Exception as e:
+                    print(f"Error closing {name}: {e}")
+
+
+services = ServiceContainer()
+
+services.register("music", lazy_import("tasks.music_player.music", "initialize_music_controller"))
+services.register("screen_tracker", lazy_import("tasks.screen_tracker.screen", "ScreenTimeTracker"))
+services.register("screen_db", lazy_import("tasks.screen_tracker.database", "ScreenTimeDatabase"))
+services.register("calories", lazy_import("tasks.calories.calorie_counter", "CalorieTracker"))
+services.register("expenses", lazy_import("tasks.expense_tracker.expense_manager", "ExpenseManager"))
+
+atexit.register(services.close_all)
@@ -1,25 +1,50 @@
 import re
 import os
-from tasks.mail.send_email import send_email
-from tasks.mail.receive_email import receive_emails
-from tasks.search.web_search import google_search
-from tasks.reminder.reminders import set_reminder
-from tasks.weather.weather_info import get_weather
-from tasks.to_do.task_manager import add_task, get_tasks, mark_done, delete_task
-from tasks.tourism.find_places import find_places
-from tasks.file_management.manage_files import search_files, rename_file, move_file, delete_file
-from tasks.OCR_scanner.ocr import scan_text_from_image
-from tasks.chatbot.response_generator import get_response
-from tasks.chatbot.summarize import summarize_text
-from tasks.chatbot.email import generate_email
-from tasks.sports.cricket import get_cricket_scores
-from tasks.sports.football import get_football_scores
-from tasks.wikipedia.wiki import search_wikipedia
-from tasks.currency_converter.financer import convert_currency, list_common_currencies
-from tasks.notes.notes import create_note, list_notes, view_note, edit_note, delete_note
-from tasks.calender.cal import add_event, list_events, view_event, delete_event, get_today_events
+import sys
+from larry.profiler import requested_output, startup_profiler
+
+# Must start before the imports below so that they are measured too
+if requested_output(sys.argv[1:]):
+    startup_profiler.start()
+
+from larry.loader import lazy_import
 from tasks.voice.speech import start_voice_thread, queue_speech, listen_for_command, toggle_voice_listening
 
+# Task modules are imported the first time their intent fires.
+send_email = lazy_import("tasks.mail.send_email", "send_email")
+receive_emails = lazy_import("tasks.mail.receive_email", "receive_emails")
+google_search = lazy_import("tasks.search.web_search", "google_search")
+set_reminder = lazy_import("tasks.reminder.reminders", "set_reminder")
+get_weather = lazy_import("tasks.weather.weather_info", "get_weather")
+add_task = lazy_import("tasks.to_do.task_manager", "add_task")
+get_tasks = lazy_import("tasks.to_do.task_manager", "get_tasks")
+mark_done = lazy_import("tasks.to_do.task_manager", "mark_done")
+delete_task = lazy_import("tasks.to_do.task_manager", "delete_task")
+find_places = lazy_import("tasks.tourism.find_places", "find_places")
+search_files = lazy_import("tasks.file_management.manage_files", "search_files")
+rename_file = lazy_import("tasks.file_management.manage_files", "rename_file")
+move_file = lazy_import("tasks.file_management.manage_files", "move_file")
+delete_file = lazy_import("tasks.file_management.manage_files", "delete_file")
+scan_text_from_image = lazy_import("tasks.OCR_scanner.ocr", "scan_text_from_image")
+get_response = lazy_import("tasks.chatbot.response_generator", "get_response")
+summarize_text = lazy_import("tasks.chatbot.summarize", "summarize_text")
+generate_email = lazy_import("tasks.chatbot.email", "generate_email")
+get_cricket_scores = lazy_import("tasks.sports.cricket", "get_cricket_scores")
+get_football_scores = lazy_import("tasks.sports.football", "get_football_scores")
+search_wikipedia = lazy_import("tasks.wikipedia.wiki", "search_wikipedia")
+convert_currency = lazy_import("tasks.currency_converter.financer", "convert_currency")
+list_common_currencies = lazy_import("tasks.currency_converter.financer", "list_common_currencies")
+create_note = lazy_import("tasks.notes.notes", "create_note")
+list_notes = lazy_import("tasks.notes.notes", "list_notes")
+view_note = lazy_import("tasks.notes.notes", "view_note")
+edit_note = lazy_import("tasks.notes.notes", "edit_note")
+delete_note = lazy_import("tasks.notes.notes", "delete_note")
+add_event = lazy_import("tasks.calender.cal", "add_event")
+list_events = lazy_import("tasks.calender.cal", "list_events")
+view_event = lazy_import("tasks.calender.cal", "view_event")
+delete_event = lazy_import("tasks.calender.cal", "delete_event")
+get_today_events = lazy_import("tasks.calender.cal", "get_today_events")
+
 def analyze_input(user_input):
     if re.search(r"send email", user_input, re.IGNORECASE):
         queue_speech("I detected that you want to send an email! Would you like to type it or let Larry handle it?")
@@ -30,7 +55,7 @@ def analyze_input(user_input):
         queue_speech("Say write it for me, and I'll make the body according to the subject!")
         choice = input("Tell me your choice, pal: ")
         if "write it for me" in choice.lower():
-            body = generate_email(subject)
+            body = generate_email(subject, recipient)
             print(body)
             choice = input("Would you like to proceed with this? (yes/no): ")
             if choice.lower() == "yes":
@@ -244,6 +269,9 @@ def analyze_input(user_input):
             print(f"Chatbot failed to respond: {e}")
 
 if __name__ == "__main__":
+    if startup_profiler.active:
+        sys.exit(startup_profiler.finish(requested_output(sys.argv[1:])))
+
     print("Welcome to your personal assistant bot!")
     queue_speech("Welcome to your personal assistant!")
     start_voice_thread()
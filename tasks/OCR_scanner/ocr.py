@@ -21,6 +21,8 @@ def scan_text_from_image(image_path, output_file="extracted_text.txt"):
             with open(output_file, "w", encoding="utf-8") as file:
                 file.write(text)
             print(f"Text successfully saved to {output_file}")
+            return text
 
     except Exception as e:
         print("Failed to extract text:", e)
+        return None
@@ -11,7 +11,7 @@ class CalorieTracker:
         os.makedirs(os.path.dirname(db_path), exist_ok=True)
         
         self.db_path = db_path
-        self.conn = sqlite3.connect(db_path)
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
         self.cursor = self.conn.cursor()
         self._initialize_db()
         
@@ -127,8 +127,15 @@ class CalorieTracker:
         
         return results
     
-    def log_meal(self, food_name, quantity=1, meal_type="Other", date=None):
-        """Log a meal to the database."""
+    def log_meal(self, food_name, quantity=1, meal_type="Other", date=None, nutrition=None, save_to_db=False,
+                 read=input):
+        """
+        Log a meal to the database.
+
+        Foods missing from the food database need per-serving nutrition:
+        pass it as ``nutrition`` (a dict with calories, protein, carbs and
+        fat) or it will be asked for with read (called with the prompt).
+        """
         food_name = food_name.lower()
         
         if not date:
@@ -150,16 +157,23 @@ class CalorieTracker:
             self.conn.commit()
             return True, f"Logged {quantity} {food_name} ({calories} calories) as {meal_type}."
         else:
-            # Get user input for custom food
             try:
-                print(f"'{food_name}' not found in database. Please enter nutritional information:")
-                calories = float(input("Calories per serving: "))
-                protein = float(input("Protein (g) per serving: "))
-                carbs = float(input("Carbs (g) per serving: "))
-                fat = float(input("Fat (g) per serving: "))
+                if nutrition is not None:
+                    calories = float(nutrition["calories"])
+                    protein = float(nutrition["protein"])
+                    carbs = float(nutrition["carbs"])
+                    fat = float(nutrition["fat"])
+                else:
+                    # Get user input for custom food
+                    print(f"'{food_name}' not found in database. Please enter nutritional information:")
+                    calories = float(read("Calories per serving: "))
+                    protein = float(read("Protein (g) per serving: "))
+                    carbs = float(read("Carbs (g) per serving: "))
+                    fat = float(read("Fat (g) per serving: "))
+                    
+                    # Save to database if user wishes
+                    save_to_db = read("Save this food to database for future use? (y/n): ").lower() == 'y'
                 
-                # Save to database if user wishes
-                save_to_db = input("Save this food to database for future use? (y/n): ").lower() == 'y'
                 if save_to_db:
                     self.add_food_to_database(food_name, calories, protein, carbs, fat)
                 
@@ -176,7 +190,7 @@ class CalorieTracker:
                 
                 self.conn.commit()
                 return True, f"Logged {quantity} {food_name} ({calories} calories) as {meal_type}."
-            except ValueError:
+            except (ValueError, KeyError, TypeError):
                 return False, "Invalid nutritional information. Please enter numeric values."
     
     def log_weight(self, weight, date=None):
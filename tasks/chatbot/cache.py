@@ -0,0 +1,165 @@
+# tasks/chatbot/cache.py
+"""
+On-disk cache of generated text.
+
+Summarizing a text or drafting an email runs a transformer model for
+seconds, and users often ask for the same thing again (e.g. after backing
+out of a "proceed?" prompt).  GenerationCache keeps every result in a SQLite
+database (~/.assistant/generation_cache.db), keyed by a SHA-256 hash of what
+produced it: the kind of generation, the model, the generation parameters
+and the input text.  Any change to one of them is a different key, so a
+cached result is never served for other settings.
+
+The database is bounded to max_bytes of keys and values: once it grows past
+that, the least recently used entries are evicted.  Hits, misses, evictions
+and the bytes held are reported by stats() and the REPL's ``stats``
+command.
+
+Only deterministic generation (greedy or beam search) should be cached; a
+sampled result would be served again instead of a fresh one.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+CACHE_PATH = os.path.join(os.path.expanduser("~"), ".assistant", "generation_cache.db")
+
+# Bytes of keys and values kept before the least recently used are evicted;
+# 0 turns the cache off
+MAX_BYTES = 64 * 1024 * 1024
+
+
+def cache_key(kind, model, text, **params):
+    """Return the key of generating from text with a model and parameters"""
+    material = json.dumps([kind, model, params, text], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(material.encode()).hexdigest()
+
+
+class GenerationCache:
+    """Generated texts in SQLite by the hash of their input, evicted least recently used first"""
+
+    def __init__(self, path=CACHE_PATH, max_bytes=MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.conn = None
+        self.hits = self.misses = self.evictions = 0
+        self.bytes = 0
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        if self.conn is not None:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                bytes INTEGER NOT NULL,
+                last_used REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS entries_last_used ON entries (last_used);
+        """)
+        self.bytes = self.conn.execute("SELECT COALESCE(SUM(bytes), 0) FROM entries").fetchone()[0]
+
+    @property
+    def enabled(self):
+        return self.max_bytes > 0
+
+    def get(self, key):
+        """Return the text cached under key, or None"""
+        if not self.enabled:
+            return None
+        with self._lock:
+            self._connect()
+            row = self.conn.execute("SELECT value FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            with self.conn:
+                self.conn.execute("UPDATE entries SET last_used = ? WHERE key = ?", (time.time(), key))
+            return row[0]
+
+    def put(self, key, value):
+        """Cache value under key, evicting the least recently used entries if over max_bytes"""
+        size = len(key) + len(value.encode())
+        if not self.enabled or size > self.max_bytes:
+            return
+        with self._lock:
+            self._connect()
+            with self.conn:
+                old = self.conn.execute("SELECT bytes FROM entries WHERE key = ?", (key,)).fetchone()
+                self.conn.execute("INSERT OR REPLACE INTO entries (key, value, bytes, last_used) VALUES (?, ?, ?, ?)",
+                                  (key, value, size, time.time()))
+                self.bytes += size - (old[0] if old else 0)
+                if self.bytes > self.max_bytes:
+                    self._evict(self.bytes - self.max_bytes)
+
+    def _evict(self, excess):
+        """Delete the least recently used entries until excess bytes are freed"""
+        evicted = []
+        freed = 0
+        for key, size in self.conn.execute("SELECT key, bytes FROM entries ORDER BY last_used"):
+            if freed >= excess:
+                break
+            evicted.append((key,))
+            freed += size
+        self.conn.executemany("DELETE FROM entries WHERE key = ?", evicted)
+        self.bytes -= freed
+        self.evictions += len(evicted)
+
+    def cached(self, key, generate):
+        """Return the text cached under key, or generate() it and cache it"""
+        value = self.get(key)
+        if value is None:
+            value = generate()
+            self.put(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._connect()
+            with self.conn:
+                self.conn.execute("DELETE FROM entries")
+            self.bytes = 0
+
+    def stats(self):
+        """Return the cache's counters and size"""
+        with self._lock:
+            if self.conn is None and os.path.exists(self.path):
+                self._connect()
+            entries = self.conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0] if self.conn else 0
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": entries,
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+    def format_stats(self):
+        stats = self.stats()
+        lookups = stats["hits"] + stats["misses"]
+        hit_rate = f"{stats['hits'] / lookups:.0%}" if lookups else "-"
+        return (f"generation cache: {stats['hits']} hits, {stats['misses']} misses (hit rate {hit_rate}), "
+                f"{stats['entries']} entries, {stats['bytes'] / 1024:.1f} of {stats['max_bytes'] / 1024:.0f} KB, "
+                f"{stats['evictions']} evicted")
+
+    def close(self):
+        with self._lock:
+            if self.conn is not None:
+                self.conn.close()
+                self.conn = None
+
+
+# Shared by the summarizer and the email generator; opened on first use
+generation_cache = GenerationCache()
@@ -1,25 +1,216 @@
-from transformers import AutoModelForCausalLM, AutoTokenizer
-
-# Load the GPT-2 Small model and tokenizer
-model_name = "gpt2"  # GPT-2 Small
-model = AutoModelForCausalLM.from_pretrained(model_name)
-tokenizer = AutoTokenizer.from_pretrained(model_name)
-
-def generate_email(subject: str):
-    # Adjust the prompt to make it clearer and more focused
-    prompt = f"Write a polite and professional email to {recipient} requesting {subject}. The email should be formal and should only include relevant information about the sick leave request."
-    
-    # Encode the input prompt
-    inputs = tokenizer.encode(prompt, return_tensors="pt")
-    
-    # Generate the output using the model
-    outputs = model.generate(inputs, max_length=200, num_return_sequences=1, no_repeat_ngram_size=2, top_p=0.9, top_k=50)
-    
-    # Decode the output and return as text
-    email_content = tokenizer.decode(outputs[0], skip_special_tokens=True)
-    return email_content
+# tasks/chatbot/email.py
+"""
+Email drafting with GPT-2.
+
+The model is loaded by warm_up(), which the daemon runs on a background
+thread at startup and the REPL once an email is started (or at startup with
+--warm-up), or else by the first draft; importing this module loads
+nothing.
+
+A draft is written by greedy decoding of at most MAX_NEW_TOKENS tokens
+after the prompt, and stops once TIME_BUDGET seconds have gone into
+generating it: what was written by then is returned.  Every prompt starts
+with the same instructions (PROMPT_PREFIX), so their keys and values are
+computed once when the model loads and reused by every draft; only the
+recipient, subject and context are run through the model each time.
+
+Passing a stream (e.g. sys.stdout) writes the text to it as tokens are
+generated.  The time to the first token, the tokens and the time taken are
+returned in a Draft.  Complete drafts are cached on disk by their prompt and
+settings (see tasks/chatbot/cache.py): asking for the same email again
+returns it at once.
+
+`python benchmarks/email_benchmark.py` reports the load time, time to first
+token and tokens/s, with and without the reused prefix.
+"""
+import copy
+import threading
+import time
+from collections import namedtuple
+
+from tasks.chatbot.cache import cache_key, generation_cache
+
+# Hugging Face model to write with
+MODEL = "gpt2"  # GPT-2 Small
+
+# Tokens generated at most, not counting the prompt
+MAX_NEW_TOKENS = 160
+
+# Seconds of generation after which a draft is cut short
+TIME_BUDGET = 20.0
+
+# Passed to model.generate, and part of the cache key of every email;
+# greedy, so the same prompt always gives the same email
+GENERATION = dict(do_sample=False, no_repeat_ngram_size=2)
+
+# The start of every prompt; its keys and values are computed once
+PROMPT_PREFIX = ("Write a polite and professional email. The email should be formal and should only "
+                 "include relevant information about the request.\n\n")
+
+# text:                the draft, without the prompt
+# first_token_seconds: from the start of generation to the first token
+# seconds:             generation time in total
+# tokens:              tokens generated
+# cached:              whether the draft came from the cache
+# complete:            False if the time budget cut it short
+Draft = namedtuple("Draft", ["text", "first_token_seconds", "seconds", "tokens", "cached", "complete"])
+
+
+def build_prompt(subject, recipient=None, context=None):
+    """Return the part of the prompt after PROMPT_PREFIX"""
+    lines = [f"To: {recipient}" if recipient else "To: the recipient", f"Request: {subject}"]
+    if context:
+        lines.append("Notes: " + "; ".join(context))
+    return "\n".join(lines) + "\n\nEmail:\n"
+
+
+class TokenStreamer:
+    """
+    Receives the tokens model.generate() produces (as its streamer), writes
+    the text to a stream as it grows and times the first token
+    """
+
+    def __init__(self, tokenizer, stream=None):
+        self.tokenizer = tokenizer
+        self.stream = stream
+        self.start = time.perf_counter()
+        self.first_token_seconds = None
+        self.ids = []
+        self._prompt_seen = False
+        self._written = 0
+
+    def put(self, value):
+        # generate() passes the prompt first, then one token per step
+        if not self._prompt_seen:
+            self._prompt_seen = True
+            return
+        if self.first_token_seconds is None:
+            self.first_token_seconds = time.perf_counter() - self.start
+        self.ids.extend(value.reshape(-1).tolist())
+        if self.stream is not None:
+            text = self.tokenizer.decode(self.ids, skip_special_tokens=True)
+            # Up to the last space: the end may still change (an incomplete
+            # character, or spacing the decoder cleans up)
+            self._write(text[:text.rfind(" ") + 1])
+
+    def end(self):
+        if self.stream is not None:
+            self._write(self.tokenizer.decode(self.ids, skip_special_tokens=True))
+            self.stream.write("\n")
+            self.stream.flush()
+
+    def _write(self, text):
+        if len(text) > self._written:
+            self.stream.write(text[self._written:])
+            self.stream.flush()
+            self._written = len(text)
+
+
+class EmailGenerator:
+    """GPT-2 and its tokenizer, loaded once, with the prompt prefix's key/value cache"""
+
+    def __init__(self, model=MODEL, reuse_prefix=True):
+        self.model_name = model
+        self.reuse_prefix = reuse_prefix
+        self.model = self.tokenizer = None
+        # Seconds loading took, None until loaded
+        self.load_seconds = None
+        self._prefix_ids = self._prefix_cache = None
+        self._lock = threading.Lock()
+
+    def load(self):
+        """Load the model and compute the prefix cache, unless already done"""
+        with self._lock:
+            if self.model is None:
+                import torch
+                from transformers import AutoModelForCausalLM, AutoTokenizer
+
+                start = time.perf_counter()
+                tokenizer = AutoTokenizer.from_pretrained(self.model_name)
+                model = AutoModelForCausalLM.from_pretrained(self.model_name)
+                model.eval()
+                self._prefix_ids = tokenizer(PROMPT_PREFIX, return_tensors="pt").input_ids
+                if self.reuse_prefix:
+                    with torch.no_grad():
+                        self._prefix_cache = model(self._prefix_ids, use_cache=True).past_key_values
+                self.tokenizer, self.model = tokenizer, model
+                self.load_seconds = time.perf_counter() - start
+        return self.model
+
+    def generate(self, prompt, stream=None, max_new_tokens=MAX_NEW_TOKENS, time_budget=TIME_BUDGET):
+        """Write the continuation of PROMPT_PREFIX + prompt and return it as a Draft"""
+        import torch
+
+        model = self.load()
+        # Tokenized apart so that the prefix's tokens, and so its cache, are
+        # the same in every prompt
+        input_ids = torch.cat([self._prefix_ids, self.tokenizer(prompt, return_tensors="pt").input_ids], dim=1)
+        kwargs = dict(attention_mask=torch.ones_like(input_ids), max_new_tokens=max_new_tokens,
+                      max_time=time_budget, pad_token_id=self.tokenizer.eos_token_id, use_cache=True, **GENERATION)
+        streamer = TokenStreamer(self.tokenizer, stream)
+        with torch.no_grad():
+            if self._prefix_cache is not None:
+                # Generation extends the cache it is given (in place with
+                # newer transformers): hand it a copy
+                kwargs["past_key_values"] = copy.deepcopy(self._prefix_cache)
+            model.generate(input_ids, streamer=streamer, **kwargs)
+        seconds = time.perf_counter() - streamer.start
+        text = self.tokenizer.decode(streamer.ids, skip_special_tokens=True).strip()
+        eos = bool(streamer.ids) and streamer.ids[-1] == self.tokenizer.eos_token_id
+        complete = eos or len(streamer.ids) >= max_new_tokens or seconds < time_budget
+        return Draft(text, streamer.first_token_seconds, seconds, len(streamer.ids), False, complete)
+
+
+# Shared generator; nothing is loaded until it is used
+email_generator = EmailGenerator()
+
+
+def warm_up():
+    """Load the model now rather than on the first draft"""
+    email_generator.load()
+
+
+def draft_email(subject, recipient=None, context=None, stream=None, time_budget=TIME_BUDGET):
+    """
+    Write an email about a subject
+
+    Args:
+        subject (str): What the email is about
+        recipient (str, optional): Who it is for
+        context (list, optional): Related context texts to mention
+        stream (file-like, optional): Receives the text as it is generated
+        time_budget (float): Seconds of generation after which to stop
+
+    Returns:
+        Draft: The email and how long it took
+    """
+    prompt = build_prompt(subject, recipient, context)
+    key = cache_key("email", email_generator.model_name, PROMPT_PREFIX + prompt,
+                    max_new_tokens=MAX_NEW_TOKENS, **GENERATION)
+    start = time.perf_counter()
+    cached = generation_cache.get(key)
+    if cached is not None:
+        if stream is not None:
+            stream.write(cached + "\n")
+            stream.flush()
+        seconds = time.perf_counter() - start
+        return Draft(cached, seconds, seconds, 0, True, True)
+
+    draft = email_generator.generate(prompt, stream, time_budget=time_budget)
+    # A draft cut short by the time budget is not the email the model writes
+    if draft.complete:
+        generation_cache.put(key, draft.text)
+    return draft
+
+
+def generate_email(subject, recipient=None, context=None):
+    """Return the text of an email about a subject (see draft_email)"""
+    return draft_email(subject, recipient, context).text
+
 
 # Example usage
-subject = "sick leave for two days"
-recipient = "2023csb1108@iitrpr.ac.in"
-#generated_email = generate_email(subject, recipient)
+if __name__ == "__main__":
+    import sys
+
+    draft = draft_email("sick leave for two days", "2023csb1108@iitrpr.ac.in", stream=sys.stdout)
+    print(f"\nFirst token after {draft.first_token_seconds:.2f} s, {draft.tokens} tokens in {draft.seconds:.2f} s")
@@ -1,3 +1,184 @@
+# tasks/chatbot/response_generator.py
+"""
+Rule-based responses for the chatbot fallback.
+
+The rules below are tried in order and the first one that applies answers,
+as in the elif chain they replace (kept in benchmarks/reference.py).  A rule applies when the lowercased input
+contains a phrase of each of its keyword groups (anywhere, as a plain
+substring: "hi" matches "this", as it always has).  KeywordRules compiles
+the keywords of a table into one trie regex (tasks.utils.trie_regex), so
+the input is lowercased once and scanned once instead of once per keyword.
+
+With context, the most relevant item is the one containing the most long
+input words, as parts of its own words too ("mail" matches "email").
+Instead of comparing every input word with every word of every item, the
+lowercased items are joined and each input word is searched for once in the
+whole text, skipping to the next item at each hit: the work is in str.find,
+and grows with the number of items that do contain an input word.
+"""
+import re
+from bisect import bisect_right
+from collections import Counter, namedtuple
+from itertools import accumulate
+
+from tasks.utils import trie_regex
+
+# name:     rule name
+# keywords: groups of lowercase phrases; the rule applies when the input
+#           contains a phrase of every group
+# response: the response, or a function (user_input, lowered input,
+#           context) returning (response, context used), or None to let
+#           the next rules try
+ChatRule = namedtuple("ChatRule", ["name", "keywords", "response"])
+
+# Input words shorter than this do not count towards context relevance
+MIN_CONTEXT_WORD = 4
+
+
+class KeywordRules:
+    """A table of ChatRules compiled into a single keyword scan"""
+
+    def __init__(self, rules):
+        self.rules = list(rules)
+        # keyword -> (rule number, group number) of every group it is in
+        groups = {}
+        for i, rule in enumerate(self.rules):
+            for j, group in enumerate(rule.keywords):
+                for keyword in group:
+                    groups.setdefault(keyword, set()).add((i, j))
+        # The trie regex reports the longest keyword at each position, so a
+        # hit also stands for every shorter keyword that is a prefix of it.
+        self._hits = {}
+        for keyword in groups:
+            hits = set()
+            for other, ids in groups.items():
+                if keyword.startswith(other):
+                    hits |= ids
+            self._hits[keyword] = frozenset(hits)
+        self._keywords = re.compile(trie_regex(groups)) if groups else None
+        # The groups each rule needs
+        self._needs = [(rule, frozenset((i, j) for j in range(len(rule.keywords))))
+                       for i, rule in enumerate(self.rules)]
+
+    def matching(self, lowered):
+        """Yield the rules whose keyword groups all appear in lowered, in table order"""
+        found = set()
+        if self._keywords is not None:
+            search = self._keywords.search
+            m = search(lowered)
+            while m is not None:
+                found |= self._hits[m.group()]
+                m = search(lowered, m.start() + 1)
+        for rule, needs in self._needs:
+            if needs <= found:
+                yield rule
+
+
+def _introduce(user_input, lowered, context):
+    # Extract name after "is"
+    name = lowered.split("is")[1].strip()
+    return f"Nice to meet you, {name.title()}! How can I help you today?", None
+
+
+def _recall_name(user_input, lowered, context):
+    # Check context for stored name
+    if context and any("nice to meet you" in ctx.lower() for ctx in context):
+        return "Based on our conversation, I believe I greeted you earlier, but I don't store personal information.", None
+    return "I don't store personal information between conversations, so I don't know your name.", None
+
+
+def _most_relevant(user_input, context):
+    """Return the first context item containing the most long input words, or None"""
+    # A word counts as often as the input has it
+    words = Counter(word.lower() for word in user_input.split() if len(word) >= MIN_CONTEXT_WORD)
+    if not words:
+        return None
+    # The newline keeps words of consecutive items apart once joined
+    texts = [ctx.lower() + "\n" for ctx in context]
+    joined = "".join(texts)
+    # Where each item ends in joined; words hold no whitespace, so a hit
+    # never spans two items
+    ends = list(accumulate(map(len, texts)))
+    find = joined.find
+    overlap = Counter()
+    for word, count in words.items():
+        position = find(word)
+        while position != -1:
+            item = bisect_right(ends, position)
+            overlap[item] += count
+            position = find(word, ends[item])
+    if not overlap:
+        return None
+    best = max(overlap.values())
+    return context[min(item for item, score in overlap.items() if score == best)]
+
+
+def _from_context(user_input, lowered, context):
+    if not context:
+        return None
+    context_used = _most_relevant(user_input, context)
+    if context_used is None:
+        return "I don't see any relevant previous activities. How can I assist you today?", None
+    # Check if the context relates to specific topics
+    for rule in CONTEXT_RULES.matching(context_used.lower()):
+        return rule.response, context_used
+    # Generic context response - avoid using exact user input as context
+    if not context_used.startswith("User:"):
+        return f"Based on our previous conversation, can I help you with something related to {context_used[:30]}...?", context_used
+    return "How can I assist you today?", context_used
+
+
+QUESTION_WORDS = ("what", "who", "when", "where", "why", "how")
+
+
+def _question(user_input, lowered, context):
+    if lowered.startswith(QUESTION_WORDS):
+        return "That's a good question. To give you the best answer, could you provide more details?", None
+    return None
+
+
+RESPONSE_RULES = KeywordRules([
+    ChatRule("greeting", (("hello", "hi", "hey", "hlo"),), "Hello! How can I help you today?"),
+    ChatRule("how_are_you", (("how are you",),), "I'm doing well, thank you for asking! What can I do for you?"),
+    ChatRule("bot_name", (("your name",),), "I'm Larry, your personal assistant bot. How can I help you?"),
+    ChatRule("user_name", (("my name",), ("is",)), _introduce),
+    ChatRule("ask_user_name", (("my name",), ("what", "who")), _recall_name),
+    # Only when there is context
+    ChatRule("context", (), _from_context),
+    # Topic-specific responses without context
+    ChatRule("weather", (("weather", "temperature", "forecast"),),
+             "Would you like me to check the weather for you? Please specify a location."),
+    ChatRule("time", (("time", "date", "day"),), "Do you need information about the current time or date?"),
+    ChatRule("tasks", (("remind", "reminder", "schedule", "task"),),
+             "Would you like me to set a reminder or add a task to your list?"),
+    ChatRule("search", (("search", "find", "look up"),), "What would you like me to search for?"),
+    ChatRule("thanks", (("thank",),), "You're welcome! Feel free to ask if you need anything else."),
+    ChatRule("bye", (("bye", "goodbye", "see you"),), "Goodbye! Have a great day!"),
+    ChatRule("identity", (("who are you", "who're you", "who you are"),),
+             "I'm Larry, your personal assistant bot. I can help with tasks, weather, reminders, and more."),
+    # Only when the input starts with one of them
+    ChatRule("question", (QUESTION_WORDS,), _question),
+    ChatRule("default", (), "I'm not sure how to respond to that. Could you rephrase your request or ask me something specific?"),
+])
+
+# Responses to the most relevant context item, by what it is about
+CONTEXT_RULES = KeywordRules([
+    ChatRule("email", (("email", "message", "send"),),
+             "I see you've been working with emails. Would you like to send a new email or check your inbox?"),
+    ChatRule("tasks", (("task", "todo", "reminder"),),
+             "I notice you've been managing tasks. Would you like to add a new task or check your existing ones?"),
+    ChatRule("weather", (("weather", "forecast"),),
+             "I see you checked the weather earlier. Would you like to check the weather for another location?"),
+    ChatRule("calendar", (("meeting", "calendar", "schedule"),),
+             "Based on your calendar activity, would you like to schedule a new meeting or review upcoming events?"),
+    ChatRule("news", (("news", "article", "headline"),),
+             "I notice you were checking news earlier. Would you like me to find the latest headlines for you?"),
+    ChatRule("identity", (("i'm larry", "personal assistant"),),
+             "Yes, I'm Larry, your personal assistant bot. How can I help you today?"),
+    ChatRule("greeted", (("nice to meet you",),), "Is there anything specific I can help you with today?"),
+])
+
+
 def get_response(user_input, context=None):
     """
     Generate a response to user input, optionally using context
@@ -9,130 +190,15 @@ def get_response(user_input, context=None):
     Returns:
         tuple: (response_text, context_used)
     """
-    
-    # Initialize response and context tracking
-    response = ""
-    context_used = None
-    
     # Prevent the current input from being treated as context
     if context:
         # Filter out any context that is exactly the current input
         context = [ctx for ctx in context if not (user_input in ctx and ctx.startswith("User:"))]
-    
-    # Simple greeting responses
-    if any(greeting in user_input.lower() for greeting in ["hello", "hi", "hey", "hlo"]):
-        response = "Hello! How can I help you today?"
-    
-    elif "how are you" in user_input.lower():
-        response = "I'm doing well, thank you for asking! What can I do for you?"
-    
-    elif "your name" in user_input.lower():
-        response = "I'm Larry, your personal assistant bot. How can I help you?"
-    
-    elif "my name" in user_input.lower() and "is" in user_input.lower():
-        # Extract name after "is"
-        name_parts = user_input.lower().split("is")
-        if len(name_parts) > 1:
-            name = name_parts[1].strip()
-            response = f"Nice to meet you, {name.title()}! How can I help you today?"
-    
-    elif "my name" in user_input.lower() and any(q in user_input.lower() for q in ["what", "who"]):
-        # Check context for stored name
-        name_context = None
-        if context:
-            for ctx in context:
-                if "nice to meet you" in ctx.lower():
-                    name_context = ctx
-                    break
-        
-        if name_context:
-            # Try to extract name from previous greeting
-            response = "Based on our conversation, I believe I greeted you earlier, but I don't store personal information."
-        else:
-            response = "I don't store personal information between conversations, so I don't know your name."
-    
-    # Use context if provided
-    elif context:
-        # Look for relevant information in the context
-        relevant_context = []
-        for ctx in context:
-            # Enhanced relevance check: look for significant word overlap
-            user_words = [word.lower() for word in user_input.split() if len(word) > 3]
-            ctx_words = ctx.lower().split()
-            
-            # Count matching significant words
-            overlap = sum(1 for word in user_words if any(word in ctx_word for ctx_word in ctx_words))
-            if overlap > 0:
-                relevant_context.append((ctx, overlap))
-        
-        # Sort by relevance (overlap count)
-        relevant_context.sort(key=lambda x: x[1], reverse=True)
-        
-        if relevant_context:
-            # Use the most relevant context to generate a response
-            context_used = relevant_context[0][0]
-            
-            # Check if the context relates to specific topics
-            if any(topic in context_used.lower() for topic in ["email", "message", "send"]):
-                response = "I see you've been working with emails. Would you like to send a new email or check your inbox?"
-            
-            elif any(topic in context_used.lower() for topic in ["task", "todo", "reminder"]):
-                response = "I notice you've been managing tasks. Would you like to add a new task or check your existing ones?"
-            
-            elif any(topic in context_used.lower() for topic in ["weather", "forecast"]):
-                response = "I see you checked the weather earlier. Would you like to check the weather for another location?"
-            
-            elif any(topic in context_used.lower() for topic in ["meeting", "calendar", "schedule"]):
-                response = "Based on your calendar activity, would you like to schedule a new meeting or review upcoming events?"
-            
-            elif any(topic in context_used.lower() for topic in ["news", "article", "headline"]):
-                response = "I notice you were checking news earlier. Would you like me to find the latest headlines for you?"
-            
-            elif any(identity in context_used.lower() for identity in ["i'm larry", "personal assistant"]):
-                response = "Yes, I'm Larry, your personal assistant bot. How can I help you today?"
-            
-            elif "nice to meet you" in context_used.lower():
-                response = "Is there anything specific I can help you with today?"
-            
-            else:
-                # Generic context response - avoid using exact user input as context
-                if not context_used.startswith("User:"):
-                    response = f"Based on our previous conversation, can I help you with something related to {context_used[:30]}...?"
-                else:
-                    response = "How can I assist you today?"
-        else:
-            # No relevant context found
-            response = "I don't see any relevant previous activities. How can I assist you today?"
-    
-    # Topic-specific responses without context
-    elif any(word in user_input.lower() for word in ["weather", "temperature", "forecast"]):
-        response = "Would you like me to check the weather for you? Please specify a location."
-    
-    elif any(word in user_input.lower() for word in ["time", "date", "day"]):
-        response = "Do you need information about the current time or date?"
-    
-    elif any(word in user_input.lower() for word in ["remind", "reminder", "schedule", "task"]):
-        response = "Would you like me to set a reminder or add a task to your list?"
-    
-    elif any(word in user_input.lower() for word in ["search", "find", "look up"]):
-        response = "What would you like me to search for?"
-    
-    elif "thank" in user_input.lower():
-        response = "You're welcome! Feel free to ask if you need anything else."
-    
-    elif any(word in user_input.lower() for word in ["bye", "goodbye", "see you"]):
-        response = "Goodbye! Have a great day!"
-    
-    # Identity questions
-    elif any(q in user_input.lower() for q in ["who are you", "who're you", "who you are"]):
-        response = "I'm Larry, your personal assistant bot. I can help with tasks, weather, reminders, and more."
-    
-    # Handle questions
-    elif user_input.lower().startswith(("what", "who", "when", "where", "why", "how")):
-        response = "That's a good question. To give you the best answer, could you provide more details?"
-    
-    # Default response for unhandled inputs
-    else:
-        response = "I'm not sure how to respond to that. Could you rephrase your request or ask me something specific?"
-    
-    return response, context_used
\ No newline at end of file
+
+    lowered = user_input.lower()
+    for rule in RESPONSE_RULES.matching(lowered):
+        if not callable(rule.response):
+            return rule.response, None
+        answer = rule.response(user_input, lowered, context)
+        if answer is not None:
+            return answer
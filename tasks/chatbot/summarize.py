@@ -1,7 +1,270 @@
-from transformers import pipeline
+# tasks/chatbot/summarize.py
+"""
+Text summarization with a pre-trained transformer.
+
+The model used to be loaded when this module was imported.  Now nothing is
+loaded until the first summary is asked for, or until warm_up() is called
+(the daemon does that at startup).  Three CPU backends are available:
+
+  pytorch    the model as published, in fp32
+  quantized  the same model with its Linear layers dynamically quantized to
+             int8 (torch.ao.quantization.quantize_dynamic): smaller and
+             usually faster, at a small cost in summary quality
+  onnx       the model exported to ONNX and run by ONNX Runtime (needs
+             optimum[onnxruntime]); the export is saved under ONNX_CACHE,
+             so only the first load pays for it
+
+Texts longer than the model's input window (about 1,024 tokens, a few
+pages) used to be cut off there.  They are now summarized map-reduce style:
+
+  1. the text is split on sentence boundaries into chunks of at most
+     CHUNK_TOKENS tokens (a sentence longer than that is cut in pieces);
+  2. the chunks are summarized BATCH_SIZE at a time in one pipeline call
+     per batch, WORKERS batches at once;
+  3. the partial summaries are joined and, if they are still too long for
+     one window, chunked and summarized again, until one chunk is left for
+     the final summary.
+
+Every level shrinks the text by about CHUNK_TOKENS / max_len (six times or
+more), so a 100-page PDF takes a few hundred chunk summaries on the first
+level and a handful after it: the time grows with the length of the text,
+and the memory the model needs stays that of one batch per worker.
+
+Summaries are cached on disk by the hash of the text, model, backend and
+lengths (see tasks/chatbot/cache.py), so summarizing the same text again
+costs a lookup.
+
+MODEL, BACKEND and THREADS set the defaults, and configure() changes them
+before the model is loaded.  `python benchmarks/summarizer_benchmark.py`
+compares the load time, peak memory and tokens/s of each backend, and with
+--pages the time a long document takes.
+"""
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain, islice
+
+from tasks.chatbot.cache import cache_key, generation_cache
+
+# Hugging Face model to summarize with
+MODEL = "sshleifer/distilbart-cnn-12-6"
+
+# "pytorch", "quantized" or "onnx" (see above)
+BACKEND = "pytorch"
+BACKENDS = ("pytorch", "quantized", "onnx")
+
+# Intra-op threads used for inference; None uses every CPU this process may
+# run on.  PyTorch's setting is global to the process.
+THREADS = None
+
+# Where ONNX exports of the models are kept
+ONNX_CACHE = os.path.join(os.path.expanduser("~"), ".assistant", "onnx")
+
+# Tokens per chunk of a long text; None uses the model's input window less
+# a tenth, for the tokens joining sentences adds or removes
+CHUNK_TOKENS = None
+
+# Input window assumed when the tokenizer does not tell
+DEFAULT_WINDOW = 1024
+
+# Chunks summarized in one pipeline call
+BATCH_SIZE = 4
+
+# Batches summarized at once; each runs on THREADS threads
+WORKERS = 1
+
+# Ends of sentences, and blank lines between paragraphs
+SENTENCE_BREAK = re.compile(r"(?<=[.!?])\s+|\n\s*\n")
+
+
+def cpu_threads():
+    """Return the number of CPUs this process may run on"""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+class Summarizer:
+    """A summarization pipeline for one model and backend, loaded on first use"""
+
+    def __init__(self, model=MODEL, backend=BACKEND, threads=THREADS,
+                 chunk_tokens=CHUNK_TOKENS, batch_size=BATCH_SIZE, workers=WORKERS):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown summarizer backend '{backend}', expected one of {', '.join(BACKENDS)}")
+        self.model = model
+        self.backend = backend
+        self.threads = threads or cpu_threads()
+        self.chunk_tokens = chunk_tokens
+        self.batch_size = max(batch_size, 1)
+        self.workers = max(workers, 1)
+        # Chunks summarized on each level of the last long text, e.g. [212, 31, 5, 1]
+        self.last_levels = []
+        # Seconds the last load took, None until loaded
+        self.load_seconds = None
+        self._pipeline = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self):
+        return self._pipeline is not None
+
+    def load(self):
+        """Load the model if it is not loaded yet and return the pipeline"""
+        with self._lock:
+            if self._pipeline is None:
+                start = time.perf_counter()
+                self._pipeline = getattr(self, f"_load_{self.backend}")()
+                self.load_seconds = time.perf_counter() - start
+            return self._pipeline
+
+    def _load_pytorch(self):
+        import torch
+        from transformers import pipeline
+
+        torch.set_num_threads(self.threads)
+        return pipeline("summarization", model=self.model, device=-1)
+
+    def _load_quantized(self):
+        import torch
+
+        summarizer = self._load_pytorch()
+        summarizer.model = torch.ao.quantization.quantize_dynamic(
+            summarizer.model, {torch.nn.Linear}, dtype=torch.qint8)
+        return summarizer
+
+    def _load_onnx(self):
+        try:
+            import onnxruntime
+            from optimum.onnxruntime import ORTModelForSeq2SeqLM
+        except ImportError as e:
+            raise ImportError("The onnx summarizer backend needs ONNX Runtime: "
+                              "pip install optimum[onnxruntime]") from e
+        from transformers import AutoTokenizer, pipeline
+
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = self.threads
+        options.inter_op_num_threads = 1
+        path = os.path.join(ONNX_CACHE, self.model.replace("/", "--"))
+        if os.path.isdir(path):
+            model = ORTModelForSeq2SeqLM.from_pretrained(path, session_options=options)
+            tokenizer = AutoTokenizer.from_pretrained(path)
+        else:
+            model = ORTModelForSeq2SeqLM.from_pretrained(self.model, export=True, session_options=options)
+            tokenizer = AutoTokenizer.from_pretrained(self.model)
+            model.save_pretrained(path)
+            tokenizer.save_pretrained(path)
+        return pipeline("summarization", model=model, tokenizer=tokenizer)
+
+    def __call__(self, text, max_len=150, min_len=50):
+        pipeline = self.load()
+        chunks = self.chunks(text)
+        head = list(islice(chunks, 2))
+        if len(head) < 2:
+            # Fits in one window: summarize the text as it is
+            summary = pipeline(text, max_length=max_len, min_length=min_len, do_sample=False, truncation=True)
+            return summary[0]['summary_text']
+
+        # Chunks are packed so that any two in a row overflow a window;
+        # partial summaries of at most a quarter of one at least halve the
+        # text on every level
+        partial_len = min(max_len, self.window() // 4)
+        levels = []
+        while len(head) > 1:
+            summaries = []
+            for batch in self._summarize(chain(head, chunks), partial_len, min_len):
+                summaries += batch
+            levels.append(len(summaries))
+            chunks = self.chunks(" ".join(summaries))
+            head = list(islice(chunks, 2))
+        self.last_levels = levels + [1]
+        if not head:
+            return ""
+        final, tokens = head[0]
+        summary = pipeline(final, max_length=max_len, min_length=min(min_len, tokens // 2),
+                           do_sample=False, truncation=True)
+        return summary[0]['summary_text']
+
+    def window(self):
+        """Return the number of tokens of a chunk"""
+        if self.chunk_tokens:
+            return self.chunk_tokens
+        tokenizer = self.load().tokenizer
+        window = tokenizer.model_max_length
+        if not window or window > 100000:
+            window = DEFAULT_WINDOW
+        return (window - tokenizer.num_special_tokens_to_add()) * 9 // 10
+
+    def chunks(self, text):
+        """Yield (chunk, tokens) of text, packing whole sentences into chunks of window() tokens"""
+        tokenizer = self.load().tokenizer
+        limit = self.window()
+        sentences, size = [], 0
+        start = 0
+        for end in chain((m.start() for m in SENTENCE_BREAK.finditer(text)), (len(text),)):
+            sentence = text[start:end].strip()
+            start = end
+            if not sentence:
+                continue
+            ids = tokenizer(sentence, add_special_tokens=False)["input_ids"]
+            if size + len(ids) > limit and sentences:
+                yield " ".join(sentences), size
+                sentences, size = [], 0
+            if len(ids) > limit:
+                # A run-on "sentence", e.g. a table flattened by PDF extraction
+                for i in range(0, len(ids) - limit, limit):
+                    yield tokenizer.decode(ids[i:i + limit]), limit
+                ids = ids[(len(ids) - 1) // limit * limit:]
+                sentence = tokenizer.decode(ids)
+            sentences.append(sentence)
+            size += len(ids)
+        if sentences:
+            yield " ".join(sentences), size
+
+    def _summarize(self, chunks, max_len, min_len):
+        """Yield the summaries of (chunk, tokens) pairs, a batch at a time, in order"""
+        def summarize_batch(batch):
+            summaries = self.load()([text for text, _ in batch], batch_size=len(batch), max_length=max_len,
+                                    min_length=min(min_len, max_len, min(tokens for _, tokens in batch) // 2),
+                                    do_sample=False, truncation=True)
+            return [summary['summary_text'] for summary in summaries]
+
+        batches = iter(lambda: list(islice(chunks, self.batch_size)), [])
+        if self.workers == 1:
+            yield from map(summarize_batch, batches)
+            return
+        with ThreadPoolExecutor(self.workers, thread_name_prefix="larry-summarize") as pool:
+            # At most workers batches in flight, so memory stays bounded
+            pending = [pool.submit(summarize_batch, batch) for batch in islice(batches, self.workers)]
+            while pending:
+                summaries = pending.pop(0).result()
+                for batch in islice(batches, 1):
+                    pending.append(pool.submit(summarize_batch, batch))
+                yield summaries
+
+
+# Shared summarizer used by summarize_text; nothing is loaded until it is used
+summarizer = Summarizer()
+
+
+def configure(model=None, backend=None, threads=None, chunk_tokens=None, batch_size=None, workers=None):
+    """
+    Replace the shared summarizer with one using another model, backend,
+    number of threads or long-text settings (the defaults for whatever is
+    left out)
+    """
+    global summarizer
+    summarizer = Summarizer(model or MODEL, backend or BACKEND, threads or THREADS,
+                            chunk_tokens or CHUNK_TOKENS, batch_size or BATCH_SIZE, workers or WORKERS)
+    return summarizer
+
+
+def warm_up():
+    """Load the shared summarizer's model now rather than on first use"""
+    summarizer.load()
 
-# Initialize the summarizer pipeline with a lightweight model
-summarizer = pipeline("summarization", model="sshleifer/distilbart-cnn-12-6")
 
 def summarize_text(text, max_len=150, min_len=50):
     """
@@ -18,8 +281,10 @@ def summarize_text(text, max_len=150, min_len=50):
     if len(text.strip()) == 0:
         return "Input text is empty."
 
-    summary = summarizer(text, max_length=max_len, min_length=min_len, do_sample=False)
-    return summary[0]['summary_text']
+    current = summarizer
+    key = cache_key("summary", current.model, text, backend=current.backend, max_len=max_len, min_len=min_len,
+                    chunk_tokens=current.chunk_tokens)
+    return generation_cache.cached(key, lambda: current(text, max_len, min_len))
 
 
 # Test case
@@ -0,0 +1,207 @@
+# tasks/context/archive.py
+"""
+Cold tier of the context history.
+
+ContextStore keeps the most recent MAX_CONTEXT_SIZE items in memory.  Items
+pushed out of it are spilled into a SQLite database next to the context
+file (context_history_archive.db for context_history.json), where an FTS5
+index with the trigram tokenizer finds the ones that contain a piece of
+text.  When the items in memory give get_related_context fewer matches
+than it was asked for, it scores the archived candidates the same way
+(BM25 with a recency factor) and merges both; the last DECODED_ITEMS
+candidates are kept decoded, so repeated lookups skip the JSON.
+
+Every item is stored with the journal sequence number it was saved under,
+so spilling the same item twice (e.g. again while replaying the journal
+after a crash) keeps a single copy.
+
+The items of sessions condensed into digests (see tasks/context/sessions.py)
+are archived the same way, and the digests' JSON records are kept in a
+sessions table next to them.
+"""
+import heapq
+import json
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+
+from tasks.context.items import as_item
+
+# Archived items fetched per kind of match (see ContextArchive.search)
+CANDIDATES = 50
+
+# Archived items kept decoded between searches, least recently used dropped
+DECODED_ITEMS = 1024
+
+
+def archive_path(path):
+    """Return the archive database that goes with the context file at path"""
+    return os.path.splitext(path)[0] + "_archive.db"
+
+
+class ContextArchive:
+    """Evicted context items in SQLite, searchable by substring"""
+
+    def __init__(self, path):
+        self.path = path
+        self.conn = None
+        self._types = set()
+        # id -> ContextItem of the candidates of recent searches
+        self._decoded = OrderedDict()
+        # The context writer adds items while commands search them
+        self._lock = threading.Lock()
+
+    def _connect(self, create):
+        """Open the database, creating it only if create is set; return whether it is open"""
+        if self.conn is not None:
+            return True
+        if not create and not os.path.exists(self.path):
+            return False
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS items (
+                id INTEGER PRIMARY KEY,
+                seq INTEGER NOT NULL,
+                text TEXT NOT NULL,
+                type TEXT NOT NULL,
+                topics TEXT NOT NULL,
+                item TEXT NOT NULL,
+                UNIQUE (seq, text)
+            );
+            CREATE INDEX IF NOT EXISTS items_type ON items (type);
+            CREATE VIRTUAL TABLE IF NOT EXISTS items_fts USING fts5(
+                text, content='items', content_rowid='id', tokenize='trigram'
+            );
+            CREATE TABLE IF NOT EXISTS sessions (
+                first_seq INTEGER PRIMARY KEY,
+                last_seq INTEGER NOT NULL,
+                digest TEXT NOT NULL
+            );
+        """)
+        self._types = {row[0] for row in self.conn.execute("SELECT DISTINCT type FROM items")}
+        return True
+
+    def add(self, entries):
+        """Archive (seq, ContextItem) pairs in one transaction"""
+        if not entries:
+            return
+        with self._lock:
+            self._add(entries)
+
+    def _add(self, entries):
+        self._connect(create=True)
+        with self.conn:
+            for seq, context_item in entries:
+                item = context_item.to_dict()
+                item_type = item.get("type", "")
+                cursor = self.conn.execute(
+                    "INSERT OR IGNORE INTO items (seq, text, type, topics, item) VALUES (?, ?, ?, ?, ?)",
+                    (seq, item["text"], item_type, json.dumps(item.get("topics", [])), json.dumps(item)))
+                if cursor.rowcount:
+                    self.conn.execute("INSERT INTO items_fts (rowid, text) VALUES (?, ?)",
+                                      (cursor.lastrowid, item["text"]))
+                    self._types.add(item_type)
+
+    def add_sessions(self, records):
+        """Keep the records of session digests, replacing earlier ones for the same sessions"""
+        if not records:
+            return
+        with self._lock:
+            self._connect(create=True)
+            with self.conn:
+                self.conn.executemany(
+                    "INSERT OR REPLACE INTO sessions (first_seq, last_seq, digest) VALUES (?, ?, ?)",
+                    ((record["first_seq"], record["last_seq"], json.dumps(record)) for record in records))
+
+    def sessions(self):
+        """Return the records of every session digest, oldest first"""
+        with self._lock:
+            if not self._connect(create=False):
+                return []
+            return [json.loads(digest) for digest, in
+                    self.conn.execute("SELECT digest FROM sessions ORDER BY first_seq")]
+
+    def count(self):
+        with self._lock:
+            if not self._connect(create=False):
+                return 0
+            return self.conn.execute("SELECT COUNT(*) FROM items").fetchone()[0]
+
+    def search(self, terms, score, max_items=5):
+        """
+        Return (score, seq, text) for the best archived items, best first
+
+        terms are the query's words; score(seq, item) rates a candidate.
+        """
+        with self._lock:
+            return self._search(terms, score, max_items)
+
+    def _search(self, terms, score, max_items):
+        if not self._connect(create=False):
+            return []
+        # Candidates contain a query word, or have it as their type.  They
+        # are fetched newest first, items with all the words before items
+        # with any of them, stopping once there are max_items.  The trigram
+        # index only looks up words of three characters or more.
+        words = ['"' + term.replace('"', '""') + '"' for term in terms if len(term) >= 3]
+        queries = [" AND ".join(words), " OR ".join(words)] if len(words) > 1 else words
+        rows = []
+        for match in queries:
+            rows += self.conn.execute(
+                "SELECT items_fts.rowid, items.seq FROM items_fts "
+                "JOIN items ON items.id = items_fts.rowid WHERE items_fts MATCH ? "
+                "ORDER BY items_fts.rowid DESC LIMIT ?", (match, CANDIDATES)).fetchall()
+            if len(rows) >= max_items:
+                break
+        types = [t for t in self._types if t in terms]
+        if types:
+            rows += self.conn.execute(
+                f"SELECT id, seq FROM items WHERE type IN ({','.join('?' * len(types))}) "
+                "ORDER BY id DESC LIMIT ?", (*types, CANDIDATES)).fetchall()
+        candidates = dict(rows)
+        items = self._items(candidates)
+
+        scored = [(score(seq, items[rowid]), seq, items[rowid].text) for rowid, seq in candidates.items()]
+        return heapq.nlargest(max_items, scored)
+
+    def _items(self, rowids):
+        """Return id -> ContextItem for rowids, decoding only those not kept from earlier searches"""
+        items = {}
+        missing = []
+        for rowid in rowids:
+            context_item = self._decoded.get(rowid)
+            if context_item is None:
+                missing.append(rowid)
+            else:
+                self._decoded.move_to_end(rowid)
+                items[rowid] = context_item
+        if missing:
+            for rowid, item in self.conn.execute(
+                    f"SELECT id, item FROM items WHERE id IN ({','.join('?' * len(missing))})", missing):
+                items[rowid] = self._decoded[rowid] = as_item(json.loads(item))
+            while len(self._decoded) > DECODED_ITEMS:
+                self._decoded.popitem(last=False)
+        return items
+
+    def clear(self):
+        with self._lock:
+            if not self._connect(create=False):
+                return
+            with self.conn:
+                self.conn.execute("DELETE FROM items")
+                self.conn.execute("DELETE FROM sessions")
+                self.conn.execute("INSERT INTO items_fts (items_fts) VALUES ('delete-all')")
+            self._types = set()
+            self._decoded.clear()
+
+    def close(self):
+        with self._lock:
+            if self.conn is not None:
+                self.conn.close()
+                self.conn = None
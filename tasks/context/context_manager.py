@@ -1,10 +1,24 @@
 # Enhanced implementation for tasks/context/context_manager.py
 
+import atexit
 import json
 import os
-import datetime
+import sys
+import heapq
+import itertools
+import math
 from collections import deque
+from contextlib import contextmanager
+import contextvars
 import re
+import tempfile
+import threading
+import time
+
+from tasks.context.archive import ContextArchive, archive_path
+from tasks.context.items import ContextItem, as_item
+from tasks.context import sessions
+from tasks.utils import Histogram, trie_regex
 
 # Maximum number of context items to store
 MAX_CONTEXT_SIZE = 100
@@ -12,37 +26,801 @@ MAX_CONTEXT_SIZE = 100
 # File to store context between sessions
 CONTEXT_FILE = "context_history.json"
 
-# In-memory context storage
-context_history = deque(maxlen=MAX_CONTEXT_SIZE)
+# When journal writes reach the disk: "always" (every item), "interval"
+# (at most every FSYNC_INTERVAL seconds, and on save) or "never" (left to
+# the operating system)
+FSYNC_POLICY = "interval"
+FSYNC_INTERVAL = 1.0
 
-def initialize_context():
-    """Initialize the context manager, loading previous context if available"""
-    global context_history
-    
-    if os.path.exists(CONTEXT_FILE):
+# Journal lines written before it is folded into the snapshot; histories
+# longer than this are compacted once the journal is as long as they are
+COMPACT_AFTER = 1000
+
+# Evicted items collected before they are written to the archive together
+ARCHIVE_BATCH = 100
+
+# Whether loading replaces closed sessions with digests (see
+# tasks/context/sessions.py); needs the archive, which keeps their items
+DIGEST_SESSIONS = True
+
+# Items get_related_context returns by default
+RELATED_ITEMS = 3
+
+# How get_related_context ranks items: "bm25" (shared words) or "semantic"
+# (hashed TF-IDF vectors that also match paraphrases, see
+# tasks/context/vectors.py; needs NumPy, falls back to "bm25" without it)
+RETRIEVAL = "bm25"
+
+# BM25 term frequency saturation and length normalisation
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Share of an item's relevance that fades with age, and the number of items
+# added after it that halve that share
+RECENCY_WEIGHT = 0.5
+RECENCY_HALF_LIFE = 200
+
+# Seconds the background writer waits after a change before writing it, so
+# that a burst of changes is written together
+WRITE_DELAY = 0.25
+
+
+# Words of a text, keeping contractions ("what's") in one piece
+TOKEN = re.compile(r"\w+(?:'\w+)*")
+
+
+def item_terms(context_item):
+    """Return term -> count for a context item: its words, topics and type"""
+    tf = {}
+    for term in TOKEN.findall(context_item["text"].lower()):
+        tf[term] = tf.get(term, 0) + 1
+    for term in context_item.get("topics", ()):
+        term = term.lower()
+        tf[term] = tf.get(term, 0) + 1
+    item_type = context_item.get("type")
+    if item_type:
+        tf[item_type] = tf.get(item_type, 0) + 1
+    return tf
+
+
+def bm25_idf(n, df):
+    """Inverse document frequency of a term found in df of n items"""
+    return math.log(1 + (n - df + 0.5) / (df + 0.5))
+
+
+def bm25(tf, length, idf, avgdl):
+    """BM25 score of an item with term counts tf and length for the query terms in idf"""
+    norm = BM25_K1 * (1 - BM25_B + BM25_B * length / avgdl)
+    score = 0.0
+    for term, weight in idf.items():
+        count = tf.get(term)
+        if count:
+            score += weight * count * (BM25_K1 + 1) / (count + norm)
+    return score
+
+
+def recency(age):
+    """Factor for an item with age newer items after it: 1 for the newest, down to 1 - RECENCY_WEIGHT"""
+    return 1 - RECENCY_WEIGHT + RECENCY_WEIGHT * 0.5 ** (age / RECENCY_HALF_LIFE)
+
+
+def journal_path(path):
+    """Return the journal file that goes with the snapshot at path"""
+    return os.path.splitext(path)[0] + ".journal.jsonl"
+
+
+def _read_snapshot(path):
+    """Return (items, journal_seq) from a snapshot; older files hold just the list"""
+    if not os.path.exists(path):
+        return [], 0
+    with open(path, 'r') as f:
+        snapshot = json.load(f)
+    if isinstance(snapshot, list):
+        return snapshot, 0
+    return snapshot["items"], snapshot["journal_seq"]
+
+
+def _read_journal(path):
+    """Yield (seq, item) for every complete line of a journal"""
+    if not os.path.exists(path):
+        return
+    with open(path, 'r', encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue  # A line cut short by a crash
+            yield entry["seq"], entry["item"]
+
+
+def _write_temp(path, data, sync):
+    """Write data as JSON next to path and return the temporary file's name"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=directory or ".", prefix=os.path.basename(path) + ".", suffix=".tmp")
+    with os.fdopen(fd, 'w') as f:
+        json.dump(data, f)
+        f.flush()
+        if sync:
+            os.fsync(f.fileno())
+    return temp_path
+
+
+def read_history(path=CONTEXT_FILE):
+    """Return every item saved at path (snapshot plus journal), oldest first"""
+    items, seq = _read_snapshot(path)
+    items = list(items)
+    for line_seq, item in _read_journal(journal_path(path)):
+        if line_seq > seq:
+            items.append(item)
+    return items
+
+
+class ContextStore:
+    """
+    The context history of one conversation, persisted to disk
+
+    The module-level functions below work on the store that is active for
+    the calling thread (see use_context); by default that is the store
+    backed by CONTEXT_FILE.
+
+    Every item added is appended to a journal next to the snapshot file
+    (context_history.journal.jsonl for context_history.json), one JSON line
+    {"seq": n, "item": ...} each, so saving costs the same however long the
+    history is.  Once the journal has grown past COMPACT_AFTER lines (or
+    past the length of the history, if that is longer) a background thread
+    writes the whole history to the snapshot as
+    {"journal_seq": n, "items": [...]} and drops the journal lines it now
+    covers.  Loading reads the snapshot and replays the journal lines with a
+    higher seq, so a crash at any point of a compaction loses nothing and
+    replays nothing twice.
+
+    Items pushed out of the history are not lost: they are spilled into a
+    SQLite archive (see tasks/context/archive.py) in batches, and related()
+    searches the archive when the history has too few matches.
+
+    Loading also condenses every session but the last one into a digest
+    item (see tasks/context/sessions.py): their items go to the archive and
+    the snapshot is rewritten with the digests, so later loads, lookups and
+    the chatbot go through far fewer items.  Nothing is loaded when the
+    store is created: main.py, the batch runner and the daemon call load()
+    (initialize_context()) when a session starts.  Items added to a store
+    that was never loaded are still journaled after the saved ones, but
+    such a store never compacts, as its history is not the whole of it.
+
+    Items are kept as ContextItem records (see tasks/context/items.py) and
+    converted to their JSON form only when they are written.
+
+    Alongside the history the store keeps an inverted index with the
+    statistics BM25 needs, updated as items are added and evicted, so that
+    related() only looks at the items that share a term with the query:
+
+      entries    sequence number -> (term frequencies, length, type)
+      postings   term -> sequence numbers of the items containing it; the
+                 document frequency of the term is its size
+      by_type    context type -> the items of that type, oldest first; a
+                 ring buffer per type that drops its first item when the
+                 history evicts it
+
+    The terms of an item are the words of its text plus its topics and its
+    type.  Items are numbered in insertion order; the oldest item still in
+    the history has number self._first.
+    """
+
+    def __init__(self, path=CONTEXT_FILE, maxlen=MAX_CONTEXT_SIZE, fsync=FSYNC_POLICY, compact_after=COMPACT_AFTER,
+                 archive=True, writer=None, retrieval=RETRIEVAL, digest_sessions=DIGEST_SESSIONS):
+        """
+        archive:         True for the archive next to path, a ContextArchive, or False for none
+        writer:          the ContextWriter that saves the store (default: context_writer)
+        retrieval:       "bm25" or "semantic", how related() ranks items
+        digest_sessions: whether load() condenses closed sessions into digests
+        """
+        if fsync not in ("always", "interval", "never"):
+            raise ValueError(f"Unknown fsync policy: {fsync} (use always, interval or never)")
+        if retrieval not in ("bm25", "semantic"):
+            raise ValueError(f"Unknown retrieval: {retrieval} (use bm25 or semantic)")
+        self.path = path
+        self.journal_path = journal_path(path)
+        self.history = deque(maxlen=maxlen)
+        self.fsync = fsync
+        self.compact_after = compact_after
+        # Guards the history and index when commands run on several threads
+        self.lock = threading.RLock()
+        # Held while the journal, snapshot and archive are written; always
+        # taken before lock
+        self._io_lock = threading.Lock()
+        self.writer = writer or context_writer
+        self.vectors = None
+        if retrieval == "semantic":
+            # Imported here so that the default BM25 store never loads NumPy
+            from tasks.context import vectors
+
+            if vectors.available():
+                self.vectors = vectors.HashedVectors(maxlen, half_life=RECENCY_HALF_LIFE)
+            else:
+                print("NumPy is not installed; ranking related context with BM25", file=sys.stderr)
+        self._reset_index()
+        self._journal = None
+        # seq of the newest journal line, and lines in the journal file
+        self._journal_seq = 0
+        self._journal_lines = 0
+        # Items added with save=False, written with the next one saved
+        self._pending = []
+        self._last_fsync = 0.0
+        self._compaction = None
+        # Bumped by load() and clear() so that a compaction started before
+        # them does not overwrite what they wrote
+        self._generation = 0
+        # Whether the history holds what is saved (load() or clear() ran),
+        # and whether _journal_seq continues the saved journal
+        self._loaded = self._attached = False
+        if archive is True:
+            archive = ContextArchive(archive_path(path))
+        self.archive = archive or None
+        self.digest_sessions = digest_sessions
+        # (journal seq, item) evicted but not archived yet
+        self._spilled = []
+
+    def _reset_index(self):
+        self._first = 0
+        self._entries = {}
+        self._postings = {}
+        self._by_type = {}
+        self._total_length = 0
+        if self.vectors is not None:
+            self.vectors.clear()
+
+    def _index(self, context_item):
+        """Add an item to the index, evicting the oldest one if the history is full"""
+        seq = self._first + len(self.history)
+        if self.history.maxlen is not None and len(self.history) == self.history.maxlen:
+            self._unindex(self._first)
+            self._first += 1
+            if self.archive is not None:
+                self._spill(self.history[0])
+        tf = item_terms(context_item)
+        length = sum(tf.values())
+        item_type = context_item.type
+        self._entries[seq] = (tf, length, item_type)
+        self._total_length += length
+        for term in tf:
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = set()
+            postings.add(seq)
+        self._by_type.setdefault(item_type, deque()).append(context_item)
+        if self.vectors is not None:
+            self.vectors.add(seq, tf)
+
+    def _unindex(self, seq):
+        tf, length, item_type = self._entries.pop(seq)
+        self._total_length -= length
+        for term in tf:
+            postings = self._postings[term]
+            postings.discard(seq)
+            if not postings:
+                del self._postings[term]
+        # Only the oldest item is ever removed, so it is the first of its type too
+        self._by_type[item_type].popleft()
+        if self.vectors is not None:
+            self.vectors.remove(seq)
+
+    def load(self):
+        """Load previous context (snapshot plus journal) if there is any and mark a new session"""
+        with self._io_lock, self.lock:
+            self.history.clear()
+            self._reset_index()
+            self._close_journal()
+            self._pending = []
+            self._spilled = []
+            self._generation += 1
+            self._journal_seq = self._journal_lines = 0
+            self._loaded = self._attached = True
+            if os.path.exists(self.path) or os.path.exists(self.journal_path):
+                try:
+                    items, self._journal_seq = _read_snapshot(self.path)
+                    # The snapshot holds the items up to and including journal_seq
+                    saved_context = [(self._journal_seq - len(items) + 1 + i, item) for i, item in enumerate(items)]
+                    for seq, item in _read_journal(self.journal_path):
+                        self._journal_lines += 1
+                        if seq > self._journal_seq:
+                            saved_context.append((seq, item))
+                            self._journal_seq = seq
+                    # Every session in the file is closed now that a new one starts
+                    if self.digest_sessions and self.archive is not None:
+                        saved_context = self._condense_sessions(saved_context)
+                    keep = len(saved_context) if self.history.maxlen is None else self.history.maxlen
+                    dropped = saved_context[:-keep] if keep else saved_context
+                    self.extend(item for _, item in saved_context[len(dropped):])
+                    if dropped and self.archive is not None:
+                        # Normally archived already; the archive ignores repeats
+                        self._spilled = [(seq, as_item(item)) for seq, item in dropped]
+                        self._flush_archive()
+                    # stderr, so that batch results on stdout stay valid JSONL
+                    print(f"Loaded {len(self.history)} context items from previous sessions", file=sys.stderr)
+                except Exception as e:
+                    print(f"Error loading context: {e}")
+                    self.history.clear()
+                    self._reset_index()
+
+            # Add session start marker
+            self.append(ContextItem(sessions.SESSION_START, "system"), save=False)
+
+    def _condense_sessions(self, saved_context):
+        """
+        Replace the closed sessions among (seq, item) pairs with digests (locks held)
+
+        Their items go to the archive and the digests to the snapshot, so
+        the next load reads the digests only.
+        """
+        condensed, raw, records = sessions.condense(saved_context, classify=_intent_classifier)
+        if not raw:
+            return saved_context
         try:
-            with open(CONTEXT_FILE, 'r') as f:
-                saved_context = json.load(f)
-                # Convert to deque with maxlen
-                context_history = deque(saved_context[-MAX_CONTEXT_SIZE:], maxlen=MAX_CONTEXT_SIZE)
-            print(f"Loaded {len(context_history)} context items from previous sessions")
+            self.archive.add(raw)
+            self.archive.add_sessions(records)
+            temp_path = _write_temp(self.path, {"journal_seq": self._journal_seq,
+                                                "items": [item.to_dict() for _, item in condensed]},
+                                    self.fsync != "never")
+            os.replace(temp_path, self.path)
+            # Every line is in the snapshot now
+            if os.path.exists(self.journal_path):
+                os.remove(self.journal_path)
+            self._journal_lines = 0
         except Exception as e:
-            print(f"Error loading context: {e}")
-            context_history = deque(maxlen=MAX_CONTEXT_SIZE)
-    else:
-        context_history = deque(maxlen=MAX_CONTEXT_SIZE)
-    
-    # Add session start marker
-    timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    context_history.append({"text": f"New session started", "timestamp": timestamp, "type": "system"})
+            print(f"Error condensing context sessions: {e}", file=sys.stderr)
+            return saved_context
+        print(f"Condensed {len(raw)} context items into {len(records)} session digests", file=sys.stderr)
+        return condensed
+
+    def save(self, wait=False):
+        """
+        Have every item added so far written to disk
+
+        By default the store is handed to the background writer, which
+        writes it within WRITE_DELAY seconds together with everything added
+        until then.  With wait=True it is written and synced before save
+        returns.
+        """
+        if wait:
+            self.flush()
+        else:
+            self.writer.request(self)
+
+    def flush(self):
+        """Write and sync everything that is pending in the calling thread"""
+        self._write(sync=True)
+
+    def _attach(self):
+        """Continue the numbering of the saved journal in a store that was not loaded (lock held)"""
+        self._attached = True
+        try:
+            _, self._journal_seq = _read_snapshot(self.path)
+            for seq, _ in _read_journal(self.journal_path):
+                self._journal_lines += 1
+                self._journal_seq = max(self._journal_seq, seq)
+        except Exception as e:
+            print(f"Error reading context: {e}", file=sys.stderr)
+
+    def append(self, context_item, save=True):
+        """Add a context item (a ContextItem or its JSON form) and hand it to the writer for the journal"""
+        context_item = as_item(context_item)
+        with self.lock:
+            if not self._attached:
+                self._attach()
+            self._index(context_item)
+            self.history.append(context_item)
+            self._pending.append(context_item)
+        if save:
+            self.writer.request(self)
+
+    def _spill(self, context_item):
+        """Queue an evicted item for the archive (lock held, history still full)"""
+        # Items in the history carry consecutive journal numbers ending with
+        # those the pending items will get
+        seq = self._journal_seq + len(self._pending) - len(self.history) + 1
+        self._spilled.append((seq, context_item))
+
+    def _write(self, sync=False):
+        """
+        Append the pending items to the journal and archive evicted ones
+
+        Runs on the writer thread (or in flush).  The lock is only held to
+        take the pending items and number them, so commands adding context
+        meanwhile never wait for the disk; _io_lock keeps the writes in
+        order.  The archive gets ARCHIVE_BATCH items at a time, or all of
+        them when syncing.
+        """
+        with self._io_lock:
+            with self.lock:
+                lines = []
+                for context_item in self._pending:
+                    self._journal_seq += 1
+                    lines.append(json.dumps({"seq": self._journal_seq, "item": context_item.to_dict()}) + "\n")
+                self._pending = []
+            try:
+                if lines:
+                    if self._journal is None:
+                        directory = os.path.dirname(self.journal_path)
+                        if directory:
+                            os.makedirs(directory, exist_ok=True)
+                        self._journal = open(self.journal_path, 'ab')
+                    self._journal.write("".join(lines).encode())
+                    self._journal_lines += len(lines)
+                if self._journal is not None:
+                    self._journal.flush()
+                    now = time.monotonic()
+                    if self.fsync == "always" or (self.fsync == "interval" and (
+                            sync or now - self._last_fsync >= FSYNC_INTERVAL)):
+                        os.fsync(self._journal.fileno())
+                        self._last_fsync = now
+            except Exception as e:
+                print(f"Error saving context: {e}")
+            if sync or len(self._spilled) >= ARCHIVE_BATCH:
+                self._flush_archive()
+            self._maybe_compact()
+
+    def _flush_archive(self):
+        """Move the evicted items to the archive (_io_lock held)"""
+        with self.lock:
+            batch = list(self._spilled)
+        if not batch:
+            return
+        try:
+            self.archive.add(batch)
+        except Exception as e:
+            print(f"Error archiving context: {e}", file=sys.stderr)
+            return
+        with self.lock:
+            # Items evicted meanwhile stay queued
+            del self._spilled[:len(batch)]
+
+    def _close_journal(self):
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+
+    def _maybe_compact(self):
+        """Fold the journal into the snapshot on a background thread once it is long enough (_io_lock held)"""
+        if not self._loaded or self._journal is None:
+            return
+        if self._journal_lines < max(self.compact_after, len(self.history)):
+            return
+        if self._compaction is not None and self._compaction.is_alive():
+            return
+        # The snapshot will no longer hold the evicted items
+        self._flush_archive()
+        with self.lock:
+            # Items still pending are newer than the journal, so not in the snapshot
+            items = list(self.history)[:max(0, len(self.history) - len(self._pending))]
+            args = (items, self._journal_seq, self._journal.tell(), self._generation)
+        self._compaction = threading.Thread(target=self._compact, name="context-compaction", daemon=True, args=args)
+        self._compaction.start()
+
+    def _compact(self, items, seq, offset, generation):
+        """Write items (the history as of journal line seq, which ends at offset) to the snapshot"""
+        try:
+            temp_path = _write_temp(self.path, {"journal_seq": seq, "items": [item.to_dict() for item in items]},
+                                    self.fsync != "never")
+            with self._io_lock:
+                if generation != self._generation:
+                    os.remove(temp_path)
+                    return
+                os.replace(temp_path, self.path)
+
+                # Keep only the lines added while the snapshot was written
+                self._journal.flush()
+                with open(self.journal_path, 'rb') as f:
+                    f.seek(offset)
+                    tail = f.read()
+                fd, journal_temp = tempfile.mkstemp(dir=os.path.dirname(self.journal_path) or ".",
+                                                    prefix=os.path.basename(self.journal_path) + ".",
+                                                    suffix=".tmp")
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(tail)
+                    f.flush()
+                    if self.fsync != "never":
+                        os.fsync(f.fileno())
+                self._close_journal()
+                os.replace(journal_temp, self.journal_path)
+                self._journal = open(self.journal_path, 'ab')
+                self._journal_lines = tail.count(b"\n")
+        except Exception as e:
+            print(f"Error compacting context: {e}", file=sys.stderr)
+
+    def extend(self, context_items):
+        """Add several context items (ContextItems or their JSON form) without saving"""
+        with self.lock:
+            if not self._attached:
+                self._attach()
+            for context_item in map(as_item, context_items):
+                self._index(context_item)
+                self.history.append(context_item)
+
+    def items(self):
+        """Return a snapshot of the context items, oldest first"""
+        with self.lock:
+            return list(self.history)
+
+    def recent(self, limit, context_type=None):
+        """Return the last limit items (of context_type, if given), oldest first, without copying the rest"""
+        with self.lock:
+            source = self.history if context_type is None else self._by_type.get(context_type, ())
+            items = list(itertools.islice(reversed(source), max(limit, 0)))
+        items.reverse()
+        return items
+
+    def clear(self):
+        """Forget every item and save the empty history"""
+        with self._io_lock, self.lock:
+            self.history.clear()
+            self._reset_index()
+            self._pending = []
+            self._spilled = []
+            self._generation += 1
+            self._loaded = self._attached = True
+            try:
+                if self.archive is not None:
+                    self.archive.clear()
+                temp_path = _write_temp(self.path, {"journal_seq": self._journal_seq, "items": []},
+                                        self.fsync != "never")
+                os.replace(temp_path, self.path)
+                self._close_journal()
+                if os.path.exists(self.journal_path):
+                    os.remove(self.journal_path)
+                self._journal_lines = 0
+            except Exception as e:
+                print(f"Error saving context: {e}")
+
+    def related(self, query, max_items=RELATED_ITEMS):
+        """
+        Return the texts of the items most related to query, best first
+
+        With the "bm25" retrieval items are ranked by BM25 over their terms
+        (see item_terms); with "semantic" by the cosine similarity of their
+        hashed TF-IDF vectors (see tasks/context/vectors.py), which also
+        matches other forms of a word ("mail" and "email").  Either score is
+        multiplied by a recency factor that decays exponentially with the
+        number of items added since (see recency).  Items scoring nothing
+        are left out.  Evicted items waiting for the archive are scored with
+        the statistics of the items in memory and merged in; archived items
+        too, but only if fewer than max_items match so far, so the archive
+        costs nothing while the history answers the query.
+        """
+        terms = list(dict.fromkeys(TOKEN.findall(query.lower())))
+        if not terms:
+            return []
+
+        with self.lock:
+            # Journal numbers of evicted items count on from the history's
+            newest_journal = self._journal_seq + len(self._pending)
+            if self.vectors is None:
+                ranked, score = self._rank_bm25(terms, max_items, newest_journal)
+            else:
+                ranked, score = self._rank_semantic(query, max_items, newest_journal)
+            for seq, context_item in self._spilled:
+                ranked.append((score(seq, context_item), seq - newest_journal, context_item.text))
+
+        if self.archive is not None and sum(value > 0 for value, _, _ in ranked) < max_items:
+            try:
+                ranked += [(value, seq - newest_journal, text)
+                           for value, seq, text in self.archive.search(terms, score, max_items)]
+            except Exception as e:
+                print(f"Error searching the context archive: {e}", file=sys.stderr)
+
+        # Newer items win ties
+        return [text for value, _, text in heapq.nlargest(max_items, ranked) if value > 0]
+
+    def _rank_bm25(self, terms, max_items, newest_journal):
+        """Return the best items in memory as (score, -age, text), and the score of an evicted item (lock held)"""
+        n = len(self._entries)
+        avgdl = self._total_length / n if n else 1.0
+        idf = {term: bm25_idf(n, len(self._postings.get(term, ()))) for term in terms}
 
-def save_context():
-    """Save context to persistent storage"""
+        # Top k with MaxScore pruning: terms are visited rarest first, and
+        # once the k best so far beat the most an item with none of the
+        # terms visited could score, the commoner terms are not scanned
+        order = sorted(terms, key=lambda term: len(self._postings.get(term, ())))
+        bounds = [idf[term] * (BM25_K1 + 1) for term in order]
+        remaining = sum(bounds)
+        newest = self._first + len(self.history) - 1
+        top = []
+        seen = set()
+        # bm25() and recency() inlined: this loop sees every candidate
+        k1_plus_1 = BM25_K1 + 1
+        norm_base = BM25_K1 * (1 - BM25_B)
+        norm_per_term = BM25_K1 * BM25_B / avgdl
+        for i, (term, bound) in enumerate(zip(order, bounds)):
+            if len(top) == max_items and remaining <= top[0][0]:
+                break
+            # Items seen first now contain none of the rarer terms
+            weights = [(other, idf[other]) for other in order[i:]]
+            for seq in self._postings.get(term, ()):
+                if seq in seen:
+                    continue
+                seen.add(seq)
+                tf, length, _ = self._entries[seq]
+                norm = norm_base + norm_per_term * length
+                value = 0.0
+                for other, weight in weights:
+                    count = tf.get(other)
+                    if count:
+                        value += weight * count * k1_plus_1 / (count + norm)
+                value *= 1 - RECENCY_WEIGHT + RECENCY_WEIGHT * 0.5 ** ((newest - seq) / RECENCY_HALF_LIFE)
+                entry = (value, seq - newest, seq)
+                if len(top) < max_items:
+                    heapq.heappush(top, entry)
+                elif entry > top[0]:
+                    heapq.heapreplace(top, entry)
+            remaining -= bound
+        ranked = [(value, newer, self.history[seq - self._first].text) for value, newer, seq in top]
+
+        def score(seq, context_item):
+            tf = item_terms(context_item)
+            return bm25(tf, sum(tf.values()), idf, avgdl) * recency(newest_journal - seq)
+
+        return ranked, score
+
+    def _rank_semantic(self, query, max_items, newest_journal):
+        """Like _rank_bm25, by the similarity of hashed TF-IDF vectors (lock held)"""
+        from tasks.context.vectors import MIN_SIMILARITY
+
+        query_terms = {}
+        for term in TOKEN.findall(query.lower()) + detect_context_topics(query):
+            query_terms[term] = query_terms.get(term, 0) + 1
+        vector = self.vectors.query(query_terms)
+        if vector is None:
+            return [], lambda seq, context_item: 0.0
+
+        newest = self._first + len(self.history) - 1
+        top = self.vectors.top(vector, max_items, RECENCY_WEIGHT)
+        ranked = [(value, seq - newest, self.history[seq - self._first].text) for value, seq in top]
+
+        def score(seq, context_item):
+            similarity = self.vectors.similarity(vector, item_terms(context_item))
+            return similarity * recency(newest_journal - seq) if similarity >= MIN_SIMILARITY else 0.0
+
+        return ranked, score
+
+
+class ContextWriter:
+    """
+    Saves context stores on a background thread
+
+    save_context() and update_context() only hand the store over, so a
+    slow disk never holds up a command.  A store is written WRITE_DELAY
+    seconds after its first unsaved change, together with every change made
+    by then, so a burst of updates costs one write.  flush() writes every
+    waiting store straight away; it runs when the interpreter exits,
+    including after Ctrl+C.
+
+    Journal lines are appended and the snapshot and journal are replaced
+    via a temporary file and a rename, so a crash mid-write loses at most
+    the changes not written yet.
+    """
+
+    def __init__(self, delay=WRITE_DELAY):
+        self.delay = delay
+        self._cond = threading.Condition()
+        # store -> when its oldest unsaved change was handed over
+        self._due = {}
+        self._thread = None
+        self.requests = 0
+        self.writes = 0
+        self.max_queue_depth = 0
+        # Seconds from hand-over until the write starts, and writing
+        self.wait_seconds = Histogram()
+        self.write_seconds = Histogram()
+
+    def request(self, store):
+        """Have store written within self.delay seconds"""
+        with self._cond:
+            self.requests += 1
+            self._due.setdefault(store, time.monotonic())
+            self.max_queue_depth = max(self.max_queue_depth, self._queue_depth())
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="context-writer", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def _queue_depth(self):
+        return sum(len(store._pending) for store in self._due)
+
+    def queue_depth(self):
+        """Context items added but not handed to the disk yet"""
+        with self._cond:
+            return self._queue_depth()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while True:
+                    if not self._due:
+                        self._cond.wait()
+                        continue
+                    store, since = min(self._due.items(), key=lambda entry: entry[1])
+                    remaining = since + self.delay - time.monotonic()
+                    if remaining <= 0:
+                        del self._due[store]
+                        break
+                    self._cond.wait(remaining)
+            start = time.monotonic()
+            store._write()
+            with self._cond:
+                self.writes += 1
+                self.wait_seconds.observe(start - since)
+                self.write_seconds.observe(time.monotonic() - start)
+
+    def flush(self):
+        """Write and sync every store with unsaved changes in the calling thread"""
+        with self._cond:
+            stores = list(self._due)
+            self._due.clear()
+        for store in stores:
+            store.flush()
+
+    def stats(self):
+        """Return the writer's counters and latency summaries"""
+        with self._cond:
+            return {
+                "requests": self.requests,
+                "writes": self.writes,
+                "queue_depth": self._queue_depth(),
+                "max_queue_depth": self.max_queue_depth,
+                "waiting_stores": len(self._due),
+                "wait": self.wait_seconds.summary(),
+                "write": self.write_seconds.summary(),
+            }
+
+    def format_stats(self):
+        stats = self.stats()
+
+        def ms(value):
+            return f"{value * 1000:.1f}" if value is not None else "-"
+
+        return (f"context writer: {stats['requests']} saves in {stats['writes']} writes, "
+                f"queue depth {stats['queue_depth']} (max {stats['max_queue_depth']}), "
+                f"write p50/p95 {ms(stats['write']['p50'])}/{ms(stats['write']['p95'])} ms, "
+                f"wait p95 {ms(stats['wait']['p95'])} ms")
+
+
+# Writes every store in the background; anything still waiting is written at exit
+context_writer = ContextWriter()
+atexit.register(context_writer.flush)
+
+# Store used when no other store is active
+_default_store = ContextStore(CONTEXT_FILE)
+
+# In-memory context storage of the default store
+context_history = _default_store.history
+
+# Store the current thread (or task) is working with, if not the default
+_active_store = contextvars.ContextVar("active_context_store", default=None)
+
+
+def current_store():
+    """Return the context store the calling code should use"""
+    return _active_store.get() or _default_store
+
+
+@contextmanager
+def use_context(store):
+    """Make store the active context store inside the with block"""
+    token = _active_store.set(store)
     try:
-        with open(CONTEXT_FILE, 'w') as f:
-            json.dump(list(context_history), f)
-    except Exception as e:
-        print(f"Error saving context: {e}")
+        yield store
+    finally:
+        _active_store.reset(token)
+
+
+def initialize_context():
+    """Start a session: load previous context if available, condensing closed sessions"""
+    current_store().load()
+
+def save_context(wait=False):
+    """Save context to persistent storage, in the background unless wait is set"""
+    current_store().save(wait)
 
 def update_context(text, context_type="general"):
     """
@@ -52,34 +830,19 @@ def update_context(text, context_type="general"):
         text (str): The text to add to context
         context_type (str): Type of context - can be 'user', 'system', 'email', 'task', etc.
     """
-    timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    
-    # Create context item with metadata
-    context_item = {
-        "text": text,
-        "timestamp": timestamp,
-        "type": context_type
-    }
-    
     # Determine additional metadata based on content
     if "user:" in text.lower():
-        context_item["type"] = "user_input"
+        context_type = "user_input"
     elif "assistant response:" in text.lower():
-        context_item["type"] = "assistant_response"
+        context_type = "assistant_response"
     elif "error" in text.lower():
-        context_item["type"] = "error"
+        context_type = "error"
     
-    # Detect topics in the text
-    topics = detect_context_topics(text)
-    if topics:
-        context_item["topics"] = topics
+    # Create context item with metadata and the topics detected in the text
+    context_item = ContextItem(text, context_type, detect_context_topics(text))
     
-    # Add to history
-    context_history.append(context_item)
-    
-    # Save periodically (every 10 items)
-    if len(context_history) % 10 == 0:
-        save_context()
+    # Add to history (the background writer appends it to the journal)
+    current_store().append(context_item)
 
 def get_context(limit=5, context_type=None):
     """
@@ -92,13 +855,9 @@ def get_context(limit=5, context_type=None):
     Returns:
         list: List of context texts (not the full objects)
     """
-    if context_type:
-        filtered = [item["text"] for item in list(context_history) if item["type"] == context_type]
-        return filtered[-limit:]
-    else:
-        return [item["text"] for item in list(context_history)][-limit:]
+    return [item.text for item in current_store().recent(limit, context_type or None)]
 
-def get_related_context(query, max_items=5):
+def get_related_context(query, max_items=RELATED_ITEMS):
     """
     Find context related to the query
     
@@ -107,56 +866,144 @@ def get_related_context(query, max_items=5):
         max_items (int): Maximum number of items to return
         
     Returns:
-        list: List of related context texts
+        list: List of related context texts, best match first
     """
-    # Convert query to lowercase for case-insensitive matching
-    query_lower = query.lower()
-    
-    # Get query words for matching (ignore common words)
-    stopwords = ["the", "a", "an", "in", "on", "at", "to", "for", "with", "by", "of", "and", "or"]
-    query_words = [w for w in query_lower.split() if w not in stopwords and len(w) > 2]
-    
-    # Find relevant items based on text content
-    scores = []
-    for i, item in enumerate(context_history):
-        item_text = item["text"].lower()
-        
-        # Calculate relevance score
-        score = 0
-        
-        # Exact phrase matching
-        if query_lower in item_text:
-            score += 10
-        
-        # Word matching
-        for word in query_words:
-            if word in item_text:
-                score += 2
-                
-                # Bonus for word appearing in topics
-                if "topics" in item and word in [t.lower() for t in item["topics"]]:
-                    score += 3
-        
-        # Context type matching
-        if query_lower in item.get("type", ""):
-            score += 5
-        
-        # Recent items get a small boost
-        recency_boost = max(0, 1 - (len(context_history) - i) / len(context_history))
-        score += recency_boost
-        
-        if score > 0:
-            scores.append((score, item["text"]))
-    
-    # Sort by score and return text
-    scores.sort(reverse=True)
-    return [text for _, text in scores[:max_items]]
+    return current_store().related(query, max_items)
 
 def clear_context():
     """Clear the context history"""
-    global context_history
-    context_history.clear()
-    save_context()
+    current_store().clear()
+
+# Topics detect_context_topics looks for: each is a list of lowercase
+# phrases, any of which may appear anywhere in the text.  Task modules can
+# add their own with register_topics().
+TOPIC_KEYWORDS = {
+    "email": "email|gmail|message|send|recipient|subject|body",
+    "weather": "weather|temperature|forecast|rain|sunny|cloud",
+    "task": "task|todo|to do|to-do|reminder|complete",
+    "event": "event|calendar|meeting|appointment|schedule",
+    "file": "file|document|folder|directory|search file|rename|move",
+    "note": "note|memo|write down|remember",
+    "search": "search|google|find information|look up",
+    "password": "password|secure|login|credential",
+    "translate": "translate|language|english|spanish|french",
+    "pdf": "pdf|document|merge|extract|rotate",
+    "preference": "prefer|like|want|don't want|choose",
+}
+
+
+class TopicDetector:
+    """
+    Find every topic mentioned in a text in a single scan
+
+    The phrases of the topics are compiled into one trie regex
+    (tasks.utils.trie_regex, as larry.intents does for intents) that is run
+    over the text once.  A hit is the longest phrase starting at that position and stands
+    for every topic with a phrase inside it, so phrases shared by two topics
+    ("document") or nested in each other ("search" in "search file") all
+    count.  The scan goes on after the hit, or from the first position
+    inside it where a longer phrase could start ("t" of "document" for
+    "task"), and stops early once every topic is found.  The topics of the
+    text are the union of its hits.
+
+    Topics come back in the order they were defined, as they did with one
+    re.search per topic.
+    """
+
+    def __init__(self, topics=TOPIC_KEYWORDS):
+        self._topics = {}
+        self._lock = threading.Lock()
+        self.register(topics)
+
+    def register(self, topics):
+        """
+        Add topics, or more phrases to existing ones, and recompile
+
+        Args:
+            topics (dict): topic name -> "phrase|phrase|..." or a list of phrases
+        """
+        with self._lock:
+            for name, phrases in topics.items():
+                if isinstance(phrases, str):
+                    phrases = phrases.split("|")
+                known = self._topics.setdefault(name, [])
+                known.extend(p.lower() for p in phrases if p and p.lower() not in known)
+            # Swapped in one go, so detect() never sees half of a new table
+            self._table = self._compile(self._topics) + ({name: i for i, name in enumerate(self._topics)},)
+
+    @staticmethod
+    def _compile(topics):
+        """
+        Return (regex, hits) for the given topic -> phrases; the regex is
+        None if there are none.  hits maps each phrase to (its topics, where
+        in it to resume the scan).
+        """
+        phrase_topics = {}
+        for name, phrases in topics.items():
+            for phrase in phrases:
+                phrase_topics.setdefault(phrase, set()).add(name)
+        if not phrase_topics:
+            return None, {}
+
+        hits = {}
+        for phrase in phrase_topics:
+            names = set()
+            resume = len(phrase)
+            for other, other_names in phrase_topics.items():
+                if other in phrase:
+                    names |= other_names
+                # other may start inside phrase and run past its end
+                for i in range(1, min(resume, len(phrase))):
+                    if len(other) > len(phrase) - i and other.startswith(phrase[i:]):
+                        resume = i
+                        break
+            hits[phrase] = (frozenset(names), resume)
+        return re.compile(trie_regex(phrase_topics)), hits
+
+    def detect(self, text):
+        """Return the topics mentioned in text, in definition order"""
+        regex, hits, rank = self._table
+        if regex is None:
+            return []
+        lowered = text.lower()
+        search = regex.search
+        found = set()
+        m = search(lowered)
+        while m is not None:
+            names, resume = hits[m.group()]
+            found |= names
+            if len(found) == len(rank):
+                break  # Every topic found
+            m = search(lowered, m.start() + resume)
+        return sorted(found, key=rank.__getitem__)
+
+
+# Shared detector behind detect_context_topics
+topic_detector = TopicDetector()
+
+
+# Names the intent of a user input in session digests; set by Larry
+_intent_classifier = None
+
+
+def register_intent_classifier(classify):
+    """
+    Let session digests count the intents of what the user said
+
+        register_intent_classifier(lambda text: match_intent(text)[0])
+    """
+    global _intent_classifier
+    _intent_classifier = classify
+
+
+def register_topics(topics):
+    """
+    Let a task module teach the context manager about its own topics
+
+        register_topics({"music": "song|playlist|album|artist"})
+    """
+    topic_detector.register(topics)
+
 
 def detect_context_topics(text):
     """
@@ -168,30 +1015,4 @@ def detect_context_topics(text):
     Returns:
         list: List of detected topics
     """
-    topics = []
-    
-    # Topic detection patterns
-    topic_patterns = {
-        "email": r"email|gmail|message|send|recipient|subject|body",
-        "weather": r"weather|temperature|forecast|rain|sunny|cloud",
-        "task": r"task|todo|to do|to-do|reminder|complete",
-        "event": r"event|calendar|meeting|appointment|schedule",
-        "file": r"file|document|folder|directory|search file|rename|move",
-        "note": r"note|memo|write down|remember",
-        "search": r"search|google|find information|look up",
-        "password": r"password|secure|login|credential",
-        "translate": r"translate|language|english|spanish|french",
-        "pdf": r"pdf|document|merge|extract|rotate",
-        "preference": r"prefer|like|want|don't want|choose"
-    }
-    
-    # Check for matches
-    text_lower = text.lower()
-    for topic_name, pattern in topic_patterns.items():
-        if re.search(pattern, text_lower):
-            topics.append(topic_name)
-    
-    return topics
-
-# Initialize context when module is imported
-initialize_context()
\ No newline at end of file
+    return topic_detector.detect(text)
@@ -0,0 +1,159 @@
+# tasks/context/items.py
+"""
+Compact records for context items.
+
+A context item used to be a dict such as
+
+    {"text": "User: what's the weather", "timestamp": "2024-05-01 09:30:00",
+     "type": "user_input", "topics": ["weather"]}
+
+which costs several hundred bytes once loaded from JSON: the dict itself, a
+19-character timestamp string, and fresh copies of the type and topic
+strings for every item.  ContextItem keeps the same information in four
+slots:
+
+  text      UTF-8 bytes, decoded when read
+  created   seconds since the epoch, or None if unknown
+  type_id   number of the type in TYPES
+  topic_ids tuple of numbers in TOPICS, shared by every item with the same
+            topics
+
+Items still read like the old dicts (item["text"], item.get("topics")), and
+to_dict() / from_dict() convert at the persistence boundary, so the journal,
+snapshot and archive keep their JSON format.
+"""
+import datetime
+import threading
+import time
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+class SymbolTable:
+    """Numbers strings that repeat across items (types, topics) so each is stored once"""
+
+    def __init__(self):
+        self._names = []
+        self._ids = {}
+        self._lock = threading.Lock()
+
+    def id(self, name):
+        """Return the number of name, adding it if it is new"""
+        number = self._ids.get(name)
+        if number is None:
+            with self._lock:
+                number = self._ids.get(name)
+                if number is None:
+                    number = len(self._names)
+                    self._names.append(name)
+                    self._ids[name] = number
+        return number
+
+    def name(self, number):
+        return self._names[number]
+
+    def __len__(self):
+        return len(self._names)
+
+
+# Context types and topics seen so far
+TYPES = SymbolTable()
+TOPICS = SymbolTable()
+
+# One tuple per combination of topics, shared by the items that have it
+_topic_sets = {(): ()}
+
+
+def _topic_ids(topics):
+    ids = tuple(TOPICS.id(topic) for topic in topics)
+    return _topic_sets.setdefault(ids, ids)
+
+
+def parse_timestamp(timestamp):
+    """Return the epoch seconds of a "%Y-%m-%d %H:%M:%S" local time, or None"""
+    try:
+        return int(datetime.datetime.fromisoformat(timestamp).timestamp())
+    except (TypeError, ValueError):
+        return None
+
+
+def format_timestamp(created):
+    """Return epoch seconds as a "%Y-%m-%d %H:%M:%S" local time"""
+    return time.strftime(TIMESTAMP_FORMAT, time.localtime(created))
+
+
+class ContextItem:
+    """One entry of the context history"""
+
+    __slots__ = ("_text", "created", "type_id", "topic_ids")
+
+    KEYS = ("text", "timestamp", "type", "topics")
+
+    def __init__(self, text, context_type="general", topics=(), created=None):
+        self._text = text.encode()
+        self.created = int(time.time()) if created is None else int(created)
+        self.type_id = TYPES.id(context_type)
+        self.topic_ids = _topic_ids(topics)
+
+    @classmethod
+    def from_dict(cls, data):
+        """Build an item from its JSON form; items missing a timestamp keep none"""
+        item = cls.__new__(cls)
+        item._text = data["text"].encode()
+        item.created = parse_timestamp(data.get("timestamp"))
+        item.type_id = TYPES.id(data.get("type", "general"))
+        item.topic_ids = _topic_ids(data.get("topics", ()))
+        return item
+
+    def to_dict(self):
+        """Return the item in the JSON form of the journal, snapshot and archive"""
+        data = {"text": self.text}
+        if self.created is not None:
+            data["timestamp"] = self.timestamp
+        data["type"] = self.type
+        if self.topic_ids:
+            data["topics"] = self.topics
+        return data
+
+    @property
+    def text(self):
+        return self._text.decode()
+
+    @property
+    def timestamp(self):
+        return None if self.created is None else format_timestamp(self.created)
+
+    @property
+    def type(self):
+        return TYPES.name(self.type_id)
+
+    @property
+    def topics(self):
+        return [TOPICS.name(number) for number in self.topic_ids]
+
+    # Read access in the style of the dicts items used to be
+
+    def __contains__(self, key):
+        if key == "topics":
+            return bool(self.topic_ids)
+        if key == "timestamp":
+            return self.created is not None
+        return key in self.KEYS
+
+    def __getitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key, default=None):
+        return getattr(self, key) if key in self else default
+
+    def __repr__(self):
+        return f"ContextItem({self.to_dict()!r})"
+
+
+def as_item(context_item):
+    """Return context_item as a ContextItem, converting it from its JSON form if needed"""
+    if isinstance(context_item, ContextItem):
+        return context_item
+    return ContextItem.from_dict(context_item)
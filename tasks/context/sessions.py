@@ -0,0 +1,166 @@
+# tasks/context/sessions.py
+"""
+Session digests for the context history.
+
+Every run of Larry starts its part of the history with "New session
+started", followed by boilerplate such as "Session started", "Input mode
+selected: text", both "User: track expense" and "track expense", and the
+"Expense tracker initiated" status a handler records before it runs.  Only a
+few items of a session say what actually happened.
+
+Once a session is closed (a later one has started), condense() replaces it
+with a single digest item of type "session_digest":
+
+    Session 2025-05-01 02:07-02:11 | intents: expense_tracker x6 |
+    done: Added expense: 36 for vending; Added expense: 60 for shake |
+    said: track expense x6 | 31 items
+
+The intents are those the classifier given to condense() finds for the
+inputs (Larry registers larry.intents.match_intent with
+register_intent_classifier in tasks/context/context_manager.py); "done"
+lists the items recording what was done (the entities touched), "said" what
+the user typed.  System items, the status messages handlers record before
+they run ("... initiated"), assistant responses and the second copy of every
+input are dropped.  The raw items and a JSON record of each digest go to the
+context archive (see tasks/context/archive.py), so nothing is lost.
+"""
+from collections import Counter
+
+from tasks.context.items import ContextItem, as_item
+
+# Text of the item ContextStore.load() starts every session with
+SESSION_START = "New session started"
+
+# Type of the items that stand for a condensed session
+DIGEST_TYPE = "session_digest"
+
+# Closed sessions, the most recent ones, kept as they are
+KEEP_RAW_SESSIONS = 1
+
+# Items listed under "done" and "said" in a digest's text
+MAX_LISTED = 12
+
+# Types of items that carry no information of their own
+BOILERPLATE_TYPES = frozenset(("system", "assistant_response"))
+
+# Ending of the status messages handlers record before they run (the
+# started messages in larry/handlers.py)
+STATUS_SUFFIX = " initiated"
+
+USER_PREFIX = "User: "
+
+
+def split_sessions(entries):
+    """Split (seq, item) pairs into sessions, each starting with a SESSION_START item"""
+    sessions = []
+    for entry in entries:
+        if not sessions or (entry[1].text == SESSION_START and entry[1].type == "system"):
+            sessions.append([])
+        sessions[-1].append(entry)
+    return sessions
+
+
+def _counted(counts):
+    return [f"{name} x{count}" if count > 1 else name for name, count in counts.most_common()]
+
+
+def _truncated(texts):
+    shown = "; ".join(texts[:MAX_LISTED])
+    return shown + (f"; +{len(texts) - MAX_LISTED} more" if len(texts) > MAX_LISTED else "")
+
+
+def digest(session, classify=None):
+    """
+    Condense one session's (seq, ContextItem) pairs
+
+    classify(text) returns the intent of something the user said; without
+    it the digest lists no intents.
+
+    Returns (digest item, record) or None if the session holds nothing but
+    boilerplate.  The record is the JSON form of the digest kept in the
+    archive.
+    """
+    intents = Counter()
+    said = Counter()
+    done = []
+    types = Counter()
+    topics = []
+    previous_input = None
+    for _, item in session:
+        text = item.text
+        types[item.type] += 1
+        for topic in item.topics:
+            if topic not in topics:
+                topics.append(topic)
+        if item.type == "user_input":
+            said_text = text[len(USER_PREFIX):] if text.startswith(USER_PREFIX) else text
+            # The REPL records every input twice, with and without "User: "
+            if said_text != previous_input:
+                said[said_text] += 1
+                if classify is not None:
+                    intents[classify(said_text)] += 1
+            previous_input = said_text
+            continue
+        if item.type not in BOILERPLATE_TYPES and not text.endswith(STATUS_SUFFIX) and text not in done:
+            done.append(text)
+        previous_input = None
+
+    if not (intents or said or done):
+        return None
+    timestamps = [item.timestamp for _, item in session if item.created is not None]
+    start, end = (timestamps[0], timestamps[-1]) if timestamps else (None, None)
+    parts = ["Session " + (f"{start[:16]}-{end[11:16]}" if start else "of unknown date")]
+    if intents:
+        parts.append("intents: " + ", ".join(_counted(intents)))
+    if done:
+        parts.append("done: " + _truncated(done))
+    if said:
+        parts.append("said: " + _truncated(_counted(said)))
+    parts.append(f"{len(session)} items")
+
+    item = ContextItem(" | ".join(parts), DIGEST_TYPE, topics, created=session[0][1].created)
+    record = {
+        "first_seq": session[0][0],
+        "last_seq": session[-1][0],
+        "start": start,
+        "end": end,
+        "items": len(session),
+        "intents": dict(intents),
+        "done": done,
+        "said": dict(said),
+        "types": dict(types),
+        "text": item.text,
+    }
+    return item, record
+
+
+def condense(entries, keep=KEEP_RAW_SESSIONS, classify=None):
+    """
+    Replace the closed sessions of a history with digests
+
+    entries are (seq, item) pairs, oldest first, all of them from closed
+    sessions.  The last keep sessions, and digests made earlier, stay as
+    they are.  classify is passed on to digest().
+
+    Returns (entries, raw, records): the new (seq, item) pairs, the (seq,
+    item) pairs that were condensed and the records of the new digests.
+    """
+    entries = [(seq, as_item(item)) for seq, item in entries]
+    sessions = split_sessions(entries)
+    cut = max(len(sessions) - keep, 0)
+    condensed, raw, records = [], [], []
+    for session in sessions[:cut]:
+        kept = [entry for entry in session if entry[1].type == DIGEST_TYPE]
+        rest = [entry for entry in session if entry[1].type != DIGEST_TYPE]
+        condensed += kept
+        if not rest:
+            continue
+        raw += rest
+        result = digest(rest, classify)
+        if result is not None:
+            item, record = result
+            condensed.append((rest[-1][0], item))
+            records.append(record)
+    for session in sessions[cut:]:
+        condensed += session
+    return condensed, raw, records
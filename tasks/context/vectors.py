@@ -0,0 +1,234 @@
+# tasks/context/vectors.py
+"""
+Hashed TF-IDF vectors for semantic context retrieval.
+
+Word matching misses paraphrases: "mail my boss" shares no word with "Sent
+email to boss@example.com".  HashedVectors embeds every context item without
+a model or a vocabulary, using the hashing trick:
+
+  * each word adds itself and its character trigrams ("<ma", "mai", "ail",
+    "il>" for "mail"), so "mail" and "email" or "send" and "sent" overlap;
+  * the item's topics and type count as words;
+  * every feature is hashed with crc32 into one of DIMENSIONS buckets with
+    a sign, so collisions cancel out rather than add up.
+
+Item vectors are L2-normalised term frequencies, stored as the columns of a
+float32 matrix of DIMENSIONS rows and one column per history slot.  The
+matrix grows in chunks up to the history length and is then reused as a
+ring: an evicted item's column is zeroed and taken by the next one.  The
+number of items with each feature (its document frequency) is kept up to
+date as items come and go, and weights the query by inverse document
+frequency.
+
+A query is cut down to its QUERY_FEATURES heaviest features and scored
+against every item at once as the product of its weights with those
+features' rows of the matrix: a matrix-vector product over a few rows,
+however many dimensions there are.  The recency factor of every item is
+kept up to date as items are added, so weighting all the scores by age
+costs two vector operations.
+
+Needs NumPy; without it, available() is False and the context store ranks
+with BM25 only.  Memory is DIMENSIONS * 4 bytes per item (2 KB by default).
+"""
+import math
+import zlib
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Hash buckets; more means fewer collisions and more memory per item
+DIMENSIONS = 512
+
+# Columns the matrix grows by until it holds the whole history
+GROWTH = 1024
+
+# Weight of a word's trigrams, all together, next to the word itself
+TRIGRAM_WEIGHT = 1.0
+
+# Query features used, the ones weighing most; every feature costs a pass
+# over one row of the matrix
+QUERY_FEATURES = 10
+
+# Cosine similarity below which an item is not considered related
+MIN_SIMILARITY = 0.1
+
+# Items with the same similarity as the newest one halve in recency weight
+# every half_life items; the factors are kept as 2 ** ((seq - base) /
+# half_life) and rescaled once that exponent passes REBASE
+DEFAULT_HALF_LIFE = 200
+REBASE = 64
+
+# Words whose features are remembered
+WORD_CACHE_SIZE = 50000
+
+
+def available():
+    """Whether NumPy, and so semantic retrieval, can be used"""
+    return np is not None
+
+
+class HashedVectors:
+    """Hashed TF-IDF vectors of the items of a context history, one column per slot"""
+
+    def __init__(self, capacity=None, dimensions=DIMENSIONS, half_life=DEFAULT_HALF_LIFE):
+        """
+        capacity:  items kept at once (the history length), or None for no limit
+        half_life: items after which the recency weight of an item halves (see top)
+        """
+        if np is None:
+            raise ImportError("Semantic context retrieval needs NumPy: pip install numpy")
+        if dimensions & (dimensions - 1):
+            raise ValueError(f"dimensions must be a power of two, not {dimensions}")
+        self.capacity = capacity
+        self.dimensions = dimensions
+        self.half_life = half_life
+        self._words = {}
+        self.clear()
+
+    def clear(self):
+        self.matrix = np.zeros((self.dimensions, 0), dtype=np.float32)
+        # Slot -> sequence number of its item, -1 if empty
+        self.seqs = np.full(0, -1, dtype=np.int64)
+        # Slot -> 2 ** ((seq - _base) / half_life) of its item
+        self.growth = np.zeros(0, dtype=np.float32)
+        self._base = self._newest = 0
+        # Buffers for top()
+        self._scores = self._row = None
+        self.df = np.zeros(self.dimensions, dtype=np.int64)
+        # Slot -> (feature indices, values) of its item
+        self._features = {}
+
+    def __len__(self):
+        return len(self._features)
+
+    def _slot(self, seq):
+        return seq if self.capacity is None else seq % self.capacity
+
+    def _word_features(self, word):
+        """Return (buckets, signed weights) for a word and its trigrams"""
+        features = self._words.get(word)
+        if features is None:
+            padded = f"<{word}>"
+            trigrams = [padded[i:i + 3] for i in range(len(padded) - 2)]
+            parts = [(word, 1.0)] + [(trigram, TRIGRAM_WEIGHT / len(trigrams)) for trigram in trigrams]
+            hashes = [zlib.crc32(feature.encode()) for feature, _ in parts]
+            features = (np.array([h & (self.dimensions - 1) for h in hashes], dtype=np.intp),
+                        np.array([weight if h & 0x80000000 else -weight
+                                  for h, (_, weight) in zip(hashes, parts)], dtype=np.float64))
+            if len(self._words) >= WORD_CACHE_SIZE:
+                self._words.clear()
+            self._words[word] = features
+        return features
+
+    def vectorize(self, terms):
+        """Return (bucket indices, values) of the L2-normalised vector of term -> count, or None if empty"""
+        buckets, weights = [], []
+        for word, count in terms.items():
+            word_buckets, word_weights = self._word_features(word)
+            buckets.append(word_buckets)
+            weights.append(word_weights * count if count != 1 else word_weights)
+        if not buckets:
+            return None
+        dense = np.bincount(np.concatenate(buckets), np.concatenate(weights), minlength=self.dimensions)
+        indices = dense.nonzero()[0]
+        if not len(indices):
+            return None
+        values = dense[indices]
+        values /= math.sqrt(values @ values)
+        return indices, values.astype(np.float32)
+
+    def add(self, seq, terms):
+        """Store the vector of terms as item seq"""
+        slot = self._slot(seq)
+        if slot >= self.matrix.shape[1]:
+            grow = max(GROWTH, slot + 1 - self.matrix.shape[1])
+            if self.capacity is not None:
+                grow = min(grow, self.capacity - self.matrix.shape[1])
+            self.matrix = np.concatenate([self.matrix, np.zeros((self.dimensions, grow), dtype=np.float32)], axis=1)
+            self.seqs = np.concatenate([self.seqs, np.full(grow, -1, dtype=np.int64)])
+            self.growth = np.concatenate([self.growth, np.zeros(grow, dtype=np.float32)])
+        elif slot in self._features:
+            self.remove(int(self.seqs[slot]))
+        vector = self.vectorize(terms)
+        self.seqs[slot] = seq
+        self._newest = max(self._newest, seq)
+        if (seq - self._base) / self.half_life > REBASE:
+            self.growth *= np.float32(2.0 ** ((self._base - seq) / self.half_life))
+            self._base = seq
+        self.growth[slot] = 2.0 ** ((seq - self._base) / self.half_life)
+        if vector is None:
+            return
+        indices, values = vector
+        # Through a view of the column, which is much faster than matrix[indices, slot]
+        self.matrix[:, slot][indices] = values
+        self.df[indices] += 1
+        self._features[slot] = vector
+
+    def remove(self, seq):
+        """Forget item seq"""
+        slot = self._slot(seq)
+        self.seqs[slot] = -1
+        vector = self._features.pop(slot, None)
+        if vector is not None:
+            indices, _ = vector
+            self.matrix[:, slot][indices] = 0.0
+            self.df[indices] -= 1
+
+    def query(self, terms):
+        """Return the query vector of terms, weighted by inverse document frequency, or None"""
+        vector = self.vectorize(terms)
+        if vector is None:
+            return None
+        indices, values = vector
+        n = len(self._features)
+        weighted = values * (np.log((1 + n) / (1 + self.df[indices])) + 1).astype(np.float32)
+        if len(weighted) > QUERY_FEATURES:
+            keep = np.argpartition(np.abs(weighted), -QUERY_FEATURES)[-QUERY_FEATURES:]
+            indices, weighted = indices[keep], weighted[keep]
+        return indices, weighted / np.linalg.norm(weighted)
+
+    def similarity(self, query, terms):
+        """Cosine similarity of a query vector with the vector of terms (an item not stored here)"""
+        vector = self.vectorize(terms)
+        if vector is None:
+            return 0.0
+        dense = np.zeros(self.dimensions, dtype=np.float32)
+        dense[vector[0]] = vector[1]
+        return float(query[1] @ dense[query[0]])
+
+    def top(self, query, max_items, recency_weight=0.0):
+        """
+        Return (score, seq) of the max_items items most similar to query, best first
+
+        Similarities below MIN_SIMILARITY do not count.  The rest are
+        multiplied by 1 - recency_weight + recency_weight * 0.5 ** (age /
+        half_life), age being the number of items added after the item.
+        """
+        indices, values = query
+        columns = self.matrix.shape[1]
+        if not columns or max_items <= 0:
+            return []
+        # The product of the query's rows of the matrix with its weights,
+        # accumulated a row at a time in buffers kept between queries: no
+        # copy of the rows, and no new arrays of the history's length
+        if self._scores is None or len(self._scores) != columns:
+            self._scores = np.empty(columns, dtype=np.float32)
+            self._row = np.empty(columns, dtype=np.float32)
+        scores, row = self._scores, self._row
+        np.multiply(self.matrix[indices[0]], values[0], out=scores)
+        for index, value in zip(indices[1:], values[1:]):
+            np.multiply(self.matrix[index], value, out=row)
+            scores += row
+        slots = np.flatnonzero(scores >= MIN_SIMILARITY)
+        scores = scores[slots]
+        if recency_weight:
+            scale = recency_weight * 2.0 ** ((self._base - self._newest) / self.half_life)
+            scores *= (1 - recency_weight) + np.float32(scale) * self.growth[slots]
+        if max_items < len(scores):
+            best = np.argpartition(scores, -max_items)[-max_items:]
+        else:
+            best = np.arange(len(scores))
+        best = best[np.argsort(-scores[best], kind="stable")]
+        return [(float(scores[i]), int(self.seqs[slots[i]])) for i in best]
@@ -8,8 +8,13 @@ class ExpenseManager:
     def __init__(self):
         self.db = ExpenseDatabase()
     
-    def add_expense(self, amount, category=None, description=None, date=None):
-        """Add a new expense."""
+    def add_expense(self, amount, category=None, description=None, date=None, create_category=None, read=input):
+        """Add a new expense.
+
+        An unknown category is created if create_category is True and
+        rejected if it is False; when it is None the user is asked, with
+        read (called with the prompt).
+        """
         # Validate amount
         try:
             amount = float(amount)
@@ -28,9 +33,9 @@ class ExpenseManager:
                 print(f"{i}. {cat}")
             
             try:
-                choice = int(input("Select category (number) or enter 0 to create new: "))
+                choice = int(read("Select category (number) or enter 0 to create new: "))
                 if choice == 0:
-                    category = input("Enter new category name: ")
+                    category = read("Enter new category name: ")
                     self.db.add_category(category)
                 else:
                     category = categories[choice - 1]
@@ -39,8 +44,9 @@ class ExpenseManager:
         else:
             # Validate the provided category
             if category not in categories:
-                create_new = input(f"Category '{category}' doesn't exist. Create it? (y/n): ")
-                if create_new.lower() == 'y':
+                if create_category is None:
+                    create_category = read(f"Category '{category}' doesn't exist. Create it? (y/n): ").lower() == 'y'
+                if create_category:
                     self.db.add_category(category)
                 else:
                     return False, "Invalid category."
@@ -63,7 +69,7 @@ class ExpenseManager:
         
         if not expenses:
             print("No expenses found matching your criteria.")
-            return
+            return []
         
         # Format for tabulate
         headers = ["ID", "Date", "Category", "Amount", "Description"]
@@ -83,6 +89,7 @@ class ExpenseManager:
         # Display total
         total = sum(expense["amount"] for expense in expenses)
         print(f"\nTotal: ${total:.2f}")
+        return expenses
     
     def delete_expense(self, expense_id):
         """Delete an expense by ID."""
@@ -12,6 +12,7 @@ class MusicController:
     def __init__(self):
         # Create database for music library if it doesn't exist
         self.db_path = os.path.join(os.path.dirname(__file__), "music_library.db")
+        self.conn = None
         self.initialize_db()
         self.current_playlist = []
         self.current_song = None
@@ -20,9 +21,16 @@ class MusicController:
         self.repeat_mode = "off"  # off, song, playlist
         self.shuffle_mode = False
 
+    def _connect(self):
+        """Return the controller's SQLite connection, opening it on first use"""
+        if self.conn is None:
+            self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            self.conn.row_factory = sqlite3.Row
+        return self.conn
+
     def initialize_db(self):
         """Initialize the music database"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
         cursor = conn.cursor()
         
         # Create songs table
@@ -65,13 +73,12 @@ class MusicController:
         ''')
         
         conn.commit()
-        conn.close()
 
     def add_song(self, title: str, artist: str, album: str = None, 
                  genre: str = None, path: str = None, duration: int = 0) -> Tuple[bool, str]:
         """Add a song to the music library"""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._connect()
             cursor = conn.cursor()
             
             # Check if song already exists
@@ -79,7 +86,6 @@ class MusicController:
             existing = cursor.fetchone()
             
             if existing:
-                conn.close()
                 return False, f"Song '{title}' by {artist} already exists in the library"
             
             # Add new song
@@ -90,7 +96,6 @@ class MusicController:
             
             conn.commit()
             song_id = cursor.lastrowid
-            conn.close()
             
             return True, f"Added '{title}' by {artist} to the music library (ID: {song_id})"
         except Exception as e:
@@ -99,8 +104,7 @@ class MusicController:
     def search_songs(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
         """Search for songs in the music library"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            conn.row_factory = sqlite3.Row
+            conn = self._connect()
             cursor = conn.cursor()
             
             # Search in title, artist, album, and genre
@@ -113,7 +117,6 @@ class MusicController:
             )
             
             results = [dict(row) for row in cursor.fetchall()]
-            conn.close()
             
             return results
         except Exception as e:
@@ -123,7 +126,7 @@ class MusicController:
     def create_playlist(self, name: str) -> Tuple[bool, str]:
         """Create a new playlist"""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._connect()
             cursor = conn.cursor()
             
             # Check if playlist already exists
@@ -131,7 +134,6 @@ class MusicController:
             existing = cursor.fetchone()
             
             if existing:
-                conn.close()
                 return False, f"Playlist '{name}' already exists"
             
             # Create new playlist
@@ -142,7 +144,6 @@ class MusicController:
             
             conn.commit()
             playlist_id = cursor.lastrowid
-            conn.close()
             
             return True, f"Created playlist '{name}' (ID: {playlist_id})"
         except Exception as e:
@@ -151,7 +152,7 @@ class MusicController:
     def add_song_to_playlist(self, playlist_name: str, song_id: int) -> Tuple[bool, str]:
         """Add a song to a playlist"""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._connect()
             cursor = conn.cursor()
             
             # Get playlist ID
@@ -159,7 +160,6 @@ class MusicController:
             playlist_result = cursor.fetchone()
             
             if not playlist_result:
-                conn.close()
                 return False, f"Playlist '{playlist_name}' not found"
             
             playlist_id = playlist_result[0]
@@ -169,7 +169,6 @@ class MusicController:
             song_result = cursor.fetchone()
             
             if not song_result:
-                conn.close()
                 return False, f"Song with ID {song_id} not found"
             
             song_title, song_artist = song_result
@@ -181,7 +180,6 @@ class MusicController:
             )
             
             if cursor.fetchone():
-                conn.close()
                 return False, f"Song '{song_title}' is already in playlist '{playlist_name}'"
             
             # Get the next position in the playlist
@@ -204,7 +202,6 @@ class MusicController:
             )
             
             conn.commit()
-            conn.close()
             
             return True, f"Added '{song_title}' by {song_artist} to playlist '{playlist_name}'"
         except Exception as e:
@@ -213,8 +210,7 @@ class MusicController:
     def list_playlists(self) -> List[Dict[str, Any]]:
         """List all playlists"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            conn.row_factory = sqlite3.Row
+            conn = self._connect()
             cursor = conn.cursor()
             
             cursor.execute(
@@ -227,7 +223,6 @@ class MusicController:
             )
             
             playlists = [dict(row) for row in cursor.fetchall()]
-            conn.close()
             
             return playlists
         except Exception as e:
@@ -237,8 +232,7 @@ class MusicController:
     def get_playlist_songs(self, playlist_name: str) -> List[Dict[str, Any]]:
         """Get all songs in a playlist"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            conn.row_factory = sqlite3.Row
+            conn = self._connect()
             cursor = conn.cursor()
             
             cursor.execute(
@@ -252,7 +246,6 @@ class MusicController:
             )
             
             songs = [dict(row) for row in cursor.fetchall()]
-            conn.close()
             
             return songs
         except Exception as e:
@@ -262,7 +255,7 @@ class MusicController:
     def play_song(self, song_id: int) -> Tuple[bool, str]:
         """Play a specific song (simulation)"""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._connect()
             cursor = conn.cursor()
             
             # Get song details
@@ -270,7 +263,6 @@ class MusicController:
             song = cursor.fetchone()
             
             if not song:
-                conn.close()
                 return False, f"Song with ID {song_id} not found"
             
             song_id, title, artist, path = song
@@ -282,7 +274,6 @@ class MusicController:
             )
             
             conn.commit()
-            conn.close()
             
             # In a real implementation, this would start the actual music playback
             self.current_song = {"id": song_id, "title": title, "artist": artist, "path": path}
@@ -462,8 +453,7 @@ class MusicController:
     def get_top_songs(self, limit: int = 10) -> List[Dict[str, Any]]:
         """Get top played songs"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            conn.row_factory = sqlite3.Row
+            conn = self._connect()
             cursor = conn.cursor()
             
             cursor.execute(
@@ -475,7 +465,6 @@ class MusicController:
             )
             
             top_songs = [dict(row) for row in cursor.fetchall()]
-            conn.close()
             
             return top_songs
         except Exception as e:
@@ -485,8 +474,7 @@ class MusicController:
     def get_recently_played(self, limit: int = 10) -> List[Dict[str, Any]]:
         """Get recently played songs"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            conn.row_factory = sqlite3.Row
+            conn = self._connect()
             cursor = conn.cursor()
             
             cursor.execute(
@@ -499,7 +487,6 @@ class MusicController:
             )
             
             recent_songs = [dict(row) for row in cursor.fetchall()]
-            conn.close()
             
             return recent_songs
         except Exception as e:
@@ -512,7 +499,7 @@ class MusicController:
             return False, "Rating must be between 1 and 5"
         
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._connect()
             cursor = conn.cursor()
             
             # Check if song exists
@@ -520,7 +507,6 @@ class MusicController:
             song_result = cursor.fetchone()
             
             if not song_result:
-                conn.close()
                 return False, f"Song with ID {song_id} not found"
             
             song_title, song_artist = song_result
@@ -532,7 +518,6 @@ class MusicController:
             )
             
             conn.commit()
-            conn.close()
             
             return True, f"Rated '{song_title}' by {song_artist} with {rating} stars"
         except Exception as e:
@@ -541,15 +526,13 @@ class MusicController:
     def get_song_info(self, song_id: int) -> Dict[str, Any]:
         """Get detailed information about a song"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            conn.row_factory = sqlite3.Row
+            conn = self._connect()
             cursor = conn.cursor()
             
             cursor.execute("SELECT * FROM songs WHERE id = ?", (song_id,))
             song = cursor.fetchone()
             
             if not song:
-                conn.close()
                 return {}
             
             song_dict = dict(song)
@@ -566,7 +549,6 @@ class MusicController:
             playlists = [row[0] for row in cursor.fetchall()]
             song_dict["playlists"] = playlists
             
-            conn.close()
             return song_dict
         except Exception as e:
             print(f"Error getting song info: {e}")
@@ -602,7 +584,7 @@ class MusicController:
     def delete_playlist(self, playlist_name: str) -> Tuple[bool, str]:
         """Delete a playlist"""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._connect()
             cursor = conn.cursor()
             
             # Check if playlist exists
@@ -610,7 +592,6 @@ class MusicController:
             playlist = cursor.fetchone()
             
             if not playlist:
-                conn.close()
                 return False, f"Playlist '{playlist_name}' not found"
             
             playlist_id = playlist[0]
@@ -619,7 +600,6 @@ class MusicController:
             cursor.execute("DELETE FROM playlists WHERE id = ?", (playlist_id,))
             
             conn.commit()
-            conn.close()
             
             return True, f"Deleted playlist '{playlist_name}'"
         except Exception as e:
@@ -628,7 +608,7 @@ class MusicController:
     def remove_song_from_playlist(self, playlist_name: str, song_id: int) -> Tuple[bool, str]:
         """Remove a song from a playlist"""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._connect()
             cursor = conn.cursor()
             
             # Get playlist ID
@@ -636,7 +616,6 @@ class MusicController:
             playlist_result = cursor.fetchone()
             
             if not playlist_result:
-                conn.close()
                 return False, f"Playlist '{playlist_name}' not found"
             
             playlist_id = playlist_result[0]
@@ -646,7 +625,6 @@ class MusicController:
             song_result = cursor.fetchone()
             
             if not song_result:
-                conn.close()
                 return False, f"Song with ID {song_id} not found"
             
             song_title, song_artist = song_result
@@ -659,7 +637,6 @@ class MusicController:
             
             entry = cursor.fetchone()
             if not entry:
-                conn.close()
                 return False, f"Song '{song_title}' is not in playlist '{playlist_name}'"
             
             entry_id, position = entry
@@ -683,7 +660,6 @@ class MusicController:
             )
             
             conn.commit()
-            conn.close()
             
             return True, f"Removed '{song_title}' by {song_artist} from playlist '{playlist_name}'"
         except Exception as e:
@@ -738,6 +714,9 @@ class MusicController:
         # This would close any open audio streams in a real implementation
         self.is_playing = False
         self.current_song = None
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
         print("Music controller resources released")
 
 
@@ -748,11 +727,9 @@ def initialize_music_controller():
     controller = MusicController()
     
     # Check if we have any songs
-    conn = sqlite3.connect(controller.db_path)
-    cursor = conn.cursor()
+    cursor = controller._connect().cursor()
     cursor.execute("SELECT COUNT(*) FROM songs")
     song_count = cursor.fetchone()[0]
-    conn.close()
     
     if song_count == 0:
         print("Adding sample music to the library...")
@@ -14,7 +14,7 @@ class ScreenTimeDatabase:
         
         # Connect to database
         self.db_path = os.path.join(db_dir, "screen_time.db")
-        self.conn = sqlite3.connect(self.db_path)
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
         self.conn.row_factory = sqlite3.Row  # Return rows as dictionaries
         self.cursor = self.conn.cursor()
         
@@ -16,7 +16,7 @@ class ScreenTimeTracker:
         
         # Connect to database
         self.db_path = os.path.join(db_dir, "screen_time.db")
-        self.conn = sqlite3.connect(self.db_path)
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
         self.cursor = self.conn.cursor()
         
         # Initialize database if not already set up
@@ -135,6 +135,27 @@ def add_password(master_password, service, username, password=None):
     
     return success
 
+def lookup_passwords(master_password, service=None):
+    """
+    Return stored credentials without prompting
+
+    Args:
+        master_password (str): The master password
+        service (str, optional): Only return entries for this service
+
+    Returns:
+        dict: {service: {username: password}}, or None if the vault can't be opened
+    """
+    passwords = _load_passwords(master_password)
+    
+    if passwords is None:
+        return None
+    
+    if service is None:
+        return passwords
+    
+    return {service: passwords[service]} if service in passwords else {}
+
 def get_password(master_password, service=None):
     """Retrieve stored passwords"""
     passwords = _load_passwords(master_password)
@@ -191,28 +212,32 @@ def get_password(master_password, service=None):
         print(f"No passwords found for {service}")
         return False
 
-def initialize_password_manager():
-    """Set up the password manager with a master password"""
+def initialize_password_manager(master_password=None, read_secret=getpass.getpass):
+    """Set up the password manager with a master password (asked for with read_secret if not given)"""
     if os.path.exists(PASSWORD_FILE):
         print("Password manager already initialized.")
         return True
     
+    if master_password is not None and len(master_password) < 8:
+        print("Master password must be at least 8 characters long")
+        return False
+    
     print("\n=== Password Manager Setup ===")
     print("Create a master password to secure your passwords.")
     print("WARNING: If you forget this password, you cannot recover your stored passwords!")
     
-    while True:
-        master_password = getpass.getpass("Create master password: ")
+    while master_password is None:
+        master_password = read_secret("Create master password: ")
         if len(master_password) < 8:
             print("Master password must be at least 8 characters long")
+            master_password = None
             continue
         
-        confirm = getpass.getpass("Confirm master password: ")
+        confirm = read_secret("Confirm master password: ")
         if master_password != confirm:
             print("Passwords don't match! Try again.")
+            master_password = None
             continue
-        
-        break
     
     # Initialize empty password vault
     success = _save_passwords({}, master_password)
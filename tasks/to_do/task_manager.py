@@ -33,6 +33,7 @@ def get_tasks():
         for i, task in enumerate(tasks, 1):
             status = "Done" if task["done"] else "Pending"
             print(f"{i}. {task['task']} - {status}")
+    return tasks
 
 # Mark a task as done
 def mark_done(task_index):
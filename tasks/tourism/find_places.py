@@ -22,9 +22,13 @@ def find_places(city_name):
     if data['status'] == 'OK':
         # List the top 5 tourist places
         print(f"Top tourist attractions in {city_name}:")
+        places = []
         for place in data['results'][:5]:
             name = place['name']
             address = place.get('formatted_address', 'Address not available')
             print(f"- {name}: {address}")
+            places.append((name, address))
+        return places
     else:
         print("No results found or error occurred. Please check the city name and try again.")
+        return []
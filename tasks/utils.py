@@ -0,0 +1,70 @@
+# tasks/utils.py
+"""
+Helpers shared by the task modules and larry/.
+
+trie_regex() compiles many keywords into one regex (intent dispatch, topic
+detection, chatbot rules); Histogram keeps latency statistics (per-intent
+metrics, the context writer).
+"""
+import bisect
+import re
+from collections import deque
+
+# Upper bounds (seconds) of the histogram buckets, Prometheus style
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def trie_regex(words):
+    """Build a regex source matching any of the words, factored as a trie"""
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node):
+        if "" in node and len(node) == 1:
+            return ""
+        branches = [re.escape(char) + build(child)
+                    for char, child in sorted(node.items()) if char]
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        # A word ends here but longer words continue: make the rest optional
+        return f"(?:{body})?" if "" in node else body
+
+    return build(trie)
+
+
+class Histogram:
+    """Bucketed counts for export plus a window of recent values for percentiles"""
+
+    def __init__(self, buckets=BUCKETS, window=2048):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.recent = deque(maxlen=window)
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.recent.append(value)
+
+    def percentile(self, q):
+        """Return the q-th percentile (0-100) of the recent values, or None"""
+        if not self.recent:
+            return None
+        values = sorted(self.recent)
+        return values[min(len(values) - 1, int(q / 100 * len(values)))]
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "mean": self.sum / self.count if self.count else None,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+            "buckets": dict(zip([str(b) for b in self.buckets] + ["+Inf"], self.counts)),
+        }
@@ -1,6 +1,6 @@
 # tasks/voice/speech.py
-import pyttsx3
-import speech_recognition as sr
+# pyttsx3 and speech_recognition are imported inside the functions that use
+# them so that importing this module (done at startup) stays cheap.
 import threading
 import queue
 
@@ -12,6 +12,7 @@ listening_active = False
 def initialize_speech_engine():
     global speech_engine
     if speech_engine is None:
+        import pyttsx3
         speech_engine = pyttsx3.init()
         # Optional: Configure voice settings
         # voices = speech_engine.getProperty('voices')
@@ -47,6 +48,7 @@ def queue_speech(text):
 
 def listen_for_command():
     """Listen for voice command and convert to text"""
+    import speech_recognition as sr
     recognizer = sr.Recognizer()
     
     try:
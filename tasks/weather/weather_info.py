@@ -8,5 +8,7 @@ def get_weather(city):
     # Check if the response is successful
     if response.status_code == 200:
         print(f"Weather in {city}: {response.text}")
+        return response.text
     else:
         print("Sorry, I couldn't fetch the weather right now. Please try again later.")
+        return None
@@ -2,7 +2,7 @@
 import requests
 import textwrap
 
-def search_wikipedia(query, max_results=5):
+def search_wikipedia(query, max_results=5, choice=None, read=input):
     try:
         # First get search results
         search_url = "https://en.wikipedia.org/w/api.php"
@@ -28,8 +28,9 @@ def search_wikipedia(query, max_results=5):
             for i, result in enumerate(results, 1):
                 print(f"{i}. {result['title']}")
             
-            # Ask which article to view
-            choice = input("\nEnter the number of the article to view (or 0 to cancel): ")
+            # Ask which article to view unless the caller already chose one
+            if choice is None:
+                choice = read("\nEnter the number of the article to view (or 0 to cancel): ")
             
             try:
                 choice = int(choice)
@@ -0,0 +1,92 @@
+# tests/conftest.py
+"""
+Shared test setup.
+
+Tests run with the working directory and HOME in scratch directories, so the
+context history, databases and caches they write never touch the real ones.
+The first scratch directory is set up before any Larry module is imported,
+because some of them resolve paths under HOME at import time.
+"""
+import atexit
+import os
+import shutil
+import sys
+import tempfile
+
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, os.path.join(REPO_ROOT, "benchmarks"))
+
+# Where anything written after a test has finished (e.g. by the context
+# writer at exit) ends up
+_session_dir = tempfile.mkdtemp(prefix="larry-tests-")
+atexit.register(shutil.rmtree, _session_dir, True)
+os.environ["HOME"] = _session_dir
+os.chdir(_session_dir)
+
+
+@pytest.fixture(autouse=True)
+def scratch(tmp_path, monkeypatch):
+    """Run every test in its own empty directory, with HOME pointed there"""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("HOME", str(tmp_path))
+    return tmp_path
+
+
+@pytest.fixture
+def module_dir(tmp_path, monkeypatch):
+    """A directory on sys.path for modules written by the test"""
+    path = tmp_path / "modules"
+    path.mkdir()
+    monkeypatch.syspath_prepend(str(path))
+    return path
+
+
+@pytest.fixture
+def context_store(tmp_path):
+    """A fresh, loaded context store in tmp_path, active for the test's thread"""
+    from tasks.context.context_manager import ContextStore, ContextWriter, use_context
+
+    writer = ContextWriter(delay=0)
+    store = ContextStore(str(tmp_path / "context_history.json"), writer=writer)
+    store.load()
+    with use_context(store):
+        yield store
+    writer.flush()
+
+
+class WordTokenizer:
+    """Stand-in tokenizer with one token per word"""
+
+    model_max_length = 40
+
+    def __call__(self, text, add_special_tokens=True):
+        return {"input_ids": text.split()}
+
+    def decode(self, ids):
+        return " ".join(ids)
+
+    def num_special_tokens_to_add(self):
+        return 2
+
+
+class FirstWordsPipeline:
+    """Stand-in summarization pipeline: a summary is the first max_length words"""
+
+    def __init__(self):
+        self.tokenizer = WordTokenizer()
+        self.calls = []
+
+    def __call__(self, texts, max_length, min_length, **options):
+        self.calls.append(texts)
+        summaries = [{"summary_text": " ".join(text.split()[:max_length])}
+                     for text in ([texts] if isinstance(texts, str) else texts)]
+        return summaries
+
+
+@pytest.fixture
+def first_words():
+    """A FirstWordsPipeline class, for summarizers and generators that load nothing"""
+    return FirstWordsPipeline
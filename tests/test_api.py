@@ -0,0 +1,154 @@
+import pytest
+
+from larry.api import Larry, captured_output
+from larry.forms import FORMS, fill_slots
+from larry.handlers import HANDLERS, Handler, result, utterance_slots
+from larry.intents import match_intent
+from tasks.context.context_manager import get_context
+
+
+def stand_in(name, func, asks=(), started=None):
+    return Handler(name, func, started, None, False, asks)
+
+
+def test_every_intent_and_menu_option_has_a_handler():
+    from larry.handlers import MENUS
+    from larry.intents import INTENT_TABLE
+
+    assert {rule.name for rule in INTENT_TABLE} <= set(HANDLERS)
+    assert all(intent in HANDLERS for menu in MENUS.values() for _, _, intent in menu.options)
+    assert set(FORMS) <= set(HANDLERS)
+
+
+def test_execute_passes_slots_and_names_the_intent(context_store):
+    larry = Larry({"echo": stand_in("echo", lambda text: result(message=text.upper()),
+                                    started=("Echo initiated", "task"))})
+    outcome = larry.execute("echo", text="hi")
+    assert outcome == {"intent": "echo", "ok": True, "message": "HI", "data": {}}
+    assert get_context(1) == ["Echo initiated"]
+
+
+def test_unknown_intents_raise_key_error():
+    with pytest.raises(KeyError):
+        Larry({}).execute("nothing")
+
+
+def test_handler_exceptions_become_failed_results(context_store):
+    def explode():
+        raise RuntimeError("boom")
+
+    outcome = Larry({"explode": stand_in("explode", explode)}).execute("explode")
+    assert not outcome["ok"]
+    assert outcome["data"] == {"error": "boom"}
+    assert get_context(1, "error") == ["Error: boom"]
+
+
+def test_capture_output_keeps_prints_off_stdout(capsys, context_store):
+    def noisy():
+        print("from the task")
+        return result()
+
+    outcome = Larry({"noisy": stand_in("noisy", noisy)}).execute("noisy", capture_output=True)
+    assert outcome["output"] == "from the task\n"
+    assert capsys.readouterr().out == ""
+
+
+def test_captured_output_nests():
+    with captured_output() as outer:
+        print("outer")
+        with captured_output() as inner:
+            print("inner")
+        print("outer again")
+    assert inner.getvalue() == "inner\n"
+    assert outer.getvalue() == "outer\nouter again\n"
+
+
+def test_only_the_readers_a_handler_asks_for_are_passed(context_store):
+    seen = {}
+
+    def asks(**slots):
+        seen.update(slots)
+        return result(message=slots["read"]("question? "))
+
+    larry = Larry({"asks": stand_in("asks", asks, asks=("read",)),
+                   "silent": stand_in("silent", lambda **slots: result(data=sorted(slots)))})
+    assert larry.execute("asks", read=lambda prompt: "answer to " + prompt)["message"] == "answer to question? "
+    assert set(seen) == {"read"}
+    assert larry.execute("silent", read=input)["data"] == {"data": []}
+
+
+@pytest.mark.parametrize("text, slots", [
+    ("play song called Imagine", {"title": "Imagine"}),
+    ("play music by Queen", {"artist": "Queen"}),
+    ("play playlist Rock Classics", {"name": "Rock Classics"}),
+    ("volume UP 10", {"direction": "up", "amount": "10"}),
+    ("cricket score", {"sport": "cricket"}),
+    ("any football match", {"sport": "football"}),
+    ("show events today", {"date": "today"}),
+    ("tell me a joke", {"text": "tell me a joke"}),
+    ("weather in London", {}),
+])
+def test_utterance_slots(text, slots):
+    intent, m = match_intent(text)
+    assert utterance_slots(intent, m, text) == slots
+
+
+def answers(*values):
+    values = list(values)
+    return lambda prompt="": values.pop(0)
+
+
+def test_fill_slots_asks_only_for_missing_slots():
+    slots = fill_slots("reminder", {"minutes": "5"}, read=answers("stretch"), interactive=False)
+    assert slots == {"minutes": "5", "message": "stretch"}
+
+
+def test_fill_slots_converts_answers():
+    slots = fill_slots("create_note", read=answers("Groceries", "milk", "eggs", "END"), interactive=False)
+    assert slots == {"title": "Groceries", "content": "milk\neggs"}
+    slots = fill_slots("summarize", read=answers("one", "two", " "), interactive=False)
+    assert slots == {"text": "one two"}
+    slots = fill_slots("delete_note", read=answers("3", "yes"), interactive=False)
+    assert slots == {"note_id": "3", "confirm": True}
+
+
+def test_fill_slots_formats_prompts_with_earlier_answers():
+    prompts = []
+
+    def read(prompt):
+        prompts.append(prompt)
+        return "7"
+
+    fill_slots("delete_note", read=read, interactive=False)
+    assert prompts[1] == "Are you sure you want to delete note 7? (yes/no): "
+
+
+def test_running_out_of_answers_blanks_optional_slots_only():
+    from larry.batch import ScriptedAnswers
+
+    slots = fill_slots("password_generate", read=ScriptedAnswers(["24"]), interactive=False)
+    assert slots == {"length": "24", "uppercase": True, "digits": True, "symbols": True}
+    slots = fill_slots("password_get", read_secret=ScriptedAnswers(["secret"]), read=ScriptedAnswers([]),
+                       interactive=False)
+    assert slots == {"master_password": "secret", "service": None}
+
+    with pytest.raises(EOFError):
+        fill_slots("weather", read=ScriptedAnswers([]), interactive=False)
+    with pytest.raises(EOFError):
+        fill_slots("password_generate", read=ScriptedAnswers([]), interactive=True)
+
+
+def test_conditional_slots_follow_earlier_answers():
+    read = answers("Gmail", "me", "y", "", "n", "", "")
+    slots = fill_slots("password_add", read=read, read_secret=answers("master"), interactive=False)
+    assert slots == {"master_password": "master", "service": "Gmail", "username": "me", "generate": True,
+                     "length": "16", "uppercase": False, "digits": True, "symbols": True}
+
+
+def test_interactive_fill_slots_prints_the_intro(capsys):
+    fill_slots("weather", read=answers("Paris"))
+    assert "I detected that you want to know the weather!" in capsys.readouterr().out
+
+
+def test_forms_for_unknown_intents_return_the_slots_unchanged():
+    assert fill_slots("no_such_form", {"a": 1}) == {"a": 1}
@@ -0,0 +1,118 @@
+import io
+import json
+import threading
+import time
+
+import pytest
+
+from larry.api import Larry
+from larry.batch import ScriptedAnswers, format_stats, run_batch, run_command
+from larry.handlers import Handler, result
+
+
+def stand_in(name, func, asks=(), uses=None):
+    return Handler(name, func, None, uses, False, asks)
+
+
+def weather(city):
+    print(f"Checking {city}")
+    return result(message=f"Sunny in {city}", city=city)
+
+
+def slow(delay):
+    time.sleep(float(delay))
+    return result(message=str(delay))
+
+
+LARRY = Larry({
+    "weather": stand_in("weather", weather),
+    "slow": stand_in("slow", slow),
+    "wikipedia": stand_in("wikipedia", lambda query, read: result(message=read(f"Which {query}? ")),
+                          asks=("read",)),
+})
+
+
+def run(lines, workers=1):
+    out = io.StringIO()
+    stats = run_batch([json.dumps(line) if isinstance(line, dict) else line for line in lines], out,
+                      workers=workers, larry=LARRY)
+    return [json.loads(line) for line in out.getvalue().splitlines()], stats
+
+
+def test_utterances_pick_the_intent_and_answers_fill_the_form():
+    results, stats = run([{"id": "w", "utterance": "weather in Paris", "answers": ["Paris"]}])
+    assert results == [{"line": 1, "id": "w", "intent": "weather", "ok": True, "message": "Sunny in Paris",
+                        "data": {"city": "Paris"}, "output": "Checking Paris\n",
+                        "seconds": results[0]["seconds"]}]
+    assert stats["commands"] == 1
+    assert stats["failed"] == 0
+
+
+def test_slots_skip_the_questions():
+    results, _ = run([{"intent": "weather", "slots": {"city": "Oslo"}}])
+    assert results[0]["message"] == "Sunny in Oslo"
+
+
+def test_running_out_of_answers_fails_the_command_instead_of_waiting():
+    results, stats = run([{"utterance": "weather in Paris"}])
+    assert not results[0]["ok"]
+    assert "No answer given" in results[0]["message"]
+    assert stats["failed"] == 1
+
+
+def test_answers_reach_questions_the_task_asks_itself():
+    results, _ = run([{"intent": "wikipedia", "slots": {"query": "python"}, "answers": ["the language"]}])
+    assert results[0]["message"] == "the language"
+
+
+def test_results_come_out_in_input_order_with_several_workers():
+    delays = [0.05, 0.0, 0.03, 0.0, 0.01, 0.0]
+    results, stats = run([{"id": i, "intent": "slow", "slots": {"delay": d}} for i, d in enumerate(delays)],
+                         workers=4)
+    assert [r["id"] for r in results] == list(range(len(delays)))
+    assert [r["line"] for r in results] == list(range(1, len(delays) + 1))
+    assert stats["by_intent"]["slow"]["count"] == len(delays)
+
+
+def test_invalid_lines_fail_alone_and_blank_lines_are_skipped():
+    results, stats = run(["not json", "", "[1, 2]", {"intent": "weather", "slots": {"city": "Rome"}},
+                          {"intent": "nothing"}])
+    assert [r["line"] for r in results] == [1, 3, 4, 5]
+    assert [r["ok"] for r in results] == [False, False, True, False]
+    assert results[0]["message"].startswith("Invalid JSON")
+    assert "Unknown intent" in results[3]["message"]
+    assert stats["failed"] == 3
+    assert "(invalid)" in format_stats(stats)
+
+
+def test_handlers_using_the_same_resource_do_not_overlap():
+    running, overlaps = [], []
+    lock = threading.Lock()
+
+    def use():
+        with lock:
+            running.append(1)
+            overlaps.append(len(running))
+        time.sleep(0.01)
+        with lock:
+            running.pop()
+        return result()
+
+    larry = Larry({"use": stand_in("use", use, uses="db")})
+    run_batch([json.dumps({"intent": "use"})] * 8, io.StringIO(), workers=4, larry=larry)
+    assert max(overlaps) == 1
+
+
+def test_run_command_writes_output_to_into():
+    into = io.StringIO()
+    outcome = run_command(LARRY, {"intent": "weather", "slots": {"city": "Lima"}}, into=into)
+    assert "output" not in outcome
+    assert into.getvalue() == "Checking Lima\n"
+
+
+def test_scripted_answers_run_out_with_eof():
+    read = ScriptedAnswers(["a", 2])
+    assert read("first? ") == "a"
+    assert read() == "2"
+    with pytest.raises(EOFError):
+        read("third? ")
@@ -0,0 +1,51 @@
+import argparse
+import os
+
+import hot_paths
+
+
+def test_scratch_directory_is_temporary_and_restores_cwd_and_home(tmp_path):
+    home = os.environ["HOME"]
+    with hot_paths.scratch_directory() as workdir:
+        assert os.getcwd() == os.path.realpath(workdir)
+        assert os.environ["HOME"] == workdir
+        open("context_history.json", "w").close()
+    assert os.getcwd() == str(tmp_path)
+    assert os.environ["HOME"] == home
+    assert not os.path.exists(workdir)
+    assert os.listdir(tmp_path) == []
+
+
+def test_run_keeps_benchmark_files_out_of_the_working_directory(tmp_path, monkeypatch):
+    def writes(args, rng):
+        with open("context_history.json", "w") as f:
+            f.write("[]")
+        return {"writes.one": {"best": 1e-6, "median": 2e-6, "calls": 10}}
+
+    def needs_missing(args, rng):
+        raise ImportError("No module named 'tabulate'")
+
+    monkeypatch.setattr(hot_paths, "BENCHMARKS", {"writes": writes, "missing": needs_missing})
+    args = argparse.Namespace(only=["writes", "missing"], seed=1, context_sizes=[100], sessions=1, songs=1,
+                              expenses=1, days=1, files=1)
+    report = hot_paths.run(args)
+    assert os.listdir(tmp_path) == []
+    assert report["results"] == {"writes.one": {"best": 1e-6, "median": 2e-6, "calls": 10}}
+    assert report["skipped"] == {"missing": "No module named 'tabulate'"}
+
+
+def test_format_report_compares_medians_with_the_baseline():
+    report = {"results": {"a": {"best": 0.5e-3, "median": 1e-3}, "new": {"best": 2.0, "median": 3.0}},
+              "skipped": {"music": "No module named 'pygame'"}}
+    baseline = {"results": {"a": {"best": 1e-3, "median": 2e-3}}}
+    lines = hot_paths.format_report(report, baseline).splitlines()
+    assert "baseline" in lines[0]
+    assert lines[1].split()[-1] == "0.50x"
+    assert "3.00 s" in lines[2]
+    assert "skipped" in lines[3]
+
+
+def test_measure_reports_seconds_per_call():
+    result = hot_paths.measure(lambda: None, repeat=2)
+    assert 0 < result["best"] <= result["median"] < 1e-3
+    assert result["calls"] > 0
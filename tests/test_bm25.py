@@ -0,0 +1,79 @@
+import heapq
+import math
+import random
+
+import pytest
+
+from hot_paths import WORDS, synthetic_context
+from tasks.context.context_manager import TOKEN, ContextStore, bm25, bm25_idf, item_terms, recency
+
+
+class Exhaustive:
+    """Scores every item with BM25 times recency, as related() must rank them"""
+
+    def __init__(self, items):
+        self.tfs = [item_terms(item) for item in items]
+        self.lengths = [sum(tf.values()) for tf in self.tfs]
+        self.avgdl = sum(self.lengths) / len(items)
+
+    def scores(self, query):
+        terms = list(dict.fromkeys(TOKEN.findall(query.lower())))
+        n = len(self.tfs)
+        idf = {term: bm25_idf(n, sum(term in tf for tf in self.tfs)) for term in terms}
+        return [bm25(tf, length, idf, self.avgdl) * recency(n - 1 - i)
+                for i, (tf, length) in enumerate(zip(self.tfs, self.lengths))]
+
+    def top(self, query, max_items):
+        scores = self.scores(query)
+        return [(value, i) for value, i in heapq.nlargest(max_items, zip(scores, range(len(scores)))) if value > 0]
+
+
+@pytest.fixture(scope="module")
+def store(tmp_path_factory):
+    rng = random.Random(11)
+    items = synthetic_context(2000, rng)
+    for i, item in enumerate(items):
+        item["text"] += f" #{i}"
+    store = ContextStore(str(tmp_path_factory.mktemp("bm25") / "history.json"), maxlen=1500, archive=False)
+    store.extend(items)
+    return store
+
+
+def queries(count, seed):
+    rng = random.Random(seed)
+    vocabulary = list(WORDS) + ["user", "email", "weather", "task", "added", "note", "zebra", "error"]
+    for _ in range(count):
+        yield " ".join(rng.choice(vocabulary) for _ in range(rng.randint(1, 5)))
+
+
+def test_maxscore_ranks_like_scoring_every_item(store):
+    items = store.items()
+    exhaustive = Exhaustive(items)
+    position = {item["text"]: i for i, item in enumerate(items)}
+    for query in queries(120, seed=12):
+        scores = exhaustive.scores(query)
+        for max_items in (1, 3, 10):
+            expected = exhaustive.top(query, max_items)
+            found = store.related(query, max_items)
+            assert len(found) == len(expected), query
+            for text, (value, i) in zip(found, expected):
+                # Only a tie within rounding may come out in another order
+                assert position[text] == i or math.isclose(scores[position[text]], value), query
+
+
+def test_rarer_terms_weigh_more(tmp_path):
+    store = ContextStore(str(tmp_path / "history.json"), maxlen=None, archive=False)
+    store.extend([{"text": "common words here", "type": "note"}] * 20)
+    store.extend([{"text": "rare common", "type": "note"}, {"text": "common words here again", "type": "note"}])
+    assert store.related("rare common", 1) == ["rare common"]
+
+
+def test_recency_decays_towards_the_floor():
+    assert recency(0) == 1
+    assert recency(10 ** 6) == pytest.approx(0.5)
+    assert recency(200) == pytest.approx(0.75)
+
+
+def test_idf_is_positive_for_terms_in_most_items():
+    assert bm25_idf(10, 10) > 0
+    assert bm25_idf(10, 1) > bm25_idf(10, 5)
@@ -0,0 +1,74 @@
+import random
+
+import pytest
+
+import reference
+from hot_paths import CHAT_INPUTS, synthetic_texts
+from tasks.chatbot.response_generator import ChatRule, KeywordRules, get_response
+
+INPUT_WORDS = ("hello", "this", "how", "are", "you", "your", "name", "my", "is", "what", "who", "weather",
+               "forecast", "time", "date", "today", "remind", "schedule", "search", "look", "up", "find",
+               "thanks", "bye", "see", "who're", "emails", "meeting", "project", "report", "london", "music",
+               "budget", "flight", "invoice", "deadline", "notes", "WHERE", "Why", "sam", "the", "a")
+
+CONTEXT_TEXTS = ("User: send email to bob", "Assistant: Nice to meet you, Sam!", "Assistant: I'm Larry, your "
+                 "personal assistant", "User: add task buy milk", "Assistant: the forecast says rain",
+                 "User: my calendar", "Assistant: latest news headline", "User: nothing in particular")
+
+
+def random_conversations(count, seed):
+    rng = random.Random(seed)
+    for _ in range(count):
+        text = " ".join(rng.choice(INPUT_WORDS) for _ in range(rng.randint(1, 7)))
+        if rng.random() < 0.3:
+            yield text, None
+            continue
+        context = [rng.choice(CONTEXT_TEXTS) for _ in range(rng.randint(0, 6))]
+        context += ["User: " + t for t in synthetic_texts(rng.randint(0, 4), rng)]
+        if rng.random() < 0.2:
+            context.append("User: " + text)
+        rng.shuffle(context)
+        yield text, context
+
+
+@pytest.mark.parametrize("text", CHAT_INPUTS)
+def test_benchmark_inputs_match_the_elif_chain(text):
+    context = ["User: what's the weather in london", "Assistant: Nice to meet you, Sam!"]
+    assert get_response(text) == reference.get_response(text)
+    assert get_response(text, context) == reference.get_response(text, context)
+
+
+def test_random_conversations_match_the_elif_chain():
+    for text, context in random_conversations(5000, seed=4):
+        assert get_response(text, context) == reference.get_response(text, context), (text, context)
+
+
+@pytest.mark.parametrize("text, response", [
+    ("this is it", "Hello! How can I help you today?"),
+    ("my name is ada lovelace", "Nice to meet you, Ada Lovelace! How can I help you today?"),
+    ("look up flights", "What would you like me to search for?"),
+    ("Why not", "That's a good question. To give you the best answer, could you provide more details?"),
+    ("zzz", "I'm not sure how to respond to that. Could you rephrase your request or ask me something specific?"),
+])
+def test_responses(text, response):
+    assert get_response(text) == (response, None)
+
+
+def test_the_most_relevant_context_item_is_used():
+    context = ["Assistant: meeting moved to friday", "User: email the budget report",
+               "Assistant: the budget report is ready"]
+    response, used = get_response("send the budget report", context)
+    assert used == "User: email the budget report"
+    assert "emails" in response
+
+
+def test_keyword_rules_need_every_group_and_keep_table_order():
+    rules = KeywordRules([ChatRule("both", (("red",), ("car", "bus")), "both"),
+                          ChatRule("red", (("red",),), "red"),
+                          ChatRule("reddish", (("reddish",),), "reddish"),
+                          ChatRule("always", (), "always")])
+    assert [rule.name for rule in rules.matching("a red bus")] == ["both", "red", "always"]
+    # A longer keyword at the same position still counts for its prefixes
+    assert [rule.name for rule in rules.matching("reddish")] == ["red", "reddish", "always"]
+    assert [rule.name for rule in rules.matching("blue")] == ["always"]
+    assert [rule.name for rule in KeywordRules([]).matching("x")] == []
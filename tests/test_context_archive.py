@@ -0,0 +1,103 @@
+import pytest
+
+from tasks.context import archive as archive_module
+from tasks.context.archive import ContextArchive, archive_path
+from tasks.context.context_manager import ContextStore
+from tasks.context.items import ContextItem
+
+
+def note(text, context_type="note"):
+    return ContextItem(text, context_type)
+
+
+@pytest.fixture
+def archive(tmp_path):
+    archive = ContextArchive(str(tmp_path / "archive.db"))
+    yield archive
+    archive.close()
+
+
+def keep_all(seq, item):
+    return 1.0
+
+
+def test_evicted_items_are_archived_and_found_when_memory_has_too_few(tmp_path):
+    store = ContextStore(str(tmp_path / "history.json"), maxlen=5, digest_sessions=False)
+    store.load()
+    store.append({"text": "Booked flight to Lisbon", "type": "note"}, save=False)
+    for i in range(10):
+        store.append({"text": f"Added task: chore {i}", "type": "task"}, save=False)
+    store.flush()
+
+    # The session start marker, the flight and five chores
+    assert store.archive.count() == 7
+    assert store.related("lisbon flight") == ["Booked flight to Lisbon"]
+    assert store.related("chore", 2) == ["Added task: chore 9", "Added task: chore 8"]
+    store.archive.close()
+
+
+def test_the_archive_is_not_searched_while_memory_has_enough_matches(tmp_path, monkeypatch):
+    store = ContextStore(str(tmp_path / "history.json"), maxlen=5, digest_sessions=False)
+    store.load()
+    for i in range(10):
+        store.append({"text": f"Added task: chore {i}", "type": "task"}, save=False)
+    store.flush()
+
+    def search(*args):
+        raise AssertionError("archive searched")
+
+    monkeypatch.setattr(store.archive, "search", search)
+    assert len(store.related("chore", 3)) == 3
+    store.archive.close()
+
+
+def test_nothing_is_created_until_an_item_is_archived(tmp_path, archive):
+    assert archive.search(["anything"], keep_all) == []
+    assert archive.count() == 0
+    assert archive.sessions() == []
+    assert not (tmp_path / "archive.db").exists()
+    assert archive_path("dir/context_history.json") == "dir/context_history_archive.db"
+
+
+def test_archiving_an_item_twice_keeps_one_copy(archive):
+    archive.add([(1, note("Created note: groceries"))])
+    archive.add([(1, note("Created note: groceries")), (2, note("Created note: groceries"))])
+    assert archive.count() == 2
+
+
+def test_search_finds_words_inside_other_words_and_types(archive):
+    archive.add([(1, note("Sent an email to Bob")), (2, note("Checking weather for Rome", "weather")),
+                 (3, note("Created note: emailing list"))])
+    found = [text for _, _, text in archive.search(["email"], keep_all)]
+    assert sorted(found) == ["Created note: emailing list", "Sent an email to Bob"]
+    assert [text for _, _, text in archive.search(["weather"], keep_all)] == ["Checking weather for Rome"]
+    # Words too short for the trigram index only match through the type
+    assert archive.search(["to"], keep_all) == []
+
+
+def test_search_ranks_with_the_given_score(archive):
+    archive.add([(seq, note(f"report draft {seq}")) for seq in range(1, 6)])
+    best = archive.search(["report"], lambda seq, item: -seq, max_items=2)
+    assert [seq for _, seq, _ in best] == [1, 2]
+
+
+def test_decoded_items_are_kept_for_later_searches(archive, monkeypatch):
+    monkeypatch.setattr(archive_module, "DECODED_ITEMS", 3)
+    archive.add([(seq, note(f"report draft {seq}")) for seq in range(1, 6)])
+    archive.search(["report"], keep_all)
+    assert len(archive._decoded) == 3
+    kept = dict(archive._decoded)
+    archive.search(["report"], keep_all)
+    assert all(archive._decoded.get(rowid) is item for rowid, item in kept.items() if rowid in archive._decoded)
+
+
+def test_sessions_and_clear(archive):
+    archive.add([(1, note("Created note: a"))])
+    archive.add_sessions([{"first_seq": 1, "last_seq": 4, "text": "digest"}])
+    archive.add_sessions([{"first_seq": 1, "last_seq": 5, "text": "digest again"}])
+    assert archive.sessions() == [{"first_seq": 1, "last_seq": 5, "text": "digest again"}]
+
+    archive.clear()
+    assert archive.count() == 0
+    assert archive.sessions() == []
+    assert archive.search(["note"], keep_all) == []
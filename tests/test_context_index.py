@@ -0,0 +1,42 @@
+import random
+
+from hot_paths import WORDS, synthetic_context
+from tasks.context.context_manager import ContextStore, get_related_context, item_terms, update_context
+
+
+def memory_store(tmp_path, maxlen, name="history.json"):
+    return ContextStore(str(tmp_path / name), maxlen=maxlen, archive=False)
+
+
+def test_related_only_returns_items_sharing_a_term(context_store):
+    update_context("Checking weather for London", context_type="weather")
+    update_context("Added task: buy milk", context_type="task")
+    update_context("Created note: london trip", context_type="note")
+
+    assert get_related_context("london") == ["Created note: london trip", "Checking weather for London"]
+    assert get_related_context("milk") == ["Added task: buy milk"]
+    assert get_related_context("nothing like it") == []
+    assert get_related_context("?!") == []
+
+
+def test_the_index_follows_evictions(tmp_path):
+    rng = random.Random(5)
+    evicting = memory_store(tmp_path, maxlen=50)
+    evicting.extend(synthetic_context(400, rng))
+    # The same 50 items, added to a store that never evicted any
+    fresh = memory_store(tmp_path, maxlen=50, name="fresh.json")
+    fresh.extend(evicting.items())
+
+    assert len(evicting._entries) == 50
+    assert evicting._total_length == sum(sum(item_terms(item).values()) for item in evicting.items())
+    assert {term: len(seqs) for term, seqs in evicting._postings.items()} == \
+           {term: len(seqs) for term, seqs in fresh._postings.items()}
+    for word in WORDS:
+        assert evicting.related(word, 5) == fresh.related(word, 5), word
+
+
+def test_newer_items_win_ties(tmp_path):
+    store = memory_store(tmp_path, maxlen=None)
+    store.extend([{"text": "Added task: report", "type": "task"}] * 3)
+    store.extend([{"text": "Added task: report!", "type": "task"}])
+    assert store.related("report", 1) == ["Added task: report!"]
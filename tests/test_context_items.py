@@ -0,0 +1,56 @@
+import random
+import sys
+
+import pytest
+
+from hot_paths import synthetic_context
+from tasks.context.items import ContextItem, as_item, format_timestamp, parse_timestamp
+
+
+def test_json_form_round_trips():
+    for item in synthetic_context(200, random.Random(3)):
+        assert ContextItem.from_dict(item).to_dict() == item
+
+
+def test_items_read_like_the_old_dicts():
+    item = ContextItem.from_dict({"text": "Sent email ✉", "type": "email", "topics": ["email"],
+                                  "timestamp": "2024-05-01 09:30:00"})
+    assert item["text"] == "Sent email ✉"
+    assert item["type"] == "email"
+    assert item.get("topics") == ["email"]
+    assert item["timestamp"] == "2024-05-01 09:30:00"
+    assert "topics" in item
+    with pytest.raises(KeyError):
+        item["missing"]
+
+
+def test_missing_fields_stay_missing():
+    item = as_item({"text": "old"})
+    assert item.to_dict() == {"text": "old", "type": "general"}
+    assert "timestamp" not in item
+    assert item.get("topics", ()) == ()
+    with pytest.raises(KeyError):
+        item["topics"]
+
+
+def test_items_share_their_topic_tuples_and_have_no_dict():
+    first, second = ContextItem("a", "note", ["email", "task"]), ContextItem("b", "note", ["email", "task"])
+    assert first.topic_ids is second.topic_ids
+    assert not hasattr(first, "__dict__")
+    assert sys.getsizeof(first) < sys.getsizeof({"text": "a", "type": "note"})
+
+
+def test_new_items_are_stamped_now():
+    item = ContextItem("now")
+    assert parse_timestamp(item.timestamp) == item.created
+
+
+def test_timestamps():
+    assert parse_timestamp("not a date") is None
+    assert parse_timestamp(None) is None
+    assert format_timestamp(parse_timestamp("2024-02-29 23:59:59")) == "2024-02-29 23:59:59"
+
+
+def test_as_item_leaves_items_alone():
+    item = ContextItem("x")
+    assert as_item(item) is item
@@ -0,0 +1,110 @@
+import json
+
+from tasks.context.context_manager import ContextStore, journal_path, read_history
+from tasks.context.sessions import SESSION_START
+
+
+def new_store(tmp_path, **options):
+    options.setdefault("archive", False)
+    return ContextStore(str(tmp_path / "history.json"), **options)
+
+
+def texts(items):
+    return [item["text"] for item in items if item["text"] != SESSION_START]
+
+
+def journal_lines(tmp_path):
+    with open(journal_path(str(tmp_path / "history.json"))) as f:
+        return [json.loads(line) for line in f]
+
+
+def add(store, count, start=0):
+    for i in range(start, start + count):
+        store.append({"text": f"item {i}", "type": "note"}, save=False)
+    store.flush()
+
+
+def test_items_are_appended_to_the_journal_only(tmp_path):
+    store = new_store(tmp_path)
+    store.load()
+    add(store, 5)
+
+    lines = journal_lines(tmp_path)
+    assert [line["seq"] for line in lines] == list(range(1, 7))
+    assert lines[0]["item"]["text"] == SESSION_START
+    assert not (tmp_path / "history.json").exists()
+    assert texts(read_history(store.path)) == [f"item {i}" for i in range(5)]
+
+
+def test_load_replays_the_journal(tmp_path):
+    store = new_store(tmp_path)
+    store.load()
+    add(store, 5)
+
+    reloaded = new_store(tmp_path)
+    reloaded.load()
+    assert texts(reloaded.items()) == [f"item {i}" for i in range(5)]
+    assert reloaded.items()[-1]["text"] == SESSION_START
+
+
+def test_compaction_folds_the_journal_into_the_snapshot(tmp_path):
+    store = new_store(tmp_path, compact_after=10, maxlen=None)
+    store.load()
+    for start in range(0, 25, 5):
+        add(store, 5, start)
+        if store._compaction is not None:
+            store._compaction.join()
+
+    with open(store.path) as f:
+        snapshot = json.load(f)
+    lines = journal_lines(tmp_path)
+    assert snapshot["journal_seq"] >= 10
+    assert all(line["seq"] > snapshot["journal_seq"] for line in lines)
+    # Compaction starts once the journal is longer than the history too
+    assert len(lines) < max(10, len(store.items()))
+    assert texts(read_history(store.path)) == [f"item {i}" for i in range(25)]
+
+
+def test_a_compaction_cut_short_replays_nothing_twice(tmp_path):
+    store = new_store(tmp_path)
+    store.load()
+    add(store, 6)
+    # The snapshot was replaced but the journal not yet cut
+    items = [line["item"] for line in journal_lines(tmp_path)[:4]]
+    with open(store.path, "w") as f:
+        json.dump({"journal_seq": 4, "items": items}, f)
+
+    assert texts(read_history(store.path)) == [f"item {i}" for i in range(6)]
+
+
+def test_snapshots_in_the_old_list_format_still_load(tmp_path):
+    with open(tmp_path / "history.json", "w") as f:
+        json.dump([{"text": "old item", "type": "note", "timestamp": "2024-01-01 10:00:00"}], f)
+    store = new_store(tmp_path)
+    store.load()
+    add(store, 1)
+
+    assert texts(read_history(store.path)) == ["old item", "item 0"]
+
+
+def test_a_store_that_was_not_loaded_continues_the_numbering(tmp_path):
+    store = new_store(tmp_path)
+    store.load()
+    add(store, 3)
+
+    later = new_store(tmp_path)
+    add(later, 2, start=3)
+    assert [line["seq"] for line in journal_lines(tmp_path)] == list(range(1, 7))
+    assert texts(read_history(store.path)) == [f"item {i}" for i in range(5)]
+
+
+def test_clear_forgets_everything_on_disk(tmp_path):
+    store = new_store(tmp_path)
+    store.load()
+    add(store, 3)
+    store.clear()
+
+    assert store.items() == []
+    assert read_history(store.path) == []
+    add(store, 1, start=9)
+    assert texts(read_history(store.path)) == ["item 9"]
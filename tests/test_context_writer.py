@@ -0,0 +1,54 @@
+import os
+import time
+
+from tasks.context.context_manager import ContextStore, ContextWriter, journal_path, read_history
+
+
+def store_with(tmp_path, writer, name="history.json"):
+    store = ContextStore(str(tmp_path / name), archive=False, writer=writer)
+    store.load()
+    return store
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_a_burst_of_changes_is_written_together(tmp_path):
+    writer = ContextWriter(delay=0.2)
+    store = store_with(tmp_path, writer)
+    for i in range(50):
+        store.append({"text": f"item {i}", "type": "note"})
+    assert writer.queue_depth() == 51
+    assert not os.path.exists(journal_path(store.path))
+
+    wait_for(lambda: writer.stats()["writes"] == 1)
+    assert writer.queue_depth() == 0
+    assert len(read_history(store.path)) == 51
+    stats = writer.stats()
+    assert stats["requests"] == 50
+    assert stats["max_queue_depth"] == 51
+    assert stats["wait"]["p50"] >= 0.2
+    assert "50 saves in 1 writes" in writer.format_stats()
+
+
+def test_flush_writes_every_waiting_store_at_once(tmp_path):
+    writer = ContextWriter(delay=60)
+    first, second = store_with(tmp_path, writer, "a.json"), store_with(tmp_path, writer, "b.json")
+    first.append({"text": "for a", "type": "note"})
+    second.append({"text": "for b", "type": "note"})
+
+    writer.flush()
+    assert [item["text"] for item in read_history(first.path)][-1] == "for a"
+    assert [item["text"] for item in read_history(second.path)][-1] == "for b"
+    assert writer.stats()["waiting_stores"] == 0
+
+
+def test_save_wait_writes_before_returning(tmp_path):
+    store = store_with(tmp_path, ContextWriter(delay=60))
+    store.append({"text": "now", "type": "note"}, save=False)
+    store.save(wait=True)
+    assert read_history(store.path)[-1]["text"] == "now"
@@ -0,0 +1,106 @@
+import io
+import subprocess
+import sys
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from conftest import REPO_ROOT
+from tasks.chatbot import email
+from tasks.chatbot.cache import GenerationCache
+from tasks.chatbot.email import Draft, TokenStreamer, build_prompt, draft_email
+
+PIECES = ["Dear", " Sir", ",", "\n", "I", " am", " wri", "ting", " to", " ask", "."]
+
+
+class PieceTokenizer:
+    """Stand-in tokenizer whose ids index PIECES"""
+
+    def decode(self, ids, skip_special_tokens=True):
+        return "".join(PIECES[i] for i in ids)
+
+
+def test_the_streamer_writes_whole_words_as_tokens_arrive():
+    stream = io.StringIO()
+    streamer = TokenStreamer(PieceTokenizer(), stream)
+    streamer.put(np.array([[90, 91, 92]]))  # The prompt, which is skipped
+    written = []
+    for i in range(len(PIECES)):
+        streamer.put(np.array([i]))
+        written.append(stream.getvalue())
+    streamer.end()
+
+    assert stream.getvalue() == "".join(PIECES) + "\n"
+    assert streamer.ids == list(range(len(PIECES)))
+    assert streamer.first_token_seconds is not None
+    # "wri" is never written before "ting" completes the word
+    assert "Dear Sir,\nI am " in written
+    assert not any(text.endswith("wri") for text in written)
+
+
+def test_the_streamer_without_a_stream_only_collects():
+    streamer = TokenStreamer(PieceTokenizer())
+    streamer.put(np.array([0]))
+    streamer.put(np.array([1, 2]))
+    streamer.end()
+    assert streamer.ids == [1, 2]
+
+
+def test_prompts():
+    assert build_prompt("leave") == "To: the recipient\nRequest: leave\n\nEmail:\n"
+    assert build_prompt("leave", "hr@example.com", ["met on monday", "prefers mail"]) == \
+           "To: hr@example.com\nRequest: leave\nNotes: met on monday; prefers mail\n\nEmail:\n"
+
+
+@pytest.fixture
+def generated(monkeypatch):
+    """Replace the model with a recorder; returns the prompts it was asked to continue"""
+    prompts = []
+    complete = [True]
+
+    def generate(prompt, stream=None, time_budget=email.TIME_BUDGET):
+        prompts.append(prompt)
+        return Draft(f"Email {len(prompts)}", 0.01, 0.1, 5, False, complete[0])
+
+    monkeypatch.setattr(email.email_generator, "generate", generate)
+    monkeypatch.setattr(email, "generation_cache", GenerationCache(":memory:"))
+    return prompts, complete
+
+
+def test_drafts_are_cached(generated):
+    prompts, _ = generated
+    first = draft_email("leave", "hr@example.com")
+    stream = io.StringIO()
+    again = draft_email("leave", "hr@example.com", stream=stream)
+
+    assert (first.text, first.cached) == ("Email 1", False)
+    assert (again.text, again.cached, again.complete) == ("Email 1", True, True)
+    assert stream.getvalue() == "Email 1\n"
+    assert len(prompts) == 1
+    assert draft_email("leave", "boss@example.com").text == "Email 2"
+
+
+def test_drafts_cut_short_are_not_cached(generated):
+    prompts, complete = generated
+    complete[0] = False
+    draft_email("leave")
+    draft_email("leave")
+    assert len(prompts) == 2
+
+
+def test_the_model_is_loaded_when_an_email_starts_not_at_startup(monkeypatch):
+    code = ("import sys, main; print(main.warming is None, 'tasks.chatbot.email' in sys.modules, "
+            "'transformers' in sys.modules)")
+    out = subprocess.run([sys.executable, "-c", code], cwd=REPO_ROOT, capture_output=True, text=True,
+                         check=True).stdout.split()
+    assert out == ["True", "False", "False"]
+
+    import main
+
+    started = []
+    monkeypatch.setattr(main, "warming", None)
+    monkeypatch.setattr(main, "warm_up", lambda modules, verbose: started.append(modules) or "thread")
+    main.start_warm_up()
+    main.start_warm_up()
+    assert started == [main.WARM_MODULES]
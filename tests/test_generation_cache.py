@@ -0,0 +1,115 @@
+import itertools
+
+import pytest
+
+from tasks.chatbot import cache as cache_module
+from tasks.chatbot.cache import GenerationCache, cache_key
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Make every cache timestamp later than the one before"""
+    ticks = itertools.count(1000)
+    monkeypatch.setattr(cache_module.time, "time", lambda: float(next(ticks)))
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = GenerationCache(str(tmp_path / "cache" / "generation.db"))
+    yield cache
+    cache.close()
+
+
+def test_keys_change_with_every_input():
+    key = cache_key("summary", "bart", "text", max_len=150, min_len=50)
+    assert key == cache_key("summary", "bart", "text", min_len=50, max_len=150)
+    assert len({key, cache_key("email", "bart", "text", max_len=150, min_len=50),
+                cache_key("summary", "t5", "text", max_len=150, min_len=50),
+                cache_key("summary", "bart", "text ", max_len=150, min_len=50),
+                cache_key("summary", "bart", "text", max_len=151, min_len=50)}) == 5
+
+
+def test_generated_text_is_served_from_the_cache(cache):
+    calls = []
+
+    def generate():
+        calls.append(1)
+        return "a summary"
+
+    assert cache.cached("k", generate) == "a summary"
+    assert cache.cached("k", generate) == "a summary"
+    assert calls == [1]
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_the_cache_survives_a_restart(cache, tmp_path):
+    cache.put("k", "kept")
+    cache.close()
+    reopened = GenerationCache(cache.path)
+    assert reopened.get("k") == "kept"
+    assert reopened.stats()["bytes"] == len("k") + len("kept")
+    reopened.close()
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path, clock):
+    cache = GenerationCache(str(tmp_path / "generation.db"), max_bytes=30)
+    for key in "abc":
+        cache.put(key, "x" * 9)  # 10 bytes each
+    cache.get("a")
+    cache.put("d", "x" * 9)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == cache.get("c") == cache.get("d") == "x" * 9
+    stats = cache.stats()
+    assert (stats["entries"], stats["bytes"], stats["evictions"]) == (3, 30, 1)
+    cache.close()
+
+
+def test_replacing_an_entry_counts_its_bytes_once(cache):
+    cache.put("k", "short")
+    cache.put("k", "much longer")
+    assert cache.stats()["bytes"] == len("k") + len("much longer")
+    assert cache.stats()["entries"] == 1
+
+
+def test_values_larger_than_the_cache_are_not_kept(tmp_path):
+    cache = GenerationCache(str(tmp_path / "generation.db"), max_bytes=10)
+    cache.put("k", "x" * 20)
+    assert cache.get("k") is None
+    cache.close()
+
+
+def test_a_zero_size_cache_is_off(tmp_path):
+    cache = GenerationCache(str(tmp_path / "generation.db"), max_bytes=0)
+    assert cache.cached("k", lambda: "fresh") == "fresh"
+    assert cache.get("k") is None
+    assert not (tmp_path / "generation.db").exists()
+
+
+def test_stats_before_first_use_create_nothing(cache, tmp_path):
+    assert cache.stats()["entries"] == 0
+    assert "hit rate -" in cache.format_stats()
+    assert not (tmp_path / "cache").exists()
+
+
+def test_clear(cache):
+    cache.put("k", "v")
+    cache.clear()
+    assert cache.get("k") is None
+    assert cache.stats()["bytes"] == 0
+
+
+def test_summaries_are_cached(monkeypatch, first_words):
+    from tasks.chatbot import summarize
+
+    summarizer = summarize.Summarizer()
+    summarizer._pipeline = first_words()
+    monkeypatch.setattr(summarize, "summarizer", summarizer)
+    monkeypatch.setattr(summarize, "generation_cache", GenerationCache(":memory:"))
+
+    text = "A text that is summarized once. " * 3
+    assert summarize.summarize_text(text, max_len=4) == summarize.summarize_text(text, max_len=4)
+    assert len(summarizer._pipeline.calls) == 1
+    summarize.summarize_text(text, max_len=5)
+    assert len(summarizer._pipeline.calls) == 2
+    assert summarize.summarize_text("  ") == "Input text is empty."
@@ -0,0 +1,82 @@
+import random
+import re
+
+import pytest
+
+import reference
+from dispatch_benchmark import CORPUS
+from larry.intents import FALLBACK_INTENT, INTENT_TABLE, IntentDispatcher, IntentRule, match_intent
+from tasks.utils import trie_regex
+
+# Fragments random inputs are built from: every keyword of the table plus
+# words that take some intents through their regex or unless patterns
+FRAGMENTS = sorted({phrase for rule in INTENT_TABLE for phrase in (rule.keywords or rule.pattern.split("|"))
+                    if "(" not in phrase and "\\" not in phrase}
+                   | {"play", "song", "track", "called", "'", '"', "by", "music", "songs", "playlist",
+                      "volume", "up", "down", "to", "10", "%", "list", "all", "my", "playlists", "what's",
+                      "is", "playing", "stop", "hello", "sam", "Summarize", "GOOGLE", "\n", ""})
+
+
+def random_inputs(count, seed):
+    rng = random.Random(seed)
+    for _ in range(count):
+        words = [rng.choice(FRAGMENTS) for _ in range(rng.randint(1, 6))]
+        text = rng.choice((" ", "", "-")).join(words)
+        yield text.upper() if rng.random() < 0.1 else text
+
+
+def same(result, expected):
+    (intent, m), (expected_intent, expected_m) = result, expected
+    return intent == expected_intent and (m and m.span()) == (expected_m and expected_m.span())
+
+
+@pytest.mark.parametrize("text", CORPUS)
+def test_corpus_matches_the_sequential_chain(text):
+    assert same(match_intent(text), reference.match_intent(text))
+
+
+def test_random_inputs_match_the_sequential_chain():
+    for text in random_inputs(5000, seed=2):
+        assert same(match_intent(text), reference.match_intent(text)), text
+
+
+@pytest.mark.parametrize("text, intent", [
+    ("weather in London", "weather"),
+    ("SEND EMAIL now", "send_email"),
+    ("summarize this", "summarize"),
+    ("Summarize this", "chatbot"),
+    ("play song called Imagine", "play_song"),
+    ("play it again", "resume"),
+    ("pause", "pause"),
+    ("pause everything", "chatbot"),
+    ("anything else", FALLBACK_INTENT),
+])
+def test_known_intents(text, intent):
+    assert match_intent(text)[0] == intent
+
+
+def test_match_carries_the_intent_pattern_groups():
+    intent, m = match_intent("play song called Imagine by Lennon")
+    assert intent == "play_song"
+    assert m.group(3) == "Imagine"
+
+
+def test_regex_rules_without_keywords_are_rejected():
+    with pytest.raises(ValueError):
+        IntentDispatcher([IntentRule("odd", r"a+b")])
+
+
+def test_earlier_rules_win():
+    table = [IntentRule("short", "play"), IntentRule("long", "play song")]
+    assert IntentDispatcher(table).match("play song")[0] == "short"
+    assert IntentDispatcher(table[::-1]).match("play song")[0] == "long"
+
+
+def test_trie_regex_matches_exactly_the_words():
+    rng = random.Random(3)
+    for _ in range(200):
+        words = {"".join(rng.choice("ab.") for _ in range(rng.randint(1, 5))) for _ in range(rng.randint(1, 8))}
+        regex = re.compile(trie_regex(words))
+        for _ in range(20):
+            text = "".join(rng.choice("ab.") for _ in range(rng.randint(0, 6)))
+            assert (regex.fullmatch(text) is not None) == (text in words), (words, text)
@@ -0,0 +1,59 @@
+import subprocess
+import sys
+
+from conftest import REPO_ROOT
+from larry.loader import lazy_import, loaded_modules, registered_modules, warm_up
+
+
+def test_lazy_import_loads_the_module_on_first_call(module_dir):
+    (module_dir / "lazy_probe.py").write_text("def double(x):\n    return 2 * x\n")
+
+    double = lazy_import("lazy_probe", "double")
+    assert "lazy_probe" not in sys.modules
+    assert "not loaded" in repr(double)
+    assert "lazy_probe" in registered_modules()
+
+    assert double(21) == 42
+    assert "lazy_probe" in sys.modules
+    assert "lazy_probe" in loaded_modules()
+    assert "(loaded)" in repr(double)
+
+
+def test_lazy_attribute_forwards_attribute_access(module_dir):
+    (module_dir / "lazy_class_probe.py").write_text("class Thing:\n    KIND = 'thing'\n")
+
+    thing = lazy_import("lazy_class_probe", "Thing")
+    assert thing.KIND == "thing"
+
+
+def test_warm_up_imports_and_calls_the_module_hook(module_dir):
+    (module_dir / "warm_probe.py").write_text("warmed = []\n\ndef warm_up():\n    warmed.append(True)\n")
+
+    warm_up(["warm_probe"], verbose=False).join(timeout=10)
+    assert sys.modules["warm_probe"].warmed == [True]
+
+
+def test_warm_up_survives_a_broken_module(module_dir):
+    (module_dir / "broken_probe.py").write_text("raise ImportError('missing dependency')\n")
+
+    thread = warm_up(["broken_probe"], verbose=False)
+    thread.join(timeout=10)
+    assert not thread.is_alive()
+
+
+def test_importing_larry_loads_no_task_modules():
+    code = ("import sys, larry.api, larry.batch, larry.forms, larry.runtime; "
+            "print(' '.join(sorted(m for m in sys.modules if m.startswith('tasks.'))))")
+    loaded = subprocess.run([sys.executable, "-c", code], cwd=REPO_ROOT, capture_output=True, text=True,
+                            check=True).stdout.split()
+    assert loaded
+    assert all(name.startswith(("tasks.context", "tasks.utils")) for name in loaded), loaded
+
+
+def test_the_default_context_store_does_not_load_numpy(tmp_path):
+    code = (f"import sys; sys.path.insert(0, {REPO_ROOT!r}); "
+            "import main, larry.api, tasks.context.context_manager as cm; cm.ContextStore('history.json').load(); "
+            "print(' '.join(m for m in ('numpy', 'tasks.context.vectors') if m in sys.modules))")
+    loaded = subprocess.run([sys.executable, "-c", code], cwd=tmp_path, capture_output=True, text=True,
+                            check=True).stdout.split()
+    assert loaded == []
@@ -0,0 +1,127 @@
+import json
+import time
+
+import pytest
+
+from larry.api import Larry
+from larry.handlers import Handler, result
+from larry.metrics import IntentMetrics, is_stats_command, stats_command
+from tasks.utils import Histogram
+
+
+def test_a_command_is_split_into_input_wait_network_and_compute():
+    m = IntentMetrics()
+    with m.dispatch("weather"):
+        m.timed_input(lambda prompt: time.sleep(0.02))("City? ")
+        with m.blocked("network"):
+            time.sleep(0.03)
+    entry = m.snapshot()["weather"]
+    assert entry["count"] == 1
+    assert entry["errors"] == 0
+    assert entry["input_wait"]["sum"] >= 0.02
+    assert entry["network"]["sum"] >= 0.03
+    waited = entry["input_wait"]["sum"] + entry["network"]["sum"]
+    assert entry["compute"]["sum"] == pytest.approx(entry["dispatch"]["sum"] - waited)
+
+
+def test_nested_dispatches_count_as_one_command():
+    m = IntentMetrics()
+
+    @m.dispatched
+    def analyze():
+        m.tag("add_task")
+        with m.dispatch("inner"):
+            pass
+
+    analyze()
+    assert list(m.snapshot()) == ["add_task"]
+    assert m.snapshot()["add_task"]["count"] == 1
+
+
+def test_nested_blocking_is_not_counted_twice():
+    m = IntentMetrics()
+    with m.dispatch("x"):
+        with m.blocked("network"):
+            m.timed_input(lambda: time.sleep(0.02))()
+    entry = m.snapshot()["x"]
+    assert entry["network"]["sum"] >= 0.02
+    assert entry["input_wait"]["sum"] == 0
+
+
+def test_timing_outside_a_command_records_nothing():
+    m = IntentMetrics()
+    assert m.timed_input(lambda: "answer")() == "answer"
+    assert m.snapshot() == {}
+
+
+def test_exceptions_and_failures_count_as_errors():
+    m = IntentMetrics()
+    with pytest.raises(RuntimeError):
+        with m.dispatch("a"):
+            raise RuntimeError
+    with m.dispatch("b"):
+        m.fail()
+    with m.dispatch():
+        pass
+    snapshot = m.snapshot()
+    assert snapshot["a"]["errors"] == snapshot["b"]["errors"] == 1
+    assert snapshot["unknown"]["errors"] == 0
+
+
+def test_larry_execute_times_the_handler_and_its_network_wait(context_store):
+    from larry.metrics import metrics
+
+    metrics.reset()
+    larry = Larry({"fetch": Handler("fetch", lambda: time.sleep(0.02) or result(), None, None, True, ()),
+                   "bad": Handler("bad", lambda: result(False, "no"), None, None, False, ())})
+    larry.execute("fetch")
+    larry.execute("bad")
+    snapshot = metrics.snapshot()
+    assert snapshot["fetch"]["handler"]["sum"] >= 0.02
+    assert snapshot["fetch"]["network"]["sum"] >= 0.02
+    assert snapshot["bad"]["errors"] == 1
+
+
+def test_prometheus_buckets_are_cumulative():
+    m = IntentMetrics()
+    for _ in range(3):
+        with m.dispatch("weather"):
+            pass
+    text = m.to_prometheus()
+    assert 'larry_errors_total{intent="weather"} 0' in text
+    assert 'larry_dispatch_seconds_bucket{intent="weather",le="+Inf"} 3' in text
+    assert 'larry_dispatch_seconds_count{intent="weather"} 3' in text
+
+
+def test_export(tmp_path):
+    m = IntentMetrics()
+    with m.dispatch("weather"):
+        pass
+    path = m.export("json", str(tmp_path / "metrics.json"))
+    assert json.loads(open(path).read())["intents"]["weather"]["count"] == 1
+    with pytest.raises(ValueError):
+        m.export("xml")
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("stats", True), ("  STATS  ", True), ("stats   json", True), ("Stats Prometheus", True),
+    ("stats for the match yesterday", False), ("statistics", False), ("stats xml", False), ("", False),
+])
+def test_is_stats_command(text, expected):
+    assert is_stats_command(text) is expected
+
+
+def test_stats_command_exports_to_the_working_directory(tmp_path):
+    assert stats_command("stats prometheus") == "Metrics written to larry_metrics.prom"
+    assert (tmp_path / "larry_metrics.prom").exists()
+
+
+def test_histogram_percentiles_and_buckets():
+    histogram = Histogram(buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 5.0):
+        histogram.observe(value)
+    summary = histogram.summary()
+    assert summary["buckets"] == {"0.1": 1, "1.0": 2, "+Inf": 1}
+    assert summary["p50"] == 0.5
+    assert summary["p99"] == 5.0
+    assert Histogram().percentile(50) is None
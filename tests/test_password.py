@@ -0,0 +1,45 @@
+import pytest
+
+pytest.importorskip("cryptography")
+
+from tasks.security import password
+
+
+class Secrets:
+    """read_secret that answers from a list and records the prompts"""
+
+    def __init__(self, answers):
+        self.answers = list(answers)
+        self.prompts = []
+
+    def __call__(self, prompt):
+        self.prompts.append(prompt)
+        return self.answers.pop(0)
+
+
+@pytest.fixture
+def saved(monkeypatch, tmp_path):
+    vaults = []
+    monkeypatch.setattr(password, "PASSWORD_FILE", str(tmp_path / "passwords.enc"))
+    monkeypatch.setattr(password, "_save_passwords", lambda passwords, master: vaults.append(master) or True)
+    return vaults
+
+
+def test_a_short_master_password_is_asked_for_again(saved, capsys):
+    read_secret = Secrets(["abc", "long enough", "long enough"])
+    assert password.initialize_password_manager(read_secret=read_secret)
+    assert saved == ["long enough"]
+    assert read_secret.prompts == ["Create master password: ", "Create master password: ",
+                                   "Confirm master password: "]
+    assert "at least 8 characters" in capsys.readouterr().out
+
+
+def test_mismatched_master_passwords_are_asked_for_again(saved):
+    read_secret = Secrets(["long enough", "not the same", "long enough", "long enough"])
+    assert password.initialize_password_manager(read_secret=read_secret)
+    assert saved == ["long enough"]
+
+
+def test_a_short_master_password_given_up_front_is_refused(saved):
+    assert not password.initialize_password_manager("abc", read_secret=Secrets([]))
+    assert saved == []
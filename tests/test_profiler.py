@@ -0,0 +1,91 @@
+import json
+import sys
+
+import pytest
+
+from larry.profiler import StartupProfiler, format_report, requested_output
+
+
+@pytest.fixture
+def package(module_dir):
+    root = module_dir / "profprobe"
+    root.mkdir()
+    (root / "__init__.py").write_text("import time\nfrom profprobe import child\n\nSTARTED = time.sleep(0.02)\n")
+    (root / "child.py").write_text("import time\n\n\ndef helper():\n    pass\n\n\nLOADED = time.sleep(0.03)\n")
+    (root / "later.py").write_text("VALUE = sum(range(10))\n")
+    (root / "broken.py").write_text("raise ImportError('missing dependency')\n")
+    yield "profprobe"
+    for name in [name for name in sys.modules if name.startswith("profprobe")]:
+        del sys.modules[name]
+
+
+def profile(package, on_demand=()):
+    profiler = StartupProfiler(package)
+    profiler.start()
+    try:
+        __import__(package)
+        profiler.end_startup()
+        profiler.load_on_demand(list(on_demand))
+    finally:
+        profiler.stop()
+    return profiler
+
+
+def test_nested_imports_are_counted_once(package):
+    report = profile(package).report()
+    modules = {record["module"]: record for record in report["modules"]}
+    parent, child = modules["profprobe"], modules["profprobe.child"]
+
+    assert child["self_seconds"] >= 0.03
+    assert parent["seconds"] >= 0.05
+    assert 0.02 <= parent["self_seconds"] < parent["seconds"] - 0.025
+    assert report["startup_seconds"] >= 0.05
+
+
+def test_statements_are_classified(package):
+    statements = {(s["module"], s["line"]): s for s in profile(package).report()["statements"]}
+    assert statements[("profprobe.child", 1)]["kind"] == "import"
+    assert statements[("profprobe.child", 8)]["kind"] == "side effect"
+    assert statements[("profprobe.child", 8)]["code"] == "LOADED = time.sleep(0.03)"
+    # Definitions are not listed
+    assert ("profprobe.child", 4) not in statements
+
+
+def test_on_demand_modules_are_loaded_in_their_own_phase(package, capsys):
+    report = profile(package, ["profprobe.later", "profprobe.broken"]).report()
+    modules = {record["module"]: record for record in report["modules"]}
+    assert modules["profprobe.later"]["phase"] == "on demand"
+    assert modules["profprobe"]["phase"] == "startup"
+    assert "missing dependency" in modules["profprobe.broken"]["error"]
+    assert "Could not import profprobe.broken" in capsys.readouterr().err
+    assert "missing dependency" in format_report(report)
+
+
+def test_stop_removes_the_import_hook(package):
+    profiler = profile(package)
+    assert not profiler.active
+    assert profiler._finder not in sys.meta_path
+
+
+def test_finish_writes_the_json_report(package, tmp_path, capsys, monkeypatch):
+    # Only the probe package, not every task module registered for lazy loading
+    monkeypatch.setattr("larry.profiler.registered_modules", lambda: ["profprobe.later"])
+    profiler = StartupProfiler(package)
+    profiler.start()
+    __import__(package)
+    assert profiler.finish(str(tmp_path / "profile.json")) == 0
+    report = json.loads((tmp_path / "profile.json").read_text())
+    assert report["startup_seconds"] > 0
+    assert "profprobe.later" in [record["module"] for record in report["modules"]]
+    assert "Full profile written to" in capsys.readouterr().out
+
+
+@pytest.mark.parametrize("argv, output", [
+    (["main.py"], None),
+    (["main.py", "--profile-startup"], "startup_profile.json"),
+    (["main.py", "--profile-startup", "out.json"], "out.json"),
+    (["main.py", "--profile-startup", "--batch"], "startup_profile.json"),
+    (["main.py", "--profile-startup=mine.json"], "mine.json"),
+])
+def test_requested_output(argv, output):
+    assert requested_output(argv) == output
@@ -0,0 +1,34 @@
+import random
+
+from hot_paths import CONTEXT_TYPES, synthetic_context
+from tasks.context.context_manager import ContextStore, get_context, update_context
+
+
+def test_recent_by_type_matches_filtering_the_history(tmp_path):
+    rng = random.Random(9)
+    store = ContextStore(str(tmp_path / "history.json"), maxlen=60, archive=False)
+    for size in (10, 100, 500):
+        store.extend(synthetic_context(size, rng))
+        history = store.items()
+        for context_type in CONTEXT_TYPES + ("never_used",):
+            matching = [item for item in history if item["type"] == context_type]
+            for limit in (0, 1, 5, 100):
+                expected = matching[-limit:] if limit else []
+                assert store.recent(limit, context_type) == expected, (size, context_type, limit)
+        assert store.recent(7) == history[-7:]
+
+
+def test_get_context_returns_texts_oldest_first(context_store):
+    for i in range(4):
+        update_context(f"Added task: {i}", context_type="task")
+        update_context(f"Created note: {i}", context_type="note")
+    assert get_context(2, "task") == ["Added task: 2", "Added task: 3"]
+    assert get_context(2) == ["Added task: 3", "Created note: 3"]
+    assert get_context(-1) == []
+
+
+def test_update_context_types_by_content(context_store):
+    update_context("User: hello", context_type="task")
+    update_context("Error: no network", context_type="weather")
+    assert get_context(1, "user_input") == ["User: hello"]
+    assert get_context(1, "error") == ["Error: no network"]
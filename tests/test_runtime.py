@@ -0,0 +1,102 @@
+import asyncio
+import threading
+import time
+
+from larry.api import Larry
+from larry.handlers import Handler, result, run_async
+from larry.runtime import NETWORK_INTENTS, AsyncRuntime
+
+
+def stand_in(name, func):
+    return Handler(name, func, None, None, True, ())
+
+
+def sleep(seconds):
+    time.sleep(seconds)
+    print(f"slept {seconds}")
+    return result(message="done")
+
+
+async def where():
+    await asyncio.sleep(0)
+    return threading.current_thread().name
+
+
+release = threading.Event()
+
+LARRY = Larry({
+    "sleep": stand_in("sleep", sleep),
+    "block": stand_in("block", lambda: result(message=str(release.wait(5)))),
+    "where": stand_in("where", lambda: result(message=run_async(where()))),
+})
+
+
+def test_background_requests_run_at_the_same_time(context_store, capsys):
+    async def main():
+        runtime = AsyncRuntime(LARRY, workers=4)
+        start = time.perf_counter()
+        tasks = [runtime.spawn("sleep", {"seconds": 0.1}) for _ in range(4)]
+        assert runtime.pending == 4
+        results = await asyncio.gather(*tasks)
+        runtime.shutdown()
+        return results, time.perf_counter() - start, runtime.pending
+
+    results, elapsed, pending = asyncio.run(main())
+    assert [r["message"] for r in results] == ["done"] * 4
+    assert elapsed < 0.3
+    assert pending == 0
+    assert capsys.readouterr().out.count("slept 0.1\ndone\n") == 4
+
+
+def test_slow_requests_time_out(context_store, capsys):
+    async def main():
+        runtime = AsyncRuntime(LARRY, timeout=0.05)
+        outcome = await runtime.spawn("block", {})
+        # The worker cannot be interrupted: let it finish
+        release.set()
+        runtime._pool.shutdown(wait=True)
+        return outcome
+
+    outcome = asyncio.run(main())
+    assert not outcome["ok"]
+    assert outcome["data"] == {"error": "timeout"}
+    assert "took longer than 0.05 seconds" in capsys.readouterr().out
+
+
+def test_results_are_printed_above_the_prompt(capsys):
+    runtime = AsyncRuntime(LARRY)
+    runtime._prompt = "You: "
+    runtime.print_result({"output": "", "message": "Sunny"})
+    assert capsys.readouterr().out == "\nSunny\nYou: "
+    runtime.shutdown()
+
+
+def test_async_task_functions_run_on_the_repl_loop(context_store):
+    async def main():
+        runtime = AsyncRuntime(LARRY)
+        outcome = await runtime.spawn("where", {})
+        runtime.shutdown()
+        return outcome, threading.current_thread().name
+
+    outcome, loop_thread = asyncio.run(main())
+    assert outcome["message"] == loop_thread
+
+
+def test_async_task_functions_get_a_loop_of_their_own_elsewhere():
+    assert run_async(where()) == threading.current_thread().name
+
+
+def test_interact_runs_on_its_own_thread():
+    async def main():
+        runtime = AsyncRuntime(LARRY, workers=1)
+        names = await asyncio.gather(runtime.interact(lambda: threading.current_thread().name),
+                                     runtime.run_blocking(lambda: threading.current_thread().name))
+        runtime.shutdown()
+        return names
+
+    assert asyncio.run(main()) == ["larry-input", "larry-worker_0"]
+
+
+def test_only_network_handlers_run_in_the_background():
+    assert {"weather", "currency", "translate"} <= NETWORK_INTENTS
+    assert not {"add_task", "passwords", "chatbot"} & NETWORK_INTENTS
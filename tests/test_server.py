@@ -0,0 +1,116 @@
+import io
+import os
+import re
+import threading
+
+import pytest
+
+from larry.api import Larry
+from larry.client import LarryClient
+from larry.handlers import Handler, result
+from larry.server import LarryServer, SessionRegistry, _remove_stale_socket, session_filename
+from tasks.context.context_manager import get_context, update_context
+
+
+def stand_in(name, func, asks=()):
+    return Handler(name, func, None, None, False, asks)
+
+
+def remember(text):
+    update_context(f"Noted: {text}", context_type="note")
+    return result(message=" | ".join(get_context(10, "note")))
+
+
+def login(user, read_secret):
+    print(f"Logging in {user}")
+    return result(message=f"{user}:{read_secret('Password: ')}")
+
+
+@pytest.fixture
+def server(tmp_path):
+    larry = Larry({
+        "remember": stand_in("remember", remember),
+        "login": stand_in("login", login, asks=("read_secret",)),
+        "weather": stand_in("weather", lambda city: result(message=f"Sunny in {city}")),
+    })
+    server = LarryServer(str(tmp_path / "larry.sock"), larry, SessionRegistry(str(tmp_path / "sessions")))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+def client(server, session):
+    return LarryClient(server.path, session=session)
+
+
+def test_a_request_streams_output_and_asks_the_client(server):
+    out, prompts = io.StringIO(), []
+
+    def read_secret(prompt):
+        prompts.append(prompt)
+        return "hunter2"
+
+    reply = client(server, "s").request(intent="login", slots={"user": "ann"}, out=out, read_secret=read_secret)
+    assert reply["ok"]
+    assert reply["message"] == "ann:hunter2"
+    assert out.getvalue() == "Logging in ann\n"
+    assert prompts == ["Password: "]
+
+
+def test_answers_in_the_request_are_used_before_asking(server):
+    reply = client(server, "s").request(utterance="weather in Paris", answers=["Paris"], interactive=False)
+    assert reply["intent"] == "weather"
+    assert reply["message"] == "Sunny in Paris"
+
+
+def test_non_interactive_requests_fail_when_answers_run_out(server):
+    reply = client(server, "s").request(utterance="weather in Paris", interactive=False)
+    assert not reply["ok"]
+    assert "No answer given" in reply["message"]
+
+
+def test_sessions_keep_their_own_context(server, tmp_path):
+    work, home = client(server, "work"), client(server, "home")
+    work.request(intent="remember", slots={"text": "report"})
+    assert home.request(intent="remember", slots={"text": "groceries"})["message"] == "Noted: groceries"
+    assert work.request(intent="remember", slots={"text": "slides"})["message"] == "Noted: report | Noted: slides"
+
+    server.sessions.save_all()
+    files = os.listdir(tmp_path / "sessions")
+    for session in ("work", "home"):
+        assert any(name.startswith(session_filename(session)[:-len(".json")]) for name in files)
+
+
+def test_one_connection_serves_several_requests(server):
+    connection = client(server, "s")
+    for city in ("Oslo", "Rome", "Lima"):
+        assert connection.request(intent="weather", slots={"city": city})["message"] == f"Sunny in {city}"
+    connection.close()
+
+
+def test_stats_command(server):
+    client(server, "s").request(intent="weather", slots={"city": "Oslo"})
+    reply = client(server, "s").request(utterance="  Stats ")
+    assert reply["intent"] == "stats"
+    assert reply["data"]["weather"]["count"] >= 1
+
+
+def test_session_filenames_are_safe_and_distinct():
+    ids = ["work", "a/b", "a?b", "a_b", "../etc/passwd", "x" * 200, "café"]
+    names = [session_filename(session_id) for session_id in ids]
+    assert len(set(names)) == len(ids)
+    assert all(re.fullmatch(r"[\w.-]+", name) and len(name) < 80 for name in names)
+    assert names[0].startswith("work-")
+
+
+def test_a_live_socket_is_not_replaced(server, tmp_path):
+    with pytest.raises(RuntimeError):
+        _remove_stale_socket(server.path)
+
+    stale = tmp_path / "stale.sock"
+    stale.write_text("")
+    _remove_stale_socket(str(stale))
+    assert not stale.exists()
@@ -0,0 +1,85 @@
+import threading
+
+import pytest
+
+from larry.services import ServiceContainer
+
+
+class Service:
+    def __init__(self, closed):
+        self.closed = closed
+
+    def close(self):
+        self.closed.append(self)
+
+
+def test_a_service_is_built_once_on_first_use():
+    built = []
+    container = ServiceContainer()
+    container.register("db", lambda: built.append(object()) or built[-1])
+    assert container.started() == []
+
+    assert container.get("db") is container.get("db")
+    assert len(built) == 1
+    assert container.started() == ["db"]
+
+
+def test_concurrent_first_use_builds_one_instance():
+    built = []
+    barrier = threading.Barrier(8)
+
+    def factory():
+        built.append(object())
+        return built[-1]
+
+    container = ServiceContainer()
+    container.register("db", factory)
+    instances = []
+
+    def use():
+        barrier.wait()
+        instances.append(container.get("db"))
+
+    threads = [threading.Thread(target=use) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(built) == 1
+    assert all(instance is built[0] for instance in instances)
+
+
+def test_unknown_services_raise_key_error():
+    with pytest.raises(KeyError):
+        ServiceContainer().get("missing")
+
+
+def test_close_all_closes_newest_first_and_forgets_them():
+    closed = []
+    container = ServiceContainer()
+    container.register("first", lambda: Service(closed))
+    container.register("second", lambda: Service(closed))
+    container.register("plain", object)
+    first, second = container.get("first"), container.get("second")
+    container.get("plain")
+
+    container.close_all()
+    assert closed == [second, first]
+    assert container.get("first") is not first
+
+
+def test_init_report_lists_services_never_started():
+    container = ServiceContainer()
+    container.register("used", object)
+    container.register("unused", object)
+    container.get("used")
+    report = dict(container.init_report())
+    assert report["used"] >= 0
+    assert report["unused"] is None
+    assert "not started" in container.format_report()
+
+
+def test_resource_locks_are_shared_by_name():
+    container = ServiceContainer()
+    assert container.lock("db") is container.lock("db")
+    assert container.lock("db") is not container.lock("other")
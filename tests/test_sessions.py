@@ -0,0 +1,91 @@
+from tasks.context.context_manager import ContextStore
+from tasks.context.items import ContextItem
+from tasks.context.sessions import DIGEST_TYPE, SESSION_START, condense, digest, split_sessions
+
+STAMP = 1714550400  # 2024-05-01, local time
+
+
+def session(*items, start=1):
+    entries = [(start, ContextItem(SESSION_START, "system", created=STAMP))]
+    for i, (text, context_type) in enumerate(items, 1):
+        entries.append((start + i, ContextItem(text, context_type, created=STAMP + 60 * i)))
+    return entries
+
+
+EXPENSES = session(("Session started", "system"), ("User: track expense", "user_input"),
+                   ("track expense", "user_input"), ("Expense tracker initiated", "task"),
+                   ("Added expense: 36 for vending", "expense"), ("User: track expense", "user_input"),
+                   ("track expense", "user_input"), ("Added expense: 60 for shake", "expense"),
+                   ("Assistant response: done", "assistant_response"))
+
+
+def test_a_digest_lists_intents_what_was_done_and_what_was_said():
+    item, record = digest(EXPENSES, classify=lambda text: text.replace(" ", "_"))
+    assert item.type == DIGEST_TYPE
+    assert " | intents: track_expense x2 | done: Added expense: 36 for vending; Added expense: 60 for shake" \
+           " | said: track expense x2 | 10 items" in item.text
+    assert item.text.startswith("Session ")
+    assert record["first_seq"] == 1 and record["last_seq"] == 10
+    assert record["intents"] == {"track_expense": 2}
+    assert record["types"]["user_input"] == 4
+
+
+def test_without_a_classifier_no_intents_are_listed():
+    item, record = digest(EXPENSES)
+    assert "intents:" not in item.text
+    assert record["intents"] == {}
+
+
+def test_boilerplate_only_sessions_have_no_digest():
+    assert digest(session(("Session started", "system"), ("Weather check initiated", "weather"))) is None
+
+
+def test_condense_keeps_the_last_session_and_earlier_digests():
+    old_digest = (0, ContextItem("Session earlier", DIGEST_TYPE))
+    first = session(("Added task: a", "task"), start=1)
+    empty = session(("Session started", "system"), start=10)
+    last = session(("Added task: b", "task"), start=20)
+    entries = [old_digest] + first + empty + last
+
+    assert len(split_sessions(entries)) == 4
+    condensed, raw, records = condense(entries)
+    assert [item.type for _, item in condensed] == [DIGEST_TYPE, DIGEST_TYPE, "system", "task"]
+    assert condensed[0] == old_digest
+    assert condensed[-2:] == last
+    assert raw == first + empty
+    assert [record["first_seq"] for record in records] == [1]
+
+
+def test_loading_condenses_closed_sessions_into_the_archive(tmp_path):
+    import larry.api  # Registers the intent classifier the digests use
+
+    path = str(tmp_path / "history.json")
+    for i in range(3):
+        store = ContextStore(path)
+        store.load()
+        store.append({"text": "User: weather in Paris", "type": "user_input"}, save=False)
+        store.append({"text": f"Checking weather for Paris {i}", "type": "weather"}, save=False)
+        store.flush()
+        store.archive.close()
+
+    store = ContextStore(path)
+    store.load()
+    types = [item["type"] for item in store.items()]
+    # The most recent closed session stays as it was
+    assert types == [DIGEST_TYPE, DIGEST_TYPE, "system", "user_input", "weather", "system"]
+    assert "intents: weather" in store.items()[0]["text"]
+    assert len(store.archive.sessions()) == 2
+    # The raw items are still found, in the archive
+    assert "Checking weather for Paris 0" in store.related("paris", 10)
+    store.archive.close()
+
+
+def test_digests_can_be_turned_off(tmp_path):
+    path = str(tmp_path / "history.json")
+    for _ in range(2):
+        store = ContextStore(path, digest_sessions=False)
+        store.load()
+        store.append({"text": "Added task: a", "type": "task"}, save=False)
+        store.flush()
+        store.archive.close()
+    assert [item["type"] for item in store.items()] == ["system", "task", "system", "task"]
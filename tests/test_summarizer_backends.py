@@ -0,0 +1,60 @@
+import sys
+import threading
+import time
+
+import pytest
+
+from tasks.chatbot import summarize
+from tasks.chatbot.summarize import Summarizer, configure
+
+
+def test_nothing_is_loaded_until_the_first_summary(monkeypatch, first_words):
+    loads = []
+    summarizer = Summarizer()
+    monkeypatch.setattr(summarizer, "_load_pytorch", lambda: loads.append(1) or first_words())
+    assert not summarizer.loaded
+    assert summarizer.load_seconds is None
+
+    assert summarizer("One sentence.") == "One sentence."
+    summarizer("Another one.")
+    assert loads == [1]
+    assert summarizer.loaded
+    assert summarizer.load_seconds >= 0
+
+
+def test_concurrent_first_use_loads_once(monkeypatch, first_words):
+    loads = []
+
+    def slow_load():
+        loads.append(1)
+        time.sleep(0.05)
+        return first_words()
+
+    summarizer = Summarizer(backend="quantized")
+    monkeypatch.setattr(summarizer, "_load_quantized", slow_load)
+    threads = [threading.Thread(target=summarizer.load) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert loads == [1]
+
+
+def test_unknown_backends_are_rejected():
+    with pytest.raises(ValueError, match="Unknown summarizer backend"):
+        Summarizer(backend="tpu")
+
+
+def test_the_onnx_backend_explains_what_to_install(monkeypatch):
+    monkeypatch.setitem(sys.modules, "onnxruntime", None)
+    with pytest.raises(ImportError, match="optimum"):
+        Summarizer(backend="onnx").load()
+
+
+def test_configure_replaces_the_shared_summarizer(monkeypatch):
+    monkeypatch.setattr(summarize, "summarizer", summarize.summarizer)
+    configured = configure(backend="quantized", threads=2, batch_size=2)
+    assert summarize.summarizer is configured
+    assert (configured.backend, configured.threads, configured.batch_size) == ("quantized", 2, 2)
+    assert configured.model == summarize.MODEL
+    assert not configured.loaded
@@ -0,0 +1,76 @@
+import random
+
+import pytest
+
+from tasks.chatbot.summarize import Summarizer
+
+
+def summarizer_with(first_words, **options):
+    summarizer = Summarizer(**options)
+    summarizer._pipeline = first_words()
+    return summarizer
+
+
+def document(sentences, seed=1):
+    rng = random.Random(seed)
+    words = ["alpha", "beta", "gamma", "delta", "epsilon", "zeta", "eta", "theta"]
+    return " ".join(" ".join(f"{rng.choice(words)}{i}" for _ in range(rng.randint(2, 9))) + "."
+                    for i in range(sentences))
+
+
+def test_chunks_pack_whole_sentences_up_to_the_window(first_words):
+    summarizer = summarizer_with(first_words, chunk_tokens=20)
+    text = document(60)
+    chunks = list(summarizer.chunks(text))
+
+    assert " ".join(chunk for chunk, _ in chunks).split() == text.split()
+    assert all(tokens == len(chunk.split()) <= 20 for chunk, tokens in chunks)
+    assert all(chunk.endswith(".") for chunk, _ in chunks)
+    # Any two chunks in a row would overflow a window
+    assert all(a + b > 20 for (_, a), (_, b) in zip(chunks, chunks[1:]))
+
+
+def test_run_on_sentences_are_cut_into_windows(first_words):
+    summarizer = summarizer_with(first_words, chunk_tokens=10)
+    text = "short one. " + " ".join(f"w{i}" for i in range(35)) + " end. tail."
+    chunks = list(summarizer.chunks(text))
+    assert " ".join(chunk for chunk, _ in chunks).split() == text.split()
+    assert max(tokens for _, tokens in chunks) <= 10
+
+
+def test_paragraph_breaks_split_sentences(first_words):
+    summarizer = summarizer_with(first_words, chunk_tokens=3)
+    assert [chunk for chunk, _ in summarizer.chunks("a heading\n\nb c d")] == ["a heading", "b c d"]
+
+
+def test_the_default_window_comes_from_the_tokenizer(first_words):
+    # (40 tokens - 2 special ones) less a tenth to spare
+    assert summarizer_with(first_words).window() == 34
+
+
+def test_short_texts_are_summarized_in_one_call(first_words):
+    summarizer = summarizer_with(first_words, chunk_tokens=100)
+    assert summarizer("Just a few words here.", max_len=3, min_len=1) == "Just a few"
+    assert summarizer._pipeline.calls == ["Just a few words here."]
+
+
+def test_long_texts_are_reduced_level_by_level(first_words):
+    summarizer = summarizer_with(first_words, chunk_tokens=40, batch_size=3)
+    summary = summarizer(document(400), max_len=30, min_len=5)
+
+    levels = summarizer.last_levels
+    assert levels[-1] == 1
+    assert all(later < earlier for earlier, later in zip(levels, levels[1:]))
+    assert len(summary.split()) <= 30
+    batches = [call for call in summarizer._pipeline.calls if isinstance(call, list)]
+    assert max(len(batch) for batch in batches) == 3
+    assert sum(map(len, batches)) == sum(levels[:-1])
+
+
+@pytest.mark.parametrize("workers", [2, 4])
+def test_parallel_workers_keep_the_order(first_words, workers):
+    text = document(300, seed=3)
+    one = summarizer_with(first_words, chunk_tokens=30, batch_size=2)
+    many = summarizer_with(first_words, chunk_tokens=30, batch_size=2, workers=workers)
+    assert many(text, max_len=20, min_len=5) == one(text, max_len=20, min_len=5)
+    assert many.last_levels == one.last_levels
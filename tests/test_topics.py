@@ -0,0 +1,51 @@
+import random
+
+import pytest
+
+import reference
+from tasks.context.context_manager import TOPIC_KEYWORDS, TopicDetector, detect_context_topics
+
+PHRASES = sorted({phrase for phrases in TOPIC_KEYWORDS.values() for phrase in phrases.split("|")})
+
+
+def random_texts(alphabet, count, seed):
+    rng = random.Random(seed)
+    for _ in range(count):
+        parts = [rng.choice(alphabet) for _ in range(rng.randint(0, 8))]
+        yield rng.choice(("", " ", "-")).join(parts)
+
+
+@pytest.mark.parametrize("text, topics", [
+    ("Send email about the weather", ["email", "weather"]),
+    ("SEARCH FILE report.pdf", ["file", "search", "pdf"]),
+    ("merge this document", ["file", "pdf"]),
+    ("nothing here", []),
+    ("", []),
+])
+def test_detected_topics(text, topics):
+    assert detect_context_topics(text) == topics
+
+
+def test_random_texts_match_one_search_per_topic():
+    detector, old = TopicDetector(), reference.TopicDetector()
+    words = PHRASES + ["the", "a", "x", "do", "to", "doc", "ument", "sea", "rch", "file"]
+    for text in random_texts(words, 3000, seed=7):
+        assert detector.detect(text) == old.detect(text), text
+
+
+def test_overlapping_phrases_match_one_search_per_topic():
+    # Phrases that start inside each other: the scan must resume inside a hit
+    topics = {"a": "abc", "b": "bcd|cde", "c": "c", "d": "abcdx", "e": "dxy"}
+    detector, old = TopicDetector(topics), reference.TopicDetector(topics)
+    for text in random_texts(list("abcdexy "), 3000, seed=8):
+        assert detector.detect(text) == old.detect(text), text
+
+
+def test_registered_topics_are_detected_in_definition_order():
+    detector = TopicDetector({"email": "email"})
+    detector.register({"music": "song|playlist", "email": ["Inbox"]})
+    assert detector.detect("play the inbox song and email it") == ["email", "music"]
+
+
+def test_no_topics_detect_nothing():
+    assert TopicDetector({}).detect("anything") == []
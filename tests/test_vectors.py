@@ -0,0 +1,87 @@
+import random
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from hot_paths import WORDS, synthetic_context
+from tasks.context.context_manager import ContextStore, item_terms
+from tasks.context.vectors import MIN_SIMILARITY, HashedVectors
+
+
+def brute_force(vectors, query, items, max_items, recency_weight, half_life):
+    """Score every (seq, terms) item from its dense vector"""
+    newest = max(seq for seq, _ in items)
+    dense_query = np.zeros(vectors.dimensions)
+    np.add.at(dense_query, query[0], query[1])
+    scored = []
+    for seq, terms in items:
+        indices, values = vectors.vectorize(terms)
+        dense = np.zeros(vectors.dimensions)
+        dense[indices] = values
+        similarity = float(dense_query @ dense)
+        if similarity >= MIN_SIMILARITY:
+            factor = 1 - recency_weight + recency_weight * 0.5 ** ((newest - seq) / half_life)
+            scored.append((similarity * factor, seq))
+    return sorted(scored, reverse=True)[:max_items]
+
+
+def test_top_matches_brute_force_as_the_ring_wraps():
+    rng = random.Random(21)
+    vectors = HashedVectors(capacity=300, half_life=50)
+    items = []
+    for seq, item in enumerate(synthetic_context(2000, rng)):
+        terms = item_terms(item)
+        vectors.add(seq, terms)
+        items = (items + [(seq, terms)])[-300:]
+        if seq % 400 == 399:
+            assert len(vectors) == 300
+            for word in rng.sample(WORDS, 5):
+                query = vectors.query({word: 1})
+                found = vectors.top(query, 5, recency_weight=0.5)
+                expected = brute_force(vectors, query, items, 5, 0.5, 50)
+                assert [seq for _, seq in found] == [seq for _, seq in expected], word
+                assert [score for score, _ in found] == pytest.approx([score for score, _ in expected], rel=1e-4)
+
+
+def test_document_frequencies_follow_removals():
+    vectors = HashedVectors()
+    vectors.add(0, {"weather": 1})
+    vectors.add(1, {"weather": 1, "london": 1})
+    vectors.remove(0)
+    fresh = HashedVectors()
+    fresh.add(1, {"weather": 1, "london": 1})
+    assert (vectors.df == fresh.df).all()
+    assert len(vectors) == 1
+
+
+def test_empty_queries_and_items():
+    vectors = HashedVectors()
+    assert vectors.query({}) is None
+    vectors.add(0, {})
+    assert len(vectors) == 0
+    assert vectors.top(vectors.query({"x": 1}), 3) == []
+    with pytest.raises(ValueError):
+        HashedVectors(dimensions=500)
+
+
+def test_semantic_retrieval_matches_other_forms_of_a_word(tmp_path):
+    items = [{"text": "Sent email to boss@example.com", "type": "email"},
+             {"text": "Checking weather for Paris", "type": "weather"},
+             {"text": "Added task: water the plants", "type": "task"}]
+    semantic = ContextStore(str(tmp_path / "semantic.json"), archive=False, retrieval="semantic")
+    bm25 = ContextStore(str(tmp_path / "bm25.json"), archive=False)
+    semantic.extend(items)
+    bm25.extend(items)
+
+    for query, text in (("emails", "Sent email to boss@example.com"), ("weathers", "Checking weather for Paris")):
+        assert bm25.related(query, 1) == []
+        assert semantic.related(query, 1) == [text]
+
+
+def test_evicted_items_leave_the_semantic_index(tmp_path):
+    store = ContextStore(str(tmp_path / "history.json"), maxlen=3, archive=False, retrieval="semantic")
+    store.extend([{"text": "Booked flight to Lisbon", "type": "note"}]
+                 + [{"text": f"Added task: chore {i}", "type": "task"} for i in range(3)])
+    assert store.related("lisbon", 3) == []
+    assert len(store.vectors) == 3